@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Timestamp Parse Benchmark
+
+Compares the legacy `pd.to_datetime(column)` call (format inference, dateutil
+fallback per element) with `timestamps.parse_timestamps` on the TimeStamp
+column of Complete_List_Raw.csv and the Date column of UnreadCount.csv, and
+checks that both produce identical values.
+
+Usage:
+    python3 benchmarks/parse_benchmark.py --size medium
+    python3 benchmarks/parse_benchmark.py --events-file data/ingest/Complete_List_Raw.csv
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'daily' / 'scripts'))
+sys.path.insert(0, str(BENCH_DIR))
+
+import pandas as pd  # noqa: E402
+from synthetic_data import SIZE_PRESETS  # noqa: E402
+from run_benchmarks import prepare_workspace  # noqa: E402
+from timestamps import parse_timestamps  # noqa: E402
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def compare(label: str, values: 'pd.Series', source: str, repeat: int) -> None:
+    with warnings.catch_warnings():
+        # The legacy path warns "Could not infer format" on every call
+        warnings.simplefilter('ignore', UserWarning)
+        legacy_s, legacy = best_of(lambda: pd.to_datetime(values), repeat)
+    new_s, new = best_of(lambda: parse_timestamps(values, source, errors='strict'), repeat)
+    identical = bool((legacy.isna() == new.isna()).all() and (legacy.dropna() == new.dropna()).all())
+    speedup = legacy_s / new_s if new_s > 0 else float('inf')
+    print(f"  {label:<28} rows={len(values):>9,} distinct={values.nunique():>8,}  "
+          f"legacy {legacy_s * 1000:>9.1f}ms  new {new_s * 1000:>8.1f}ms  x{speedup:>6.1f}  "
+          f"{'identical' if identical else 'MISMATCH'}")
+    if not identical:
+        raise SystemExit(f"{label}: parsed values differ from pd.to_datetime")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark export timestamp parsing against pd.to_datetime.")
+    parser.add_argument('--size', choices=sorted(SIZE_PRESETS), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per parser (best is reported).')
+    parser.add_argument('--events-file', help='Use this Complete_List_Raw.csv instead of synthetic data.')
+    parser.add_argument('--unread-file', help='Use this UnreadCount.csv instead of synthetic data.')
+    args = parser.parse_args(argv)
+
+    if args.events_file or args.unread_file:
+        events_path = Path(args.events_file) if args.events_file else None
+        unread_path = Path(args.unread_file) if args.unread_file else None
+    else:
+        events, days = SIZE_PRESETS[args.size]
+        exports = prepare_workspace(args.size, events, days, args.seed) / 'exports'
+        events_path, unread_path = exports / 'Complete_List_Raw.csv', exports / 'UnreadCount.csv'
+
+    print("Timestamp parsing (best of {})".format(args.repeat))
+    if events_path:
+        compare('Complete_List_Raw.TimeStamp', pd.read_csv(events_path)['TimeStamp'], 'event_timestamp', args.repeat)
+    if unread_path:
+        compare('UnreadCount.Date', pd.read_csv(unread_path)['Date'], 'export_date', args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Quarantine Round-Trip Check
+
+Ingests synthetic exports three ways in scratch trees under benchmarks/data/
+and fails if fixing quarantined rows does not restore the clean result:
+
+    clean       the exports as generated
+    quarantine  exports with corrupted rows, then the fixed quarantine files
+                dropped on their own
+    export      exports with corrupted rows, then the corrected exports dropped again
+
+After the quarantine round-trip every email of the touched days must still be
+in the database and the fact partitions, every email and unread reading other
+than the fixed ones unchanged. A fixed Inbox row is matched only with the events
+of its file, so its own status may differ. After the export round-trip the days
+and fact partitions must equal the clean run exactly.
+
+Usage:
+    python3 benchmarks/quarantine_roundtrip.py
+    python3 benchmarks/quarantine_roundtrip.py --events 20000 --days 120 --corrupt 25
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import logging
+import random
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'daily' / 'scripts'))
+sys.path.insert(0, str(BENCH_DIR))
+
+import numpy as np  # noqa: E402
+from run_benchmarks import prepare_workspace  # noqa: E402
+
+EXPORTS = ('Complete_List_Raw.csv', 'UnreadCount.csv')
+# Column corrupted in each export, and the rows eligible for it
+CORRUPTIONS = {
+    'Complete_List_Raw.csv': ('TimeStamp', lambda row: row['EventType'] == 'Inbox'),
+    'UnreadCount.csv': ('TotalUnread', lambda row: True),
+}
+
+
+def read_rows(path: Path) -> Tuple[List[str], List[Dict[str, str]]]:
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        return list(reader.fieldnames), list(reader)
+
+
+def write_rows(path: Path, header: List[str], rows: List[Dict[str, str]]) -> None:
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=header, quoting=csv.QUOTE_ALL)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def fresh_tree(label: str) -> Path:
+    """Empty scratch project tree with the repository's SLA config."""
+    tree = BENCH_DIR / 'data' / label
+    shutil.rmtree(tree, ignore_errors=True)
+    for sub in ('data/ingest', 'data/backup', 'database', 'config'):
+        (tree / sub).mkdir(parents=True, exist_ok=True)
+    shutil.copy2(PROJECT_ROOT / 'config' / 'sla_config.json', tree / 'config' / 'sla_config.json')
+    return tree
+
+
+def ingest(tree: Path, files: Dict[str, Path]) -> None:
+    from ingest_and_update import IntelligentIngester
+
+    for name, source in files.items():
+        shutil.copy2(source, tree / 'data' / 'ingest' / name)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = IntelligentIngester(project_root=tree).run()
+    if not ok:
+        raise SystemExit(f"Ingestion failed in {tree}")
+
+
+def corrupt(exports: Path, out_dir: Path, per_file: int, seed: int) -> Dict[str, Set[int]]:
+    """Write copies of the exports with per_file corrupted rows; returns the corrupted line numbers."""
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    lines = {}
+    for name, (column, eligible) in CORRUPTIONS.items():
+        header, rows = read_rows(exports / name)
+        picked = rng.sample([i for i, row in enumerate(rows) if eligible(row)], per_file)
+        for i in picked:
+            rows[i][column] = 'n/a'
+        write_rows(out_dir / name, header, rows)
+        # Header is line 1
+        lines[name] = {i + 2 for i in picked}
+    return lines
+
+
+def fix_quarantine(tree: Path, exports: Path, out_dir: Path) -> Dict[str, Path]:
+    """Restore the quarantined rows from the original exports, keeping the quarantine columns."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fixed = {}
+    for name in EXPORTS:
+        found = sorted((tree / 'data' / 'quarantine').glob(f"{Path(name).stem}_quarantine_*.csv"))
+        if not found:
+            raise SystemExit(f"No quarantine file for {name}")
+        header, rows = read_rows(found[-1])
+        _, original = read_rows(exports / name)
+        for row in rows:
+            row.update(original[int(row['source_row']) - 2])
+        fixed[name] = out_dir / name
+        write_rows(fixed[name], header, rows)
+    return fixed
+
+
+def load(tree: Path) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """(database days, {day: facts sorted by conversation, Inbox time})"""
+    from fact_table import fact_store_for
+
+    db_path = tree / 'database' / 'email_database.json'
+    with open(db_path) as f:
+        days = json.load(f)['days']
+    store = fact_store_for(db_path)
+    facts = {}
+    for day in store.days():
+        columns = store.read_day(day)
+        order = np.lexsort((columns['inbox_ts'], columns['conversation']))
+        facts[day] = {name: values[order] for name, values in columns.items()}
+    return days, facts
+
+
+def email_keys(facts: Dict[str, Any]) -> List[Tuple[int, Any]]:
+    return list(zip(facts['conversation'].tolist(), facts['inbox_ts'].tolist()))
+
+
+def same_facts(a: Dict[str, Any], b: Dict[str, Any], skip: Optional[Set[Tuple[int, Any]]] = None) -> bool:
+    if email_keys(a) != email_keys(b):
+        return False
+    keep = np.array([key not in (skip or set()) for key in email_keys(a)], dtype=bool)
+    return all(np.array_equal(a[name][keep], b[name][keep], equal_nan=a[name].dtype.kind in 'fM')
+               for name in a)
+
+
+def readings(day: Dict[str, Any]) -> Dict[int, Tuple[Any, Any]]:
+    """Measured unread readings by hour (derived hours left out)."""
+    return {h['hour']: (h.get('unread_count'), h.get('sla_met')) for h in day.get('hourly_data', [])
+            if 'unread_count' in h and not h.get('unread_derived')}
+
+
+def check_quarantine(clean: Tuple[Dict, Dict], result: Tuple[Dict, Dict], fixed_emails: Set) -> List[str]:
+    (clean_days, clean_facts), (days, facts) = clean, result
+    problems = []
+    for day, expected in clean_facts.items():
+        if day not in facts or not same_facts(expected, facts[day], fixed_emails):
+            problems.append(f"{day}: fact partition differs beyond the fixed emails")
+    for day, expected in clean_days.items():
+        got = days.get(day, {})
+        total = (got.get('daily_summary') or {}).get('total_emails')
+        if total != expected['daily_summary'].get('total_emails'):
+            problems.append(f"{day}: total_emails {total} != {expected['daily_summary'].get('total_emails')}")
+        if readings(got) != readings(expected):
+            problems.append(f"{day}: unread readings differ")
+        for field in ('sla_compliance_rate', 'avg_unread_count'):
+            if (got.get('daily_summary') or {}).get(field) != expected['daily_summary'].get(field):
+                problems.append(f"{day}: {field} differs")
+    return problems
+
+
+def check_export(clean: Tuple[Dict, Dict], result: Tuple[Dict, Dict]) -> List[str]:
+    (clean_days, clean_facts), (days, facts) = clean, result
+    problems = [f"{day}: day entry differs" for day in sorted(set(clean_days) | set(days))
+                if clean_days.get(day) != days.get(day)]
+    problems += [f"{day}: fact partition differs" for day in sorted(set(clean_facts) | set(facts))
+                 if day not in clean_facts or day not in facts or not same_facts(clean_facts[day], facts[day])]
+    return problems
+
+
+def fixed_email_keys(rows: List[Dict[str, str]]) -> Set[Tuple[int, Any]]:
+    """(conversation code, Inbox time) of the emails whose Inbox rows were fixed."""
+    import pandas as pd
+    from fact_table import conversation_codes
+    from timestamps import parse_timestamps
+
+    codes = conversation_codes(pd.Series([row['Conversation-Id'] for row in rows]))
+    times = parse_timestamps(pd.Series([row['TimeStamp'] for row in rows]), 'event_timestamp')
+    return set(zip(codes.tolist(), times.to_numpy(dtype='datetime64[s]').tolist()))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Check that re-ingesting fixed quarantine rows restores the clean result.")
+    parser.add_argument('--events', type=int, default=6000, help='Synthetic event rows.')
+    parser.add_argument('--days', type=int, default=60, help='Days to spread them over.')
+    parser.add_argument('--corrupt', type=int, default=12, help='Rows to corrupt per export.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--verbose', action='store_true', help='Keep pipeline INFO logging.')
+    args = parser.parse_args(argv)
+
+    exports = prepare_workspace(f"roundtrip_{args.events}_{args.days}", args.events, args.days, args.seed) / 'exports'
+    if not args.verbose:
+        # Import the pipeline first: it calls logging.basicConfig on import
+        import ingest_and_update  # noqa: F401
+        logging.getLogger().setLevel(logging.ERROR)
+
+    clean_tree = fresh_tree('roundtrip_clean')
+    ingest(clean_tree, {name: exports / name for name in EXPORTS})
+    clean = load(clean_tree)
+
+    corrupted_dir = BENCH_DIR / 'data' / 'roundtrip_corrupted'
+    lines = corrupt(exports, corrupted_dir, args.corrupt, args.seed)
+    _, events = read_rows(exports / 'Complete_List_Raw.csv')
+    fixed_rows = [events[line - 2] for line in lines['Complete_List_Raw.csv']]
+
+    failures = 0
+    for mode in ('quarantine', 'export'):
+        tree = fresh_tree(f"roundtrip_{mode}")
+        ingest(tree, {name: corrupted_dir / name for name in EXPORTS})
+        if mode == 'quarantine':
+            ingest(tree, fix_quarantine(tree, exports, tree / 'fixed'))
+            result = load(tree)
+            problems = check_quarantine(clean, result, fixed_email_keys(fixed_rows))
+        else:
+            ingest(tree, {name: exports / name for name in EXPORTS})
+            problems = check_export(clean, load(tree))
+        print(f"  {mode:<11} {sum(len(v) for v in lines.values())} rows fixed  "
+              f"{'OK' if not problems else f'{len(problems)} problem(s)'}")
+        for problem in problems[:10]:
+            print(f"      {problem}")
+        failures += bool(problems)
+    if failures:
+        raise SystemExit("Quarantine round-trip did not restore the clean result")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark Suite
+
+Times IntelligentIngester, EmailClassifier, DashboardGenerator and the weekly KPI
+renderer end to end and per stage against synthetic exports, inside a scratch
+project tree under benchmarks/data/ (the real database and outputs are never
+touched). Results are appended to benchmarks/results/history.json and compared
+with the previous run of the same size.
+
+Usage:
+    python3 benchmarks/run_benchmarks.py --size small
+    python3 benchmarks/run_benchmarks.py --size medium --components ingest,daily,weekly
+    python3 benchmarks/run_benchmarks.py --events 50000 --days 400 --no-history
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'daily' / 'scripts'))
+sys.path.insert(0, str(PROJECT_ROOT / 'weekly' / 'scripts'))
+sys.path.insert(0, str(BENCH_DIR))
+
+import instrumentation  # noqa: E402
+from synthetic_data import SIZE_PRESETS, generate_exports  # noqa: E402
+
+HISTORY_PATH = BENCH_DIR / 'results' / 'history.json'
+ALL_COMPONENTS = ['ingest', 'classifier', 'daily', 'weekly']
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def prepare_workspace(label: str, events: int, days: int, seed: int) -> Path:
+    """Create (or reuse) a scratch project tree with synthetic exports for this size."""
+    workspace = BENCH_DIR / 'data' / label
+    exports_dir = workspace / 'exports'
+    meta_path = exports_dir / 'synthetic_meta.json'
+    wanted = {'events': events, 'days': days, 'seed': seed}
+    reuse = False
+    if meta_path.exists():
+        with open(meta_path) as f:
+            meta = json.load(f)
+        reuse = all(meta.get(k) == v for k, v in wanted.items())
+    if not reuse:
+        print(f"Generating {events} synthetic events over {days} days (seed {seed})...")
+        generate_exports(exports_dir, events, days, seed=seed)
+
+    for sub in ('data/ingest', 'data/backup', 'database', 'config', 'daily/dashboard/output'):
+        (workspace / sub).mkdir(parents=True, exist_ok=True)
+    shutil.copy2(PROJECT_ROOT / 'config' / 'sla_config.json', workspace / 'config' / 'sla_config.json')
+    return workspace
+
+
+def timed_component(name: str, func: Callable[[], Any], trace_memory: bool) -> Dict[str, Any]:
+    """Run func inside an instrumentation run and return its report dict."""
+    report = instrumentation.start_run(f"bench_{name}", trace_memory=trace_memory)
+    started = time.perf_counter()
+    try:
+        # The pipeline prints one line per saved dashboard; keep benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    finally:
+        data = report.to_dict()
+        instrumentation.finish_run(write=False)
+    data['total_wall_s'] = round(time.perf_counter() - started, 4)
+    return data
+
+
+def bench_ingest(workspace: Path) -> Callable[[], Any]:
+    from ingest_and_update import IntelligentIngester
+
+    def run():
+        db_path = workspace / 'database' / 'email_database.json'
+        if db_path.exists():
+            db_path.unlink()
+        for name in ('Complete_List_Raw.csv', 'UnreadCount.csv'):
+            shutil.copy2(workspace / 'exports' / name, workspace / 'data' / 'ingest' / name)
+        ingester = IntelligentIngester(project_root=workspace)
+        if not ingester.run():
+            raise RuntimeError("Ingestion failed")
+        # Keep backups from piling up between runs
+        shutil.rmtree(workspace / 'data' / 'backup', ignore_errors=True)
+        (workspace / 'data' / 'backup').mkdir(parents=True, exist_ok=True)
+    return run
+
+
+def bench_classifier(workspace: Path) -> Callable[[], Any]:
+    from email_classifier import EmailClassifier
+
+    def run():
+        classifier = EmailClassifier(
+            csv_file_path=str(workspace / 'exports' / 'Complete_List_Raw.csv'),
+            sla_file_path=str(workspace / 'exports' / 'UnreadCount.csv'),
+            sla_config_path=str(workspace / 'config' / 'sla_config.json'),
+        )
+        classifier.run(json_file=str(workspace / 'database' / 'classifier_database.json'))
+    return run
+
+
+def _database(workspace: Path) -> Dict[str, Any]:
+    db_path = workspace / 'database' / 'email_database.json'
+    if not db_path.exists():
+        raise RuntimeError("Run the ingest component first (database missing)")
+    with open(db_path) as f:
+        return json.load(f)
+
+
+def bench_daily(workspace: Path, max_days: Optional[int]) -> Callable[[], Any]:
+    from generate_dashboard import DashboardGenerator
+    import rendering
+
+    def run():
+        generator = DashboardGenerator(
+            json_path=str(workspace / 'database' / 'email_database.json'),
+            template_path=rendering.DAILY_TEMPLATE,
+            output_path=str(workspace / 'daily' / 'dashboard' / 'output'),
+            sla_config_path=str(workspace / 'config' / 'sla_config.json'),
+        )
+        data = generator.load_data()
+        dates = [d for d, day in sorted(data['days'].items())
+                 if (day.get('daily_summary') or {}).get('sla_compliance_rate') is not None]
+        if max_days:
+            dates = dates[-max_days:]
+        for date_str in dates:
+            context = generator.generate_dashboard(target_date=date_str, data=data)
+            html = generator.render_template(context)
+            generator.save_dashboard(html, date_str, write_latest=False)
+        instrumentation.count('daily_dashboards', len(dates))
+    return run
+
+
+def bench_weekly(workspace: Path, max_weeks: Optional[int]) -> Callable[[], Any]:
+    import generate_weekly_dashboard as weekly
+    from fact_table import fact_store_for
+
+    def run():
+        db = _database(workspace)
+        facts = fact_store_for(workspace / 'database' / 'email_database.json')
+        with open(workspace / 'config' / 'sla_config.json') as f:
+            config = json.load(f)
+        weeks = sorted({date.fromisoformat(d).isocalendar()[:2] for d in db['days']})
+        if max_weeks:
+            weeks = weeks[-max_weeks:]
+        for year, week in weeks:
+            start = date.fromisocalendar(year, week, 1)
+            context = weekly.build_weekly_context(db, config, start, start + timedelta(days=6), facts=facts)
+            weekly.render_dashboard_html(context)
+        instrumentation.count('weekly_dashboards', len(weeks))
+    return run
+
+
+def load_history() -> List[Dict[str, Any]]:
+    if HISTORY_PATH.exists():
+        with open(HISTORY_PATH) as f:
+            return json.load(f)
+    return []
+
+
+def save_history(history: List[Dict[str, Any]]) -> None:
+    HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_PATH, 'w') as f:
+        json.dump(history, f, indent=2)
+
+
+def print_comparison(entry: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> None:
+    print(f"\nBenchmark '{entry['label']}' ({entry['events']} events, {entry['days']} days) @ {entry['git_rev'] or 'unknown'}")
+    for component, result in entry['results'].items():
+        prev = (previous or {}).get('results', {}).get(component)
+        delta = ''
+        if prev and prev.get('total_wall_s'):
+            change = (result['total_wall_s'] - prev['total_wall_s']) / prev['total_wall_s'] * 100
+            delta = f"  ({change:+.1f}% vs {previous['git_rev'] or previous['timestamp']})"
+        print(f"  {component:<12} {result['total_wall_s']:>9.3f}s{delta}")
+        prev_stages = {s['stage']: s for s in (prev or {}).get('stages', [])}
+        for s in result['stages']:
+            p = prev_stages.get(s['stage'])
+            stage_delta = ''
+            if p and p['wall_s'] > 0:
+                stage_delta = f"  {((s['wall_s'] - p['wall_s']) / p['wall_s'] * 100):+.1f}%"
+            print(f"      {s['stage']:<44} {s['wall_s']:>9.3f}s x{s['calls']}{stage_delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the email pipeline on synthetic data.")
+    parser.add_argument('--size', choices=sorted(SIZE_PRESETS), default='small',
+                        help='Preset: small=10k events/1y, medium=100k/2y, large=1M/3y.')
+    parser.add_argument('--events', type=int, help='Custom event count (overrides --size).')
+    parser.add_argument('--days', type=int, help='Custom day count (with --events).')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--components', default=','.join(ALL_COMPONENTS),
+                        help=f"Comma-separated subset of: {', '.join(ALL_COMPONENTS)}")
+    parser.add_argument('--max-days', type=int, help='Render only the last N daily dashboards.')
+    parser.add_argument('--max-weeks', type=int, help='Render only the last N weekly dashboards.')
+    parser.add_argument('--trace-memory', action='store_true', help='Record tracemalloc peaks (slower).')
+    parser.add_argument('--no-history', action='store_true', help='Do not append results to history.json.')
+    parser.add_argument('--verbose', action='store_true', help='Keep pipeline INFO logging.')
+    args = parser.parse_args()
+
+    if args.events:
+        events, days = args.events, args.days or 365
+        label = f"custom_{events}_{days}"
+    else:
+        events, days = SIZE_PRESETS[args.size]
+        label = args.size
+
+    components = [c.strip() for c in args.components.split(',') if c.strip()]
+    unknown = set(components) - set(ALL_COMPONENTS)
+    if unknown:
+        parser.error(f"Unknown component(s): {', '.join(sorted(unknown))}")
+
+    workspace = prepare_workspace(label, events, days, args.seed)
+    if not args.verbose:
+        # Import the pipeline modules first: they call logging.basicConfig on import
+        import ingest_and_update, email_classifier  # noqa: F401,E401
+        logging.getLogger().setLevel(logging.WARNING)
+    runners = {
+        'ingest': lambda: bench_ingest(workspace),
+        'classifier': lambda: bench_classifier(workspace),
+        'daily': lambda: bench_daily(workspace, args.max_days),
+        'weekly': lambda: bench_weekly(workspace, args.max_weeks),
+    }
+
+    results: Dict[str, Any] = {}
+    for component in ALL_COMPONENTS:
+        if component not in components:
+            continue
+        print(f"Running {component}...")
+        report = timed_component(component, runners[component](), args.trace_memory)
+        results[component] = {
+            'total_wall_s': report['total_wall_s'],
+            'total_cpu_s': report['total_cpu_s'],
+            'peak_mem_mb': report['peak_mem_mb'],
+            'stages': report['stages'],
+            'counters': report['counters'],
+        }
+
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'label': label,
+        'events': events,
+        'days': days,
+        'seed': args.seed,
+        'git_rev': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    history = load_history()
+    previous = next((h for h in reversed(history)
+                     if h['label'] == label and h['events'] == events and h['days'] == days), None)
+    print_comparison(entry, previous)
+
+    if not args.no_history:
+        history.append(entry)
+        save_history(history)
+        print(f"\nAppended results to {HISTORY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
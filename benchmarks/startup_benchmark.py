@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Benchmark
+
+Measures how long the pipeline's command-line entry points take to start by
+running each one under `python -X importtime` and summing the per-module
+import self-times. Commands that only list, validate or wait (listing dates,
+--validate-only, the idle watch daemon) must not pull in pandas/numpy/Jinja2;
+the budget file fails the run if they do or if import time grows too much.
+
+Key Features:
+- Import time per command from `-X importtime` (median of --repeat runs)
+- Heaviest top-level imports printed per command
+- Forbidden-module check (modules that must stay lazy for that command)
+- Budgets in benchmarks/startup_budget.json; non-zero exit on breach
+- History appended to benchmarks/results/startup_history.json
+
+Usage:
+    python3 benchmarks/startup_benchmark.py
+    python3 benchmarks/startup_benchmark.py --repeat 7 --no-history
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+BUDGET_PATH = BENCH_DIR / 'startup_budget.json'
+HISTORY_PATH = BENCH_DIR / 'results' / 'startup_history.json'
+
+DAILY = PROJECT_ROOT / 'daily' / 'scripts'
+WEEKLY = PROJECT_ROOT / 'weekly' / 'scripts'
+
+# name -> (argv after the interpreter, working directory)
+COMMANDS: Dict[str, Tuple[List[str], Path]] = {
+    'daily_list_dates': ([str(DAILY / 'generate_dashboard.py'), '--list-dates'], DAILY),
+    'daily_validate': ([str(DAILY / 'generate_dashboard.py'), '--validate-only'], DAILY),
+    'weekly_validate': ([str(WEEKLY / 'generate_weekly_dashboard.py'), '--last-7-days', '--fill-missing-days',
+                         '--validate-only'], WEEKLY),
+    'import_ingester': (['-c', 'import ingest_and_update'], DAILY),
+    'import_classifier': (['-c', 'import email_classifier'], DAILY),
+    'import_watch_daemon': (['-c', 'import watch_ingest'], DAILY),
+}
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float], List[Tuple[str, float]]]:
+    """Return (total self ms, {module: self ms}, [(top-level module, cumulative ms)])."""
+    total_us = 0
+    modules: Dict[str, float] = {}
+    top_level: List[Tuple[str, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us = int(parts[0]), int(parts[1])
+        raw_name = parts[2].rstrip()
+        name = raw_name.strip()
+        total_us += self_us
+        modules[name] = self_us / 1000
+        # Top-level imports are indented by exactly one space
+        if raw_name.startswith(' ') and not raw_name.startswith('  '):
+            top_level.append((name, cumulative_us / 1000))
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, modules, top_level
+
+
+def measure(name: str, repeat: int) -> Dict[str, Any]:
+    argv, cwd = COMMANDS[name]
+    import_ms: List[float] = []
+    wall_ms: List[float] = []
+    modules: Dict[str, float] = {}
+    top_level: List[Tuple[str, float]] = []
+    returncode = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', *argv], cwd=cwd,
+                              capture_output=True, text=True)
+        wall_ms.append((time.perf_counter() - started) * 1000)
+        total, modules, top_level = parse_importtime(proc.stderr)
+        import_ms.append(total)
+        returncode = proc.returncode
+    return {
+        'import_ms': round(median(import_ms), 1),
+        'wall_ms': round(median(wall_ms), 1),
+        'modules': len(modules),
+        'returncode': returncode,
+        'loaded': sorted(modules),
+        'top_imports': [(n, round(ms, 1)) for n, ms in top_level[:5]],
+    }
+
+
+def check_budget(name: str, result: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+    problems = []
+    limit = budget.get('import_ms')
+    if limit is not None and result['import_ms'] > limit:
+        problems.append(f"{name}: import time {result['import_ms']:.1f}ms exceeds budget {limit}ms")
+    loaded = set(result['loaded'])
+    for module in budget.get('forbidden_modules', []):
+        if module in loaded:
+            problems.append(f"{name}: imports '{module}' at startup")
+    return problems
+
+
+def load_json(path: Path, default: Any) -> Any:
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return default
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI import/startup time against the startup budget.")
+    parser.add_argument('--commands', default=','.join(COMMANDS),
+                        help=f"Comma-separated subset of: {', '.join(COMMANDS)}")
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command (median is reported).')
+    parser.add_argument('--no-history', action='store_true', help='Do not append results to startup_history.json.')
+    args = parser.parse_args()
+
+    names = [c.strip() for c in args.commands.split(',') if c.strip()]
+    unknown = set(names) - set(COMMANDS)
+    if unknown:
+        parser.error(f"Unknown command(s): {', '.join(sorted(unknown))}")
+
+    budgets = load_json(BUDGET_PATH, {})
+    history = load_json(HISTORY_PATH, [])
+    previous = history[-1]['results'] if history else {}
+
+    results: Dict[str, Any] = {}
+    problems: List[str] = []
+    print(f"{'command':<22} {'imports':>9} {'wall':>9} {'modules':>8}  budget")
+    for name in names:
+        result = measure(name, max(1, args.repeat))
+        budget = budgets.get(name, {})
+        problems.extend(check_budget(name, result, budget))
+        if result['returncode'] != 0:
+            problems.append(f"{name}: exited with status {result['returncode']}")
+
+        delta = ''
+        prev = previous.get(name)
+        if prev and prev.get('import_ms'):
+            delta = f" ({(result['import_ms'] - prev['import_ms']) / prev['import_ms'] * 100:+.0f}%)"
+        limit = budget.get('import_ms')
+        print(f"{name:<22} {result['import_ms']:>7.1f}ms {result['wall_ms']:>7.1f}ms {result['modules']:>8}  "
+              f"{f'{limit}ms' if limit is not None else '-'}{delta}")
+        print("    heaviest: " + ", ".join(f"{n} {ms:.1f}ms" for n, ms in result['top_imports']))
+        results[name] = {k: v for k, v in result.items() if k != 'loaded'}
+
+    if not args.no_history:
+        history.append({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_rev': git_revision(),
+            'python': platform.python_version(),
+            'results': results,
+        })
+        HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(HISTORY_PATH, 'w') as f:
+            json.dump(history, f, indent=2)
+
+    if problems:
+        print("\nStartup budget exceeded:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\nAll commands within startup budget")
+
+
+if __name__ == "__main__":
+    main()
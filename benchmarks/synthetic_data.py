@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Synthetic Export Generator
+
+Writes realistic Complete_List_Raw.csv and UnreadCount.csv files for benchmarking
+the pipeline at larger-than-production scale. Output mirrors the Outlook-style
+exports: quoted CSV with a UTF-8 BOM, timestamps like "7/22/2025 1:54 AM", and
+Inbox → Replied/Completed event chains per Conversation-Id.
+
+Key Features:
+- Deterministic for a given seed, event count, day count and start date
+- Weekday and hour-of-day volume profiles peaking inside business hours
+- 1–3 inbox messages per conversation with log-normal response delays
+- UnreadCount rows derived from the generated backlog, hours 7–21
+"""
+
+import argparse
+import base64
+import csv
+import json
+import math
+import random
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+EVENT_HEADER = ["Conversation-Id", "Subject", "Emails", "EventType", "TimeStamp", "MessageId"]
+UNREAD_HEADER = ["Title", "Date", "TotalUnread", "Messages Received", "Hour of the Day"]
+
+# Relative inbound volume by hour of day (0–23) and weekday (Mon=0)
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 14, 13, 11, 12, 13, 12, 10, 8, 6, 4, 3, 2, 1, 1]
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 0.95, 0.35, 0.25]
+
+LANGUAGES = ["01-Spanish", "13-Arabic", "05-Vietnamese", "07-Korean", "02-Mandarin", "09-Russian"]
+SENDER_DOMAINS = ["lacare.org", "gilsondaub.com", "soundviewclaims.com", "example-clinic.org"]
+
+SIZE_PRESETS: Dict[str, Tuple[int, int]] = {
+    # name: (events, days)
+    'small': (10_000, 365),
+    'medium': (100_000, 730),
+    'large': (1_000_000, 1095),
+}
+
+
+def format_timestamp(ts: datetime) -> str:
+    """Format like the Outlook export: 7/22/2025 1:54 AM (no zero padding)."""
+    hour12 = ts.hour % 12 or 12
+    suffix = 'AM' if ts.hour < 12 else 'PM'
+    return f"{ts.month}/{ts.day}/{ts.year} {hour12}:{ts.minute:02d} {suffix}"
+
+
+def format_date(d: date) -> str:
+    return f"{d.month}/{d.day}/{d.year}"
+
+
+def _lognormal_minutes(rng: random.Random, median: float, sigma: float) -> float:
+    return max(1.0, rng.lognormvariate(math.log(median), sigma))
+
+
+def generate_exports(
+    out_dir: Path,
+    events: int,
+    days: int,
+    start: date = date(2021, 1, 4),
+    seed: int = 42,
+    unread_threshold: int = 30,
+) -> Dict[str, Any]:
+    """Generate both CSV exports into out_dir; returns a metadata dict."""
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    day_list = [start + timedelta(days=i) for i in range(days)]
+    day_weights = [WEEKDAY_WEIGHTS[d.weekday()] for d in day_list]
+    hours = list(range(24))
+
+    rows = []
+    conversations = 0
+    while len(rows) < events:
+        day = rng.choices(day_list, weights=day_weights)[0]
+        hour = rng.choices(hours, weights=HOUR_WEIGHTS)[0]
+        t = datetime(day.year, day.month, day.day, hour, rng.randrange(60))
+
+        conv_id = 'AAQkAD' + base64.b64encode(rng.randbytes(63)).decode('ascii')
+        job = rng.randrange(10000, 99999)
+        subject = f"Job Assignment: O-{day.year % 100:02d}-{job} |  | 00-English/{rng.choice(LANGUAGES)}"
+        emails = f"agent{rng.randrange(400)}@{rng.choice(SENDER_DOMAINS)},requests@languageline.example,"
+        conversations += 1
+
+        inbox_messages = 1 + (rng.random() < 0.3) + (rng.random() < 0.1)
+        for _ in range(inbox_messages):
+            rows.append((t, conv_id, subject, emails, 'Inbox'))
+            outcome = rng.random()
+            if outcome < 0.72:
+                t = t + timedelta(minutes=_lognormal_minutes(rng, 45, 1.0))
+                rows.append((t, conv_id, f"RE: {subject}", emails, 'Replied'))
+            elif outcome < 0.88:
+                t = t + timedelta(minutes=_lognormal_minutes(rng, 90, 1.1))
+                rows.append((t, conv_id, subject, emails, 'Completed'))
+                break
+            else:
+                break  # left pending
+            # Customer follow-up on the same conversation
+            t = t + timedelta(minutes=_lognormal_minutes(rng, 240, 1.2))
+
+    rows.sort(key=lambda r: r[0])
+    rows = rows[:events]
+
+    arrivals: Dict[Tuple[date, int], int] = defaultdict(int)
+    responses: Dict[Tuple[date, int], int] = defaultdict(int)
+    events_path = out_dir / 'Complete_List_Raw.csv'
+    with open(events_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(EVENT_HEADER)
+        for i, (ts, conv_id, subject, emails, event_type) in enumerate(rows):
+            ts = ts.replace(second=0, microsecond=0)
+            epoch_ms = int(ts.timestamp() * 1000) + i % 1000
+            message_id = f"<{rng.randrange(10**8)}.{rng.randrange(10**4)}.{epoch_ms}@PORTOLA.example.org>"
+            writer.writerow([conv_id, subject, emails, event_type, format_timestamp(ts), message_id])
+            key = (ts.date(), ts.hour)
+            if event_type == 'Inbox':
+                arrivals[key] += 1
+            else:
+                responses[key] += 1
+
+    # Backlog walk in chronological hour order, sampled for hours 7..21 like the real export
+    unread_path = out_dir / 'UnreadCount.csv'
+    backlog = 0
+    last_day = rows[-1][0].date() if rows else start
+    with open(unread_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(UNREAD_HEADER)
+        d = start
+        while d <= last_day:
+            for h in range(24):
+                backlog = max(0, backlog + arrivals.get((d, h), 0) - responses.get((d, h), 0))
+                if 7 <= h <= 21:
+                    title = 'SLA MET' if backlog <= unread_threshold else 'SLA NOT MET'
+                    writer.writerow([title, format_date(d), str(backlog), '', str(h)])
+            d += timedelta(days=1)
+
+    meta = {
+        'events': len(rows),
+        'days': days,
+        'start': start.isoformat(),
+        'seed': seed,
+        'conversations': conversations,
+        'events_file': str(events_path),
+        'unread_file': str(unread_path),
+    }
+    with open(out_dir / 'synthetic_meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Complete_List_Raw.csv / UnreadCount.csv exports.")
+    parser.add_argument('--size', choices=sorted(SIZE_PRESETS), help='Preset size (overrides --events/--days).')
+    parser.add_argument('--events', type=int, default=10_000, help='Number of event rows to write.')
+    parser.add_argument('--days', type=int, default=365, help='Number of days to spread events over.')
+    parser.add_argument('--start', default='2021-01-04', help='First day (YYYY-MM-DD).')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=str(Path(__file__).resolve().parent / 'data' / 'synthetic'),
+                        help='Output directory.')
+    args = parser.parse_args()
+
+    events, days = SIZE_PRESETS[args.size] if args.size else (args.events, args.days)
+    meta = generate_exports(Path(args.out), events, days, date.fromisoformat(args.start), args.seed)
+    print(f"Wrote {meta['events']} events ({meta['conversations']} conversations) over {days} days to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Dashboard Archive Index
+
+Static, paginated HTML/CSS index of every generated dashboard, written next to
+the daily dashboards in <daily output>/archive/:
+
+    index.html      every month, grouped by year
+    2025-08.html    calendar grid for one month: per day a completeness badge,
+                    email volume and SLA compliance, linking the day's
+                    dashboard; per ISO week a link to the weekly dashboard and
+                    a sparkline of emails per day; previous/next month links
+
+The archive is maintained incrementally. The inputs of every page are hashed
+into archive/manifest.json. update() only looks at the months a set of
+touched dates can appear in (the date's month, plus the neighbouring month
+when its ISO week crosses a month boundary) and rewrites those whose inputs
+changed, so an ingest rewrites a single month page however many years of
+dashboards exist. The index and the previous month's "next" link change only
+when a new month starts.
+
+Completeness badges follow generate_dashboard.py --list-dates:
+- complete       email and measured UnreadCount data
+- reconstructed  email data, backlog reconstructed from events
+- partial        only one of the two sources
+- missing        no database entry, between the first and latest date
+
+Key Features:
+- Output written through output_optimizer (minified/precompressed per the SLA config)
+- Links are relative, so the archive works from a static host or file://
+- Called by DashboardRefresher (watch daemon, multi-mailbox runner) and the daily/weekly CLIs
+- Without arguments the CLI checks every month and rewrites only stale pages
+
+Usage:
+    python3 daily/scripts/archive_index.py
+    python3 daily/scripts/archive_index.py --rebuild          # e.g. after editing the archive templates
+    python3 daily/scripts/archive_index.py --mailbox support
+"""
+
+import argparse
+import calendar
+import hashlib
+import json
+import logging
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from backlog import has_sla
+from mailboxes import Mailbox, MailboxError, get_mailbox
+from output_optimizer import output_options, write_output
+import rendering
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+ARCHIVE_DIR = 'archive'
+MONTH_TEMPLATE = 'archive/month.html'
+INDEX_TEMPLATE = 'archive/index.html'
+
+BADGES = [
+    ('complete', 'Complete'),
+    ('reconstructed', 'Reconstructed'),
+    ('partial', 'Partial'),
+    ('missing', 'Missing'),
+]
+SPARKLINE_WIDTH = 112
+SPARKLINE_HEIGHT = 28
+
+
+def day_status(day: Optional[Dict[str, Any]]) -> str:
+    """Completeness of a database day entry (None: no entry)."""
+    if day is None:
+        return 'missing'
+    if day.get('has_email_data') and day.get('has_sla_data'):
+        return 'complete'
+    if day.get('has_email_data') and has_sla(day):
+        return 'reconstructed'
+    return 'partial'
+
+
+def month_label(month: str) -> str:
+    year, number = month.split('-')
+    return f"{calendar.month_name[int(number)]} {year}"
+
+
+def months_of_weeks(dates: Iterable[str]) -> Set[str]:
+    """Months whose calendar grid shows any of `dates` (a date's whole ISO week is shown)."""
+    months = set()
+    for date_str in dates:
+        monday = date.fromisoformat(date_str)
+        monday -= timedelta(days=monday.weekday())
+        months.add(monday.strftime('%Y-%m'))
+        months.add((monday + timedelta(days=6)).strftime('%Y-%m'))
+    return months
+
+
+def sparkline(values: List[Optional[float]], sla_met: List[Optional[bool]]) -> Optional[Dict[str, Any]]:
+    """SVG path and points for one week of values; days without data break the line."""
+    present = [v for v in values if v is not None]
+    if not present:
+        return None
+    peak = max(present) or 1
+    step = SPARKLINE_WIDTH / (len(values) - 1)
+    commands, points = [], []
+    pen_down = False
+    for i, value in enumerate(values):
+        if value is None:
+            pen_down = False
+            continue
+        x = round(i * step, 1)
+        y = round(SPARKLINE_HEIGHT - 2 - (SPARKLINE_HEIGHT - 4) * value / peak, 1)
+        commands.append(f"{'L' if pen_down else 'M'} {x} {y}")
+        points.append({'x': x, 'y': y, 'sla_met': sla_met[i]})
+        pen_down = True
+    return {'path': ' '.join(commands), 'points': points}
+
+
+class ArchiveIndex:
+    """The archive pages of one mailbox's daily output folder."""
+
+    def __init__(self, mailbox: Optional[Mailbox] = None, sla_config: Optional[Dict[str, Any]] = None,
+                 options: Optional[Dict[str, Any]] = None):
+        self.mailbox = mailbox or Mailbox()
+        self.sla_config = sla_config if sla_config is not None else self.mailbox.load_config()
+        self.options = options
+        self.root = self.mailbox.daily_output_dir / ARCHIVE_DIR
+        self.manifest_path = self.root / 'manifest.json'
+        self.sla_target = (self.sla_config.get('kpi_targets') or {}).get('sla_compliance_target_percent', 85)
+        self._manifest: Optional[Dict[str, Any]] = None
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    self._manifest = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._manifest = {}
+            if self._manifest.get('version') != ARCHIVE_VERSION:
+                self._manifest = {'version': ARCHIVE_VERSION, 'index': None, 'months': {}}
+        return self._manifest
+
+    def month_path(self, month: str) -> Path:
+        return self.root / f"{month}.html"
+
+    def update(self, database: Dict[str, Any], dates: Optional[Iterable[str]] = None,
+               rebuild: bool = False) -> List[Path]:
+        """Rewrite the stale pages among those `dates` can affect (every page if dates is None).
+
+        Returns the paths written.
+        """
+        days = database.get('days', {})
+        months = sorted({date_str[:7] for date_str in days})
+        if not months:
+            return []
+        known = self.manifest['months']
+        if dates is None:
+            candidates = set(months)
+            for month in set(known) - set(months):
+                self.month_path(month).unlink(missing_ok=True)
+                del known[month]
+        else:
+            candidates = months_of_weeks(dates) & set(months)
+        # A new month changes its neighbours' previous/next links
+        for month in [m for m in months if m not in known]:
+            position = months.index(month)
+            candidates.update(months[max(position - 1, 0):position + 2])
+
+        written = []
+        positions = {month: i for i, month in enumerate(months)}
+        for month in sorted(candidates):
+            i = positions[month]
+            context = self.month_context(days, month, months[i - 1] if i else None,
+                                         months[i + 1] if i + 1 < len(months) else None)
+            if self._write_if_changed(self.month_path(month), MONTH_TEMPLATE, context, known, month, rebuild):
+                written.append(self.month_path(month))
+
+        index_path = self.root / 'index.html'
+        if self._write_if_changed(index_path, INDEX_TEMPLATE, self.index_context(months),
+                                  self.manifest, 'index', rebuild):
+            written.append(index_path)
+        if written:
+            self._save_manifest()
+        return written
+
+    def month_context(self, days: Dict[str, Any], month: str, prev_month: Optional[str],
+                      next_month: Optional[str]) -> Dict[str, Any]:
+        first_day = date.fromisoformat(f"{month}-01")
+        earliest, latest = min(days), max(days)
+        summary = {status: 0 for status, _ in BADGES}
+        summary['dashboards'] = 0
+        weeks = []
+        for week in calendar.Calendar().monthdatescalendar(first_day.year, first_day.month):
+            cells, volumes, sla_flags = [], [], []
+            sla_values = []
+            for day_date in week:
+                date_str = day_date.isoformat()
+                in_month = day_date.month == first_day.month
+                cell = self._day_cell(date_str, days.get(date_str), earliest <= date_str <= latest)
+                cell['in_month'] = in_month
+                if in_month:
+                    if cell['status']:
+                        summary[cell['status']] += 1
+                    summary['dashboards'] += bool(cell['href'])
+                volumes.append(cell['total_emails'])
+                sla_flags.append(cell['sla_met'])
+                if cell['sla_compliance'] is not None:
+                    sla_values.append(cell['sla_compliance'])
+                cells.append(cell)
+            year, number, _ = week[0].isocalendar()
+            label = f"{year}-W{number:02d}"
+            weekly_path = self.mailbox.weekly_output_dir / f"weekly_dashboard_{label}.html"
+            weeks.append({
+                'label': label,
+                'href': self._relative(weekly_path) if weekly_path.exists() else None,
+                'days': cells,
+                'sparkline': sparkline(volumes, sla_flags),
+                'total_emails': sum(v for v in volumes if v is not None),
+                'sla_compliance': round(sum(sla_values) / len(sla_values), 1) if sla_values else None,
+            })
+        return {
+            'month': month,
+            'month_label': month_label(month),
+            'mailbox_label': None if self.mailbox.is_default else self.mailbox.name,
+            'prev_month': {'href': f"{prev_month}.html", 'label': month_label(prev_month)} if prev_month else None,
+            'next_month': {'href': f"{next_month}.html", 'label': month_label(next_month)} if next_month else None,
+            'weekdays': [calendar.day_abbr[i] for i in range(7)],
+            'weeks': weeks,
+            'summary': summary,
+            'badges': BADGES,
+            'sparkline_width': SPARKLINE_WIDTH,
+            'sparkline_height': SPARKLINE_HEIGHT,
+        }
+
+    def _day_cell(self, date_str: str, day: Optional[Dict[str, Any]], in_range: bool) -> Dict[str, Any]:
+        summary = (day or {}).get('daily_summary') or {}
+        status = day_status(day) if in_range else None
+        compliance = summary.get('sla_compliance_rate')
+        dashboard = self.mailbox.daily_output_dir / f"email_dashboard_{date_str}.html"
+        return {
+            'date': date_str,
+            'day': int(date_str[8:]),
+            'status': status,
+            'badge': dict(BADGES)[status] if status else None,
+            'href': f"../{dashboard.name}" if day is not None and dashboard.exists() else None,
+            'total_emails': summary.get('total_emails') if day is not None else None,
+            'sla_compliance': compliance,
+            'sla_met': None if compliance is None else compliance >= self.sla_target,
+        }
+
+    def index_context(self, months: List[str]) -> Dict[str, Any]:
+        present = set(months)
+        years = []
+        for year in range(int(months[-1][:4]), int(months[0][:4]) - 1, -1):
+            years.append({'year': year, 'months': [
+                {'label': calendar.month_abbr[number],
+                 'href': f"{year}-{number:02d}.html" if f"{year}-{number:02d}" in present else None}
+                for number in range(1, 13)
+            ]})
+        weekly_latest = self.mailbox.weekly_output_dir / 'latest.html'
+        return {
+            'mailbox_label': None if self.mailbox.is_default else self.mailbox.name,
+            'month_count': len(months),
+            'first_label': month_label(months[0]),
+            'last_label': month_label(months[-1]),
+            'latest_month': {'href': f"{months[-1]}.html"},
+            'weekly_latest_href': self._relative(weekly_latest) if weekly_latest.exists() else None,
+            'years': years,
+        }
+
+    def _relative(self, path: Path) -> str:
+        return Path(os.path.relpath(path, self.root)).as_posix()
+
+    def _write_if_changed(self, path: Path, template: str, context: Dict[str, Any], keys: Dict[str, Any],
+                          name: str, rebuild: bool) -> bool:
+        """Render and write a page unless its inputs are unchanged since the last write."""
+        key = hashlib.sha1(json.dumps([template, context, self.options], sort_keys=True, default=str)
+                           .encode('utf-8')).hexdigest()
+        if not rebuild and keys.get(name) == key and path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_output(path, rendering.render(template, context), self.options)
+        keys[name] = key
+        return True
+
+    def _save_manifest(self) -> None:
+        tmp_path = self.manifest_path.with_name(f".manifest.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Update the static archive index of daily/weekly dashboards.")
+    parser.add_argument("--mailbox", help="Mailbox to index (a configured name or 'combined'). Default: the original layout.")
+    parser.add_argument("--month", action="append", metavar="YYYY-MM",
+                        help="Only consider this month (repeatable). Default: every month.")
+    parser.add_argument("--rebuild", action="store_true", help="Rewrite pages even if their inputs are unchanged.")
+    args = parser.parse_args(argv)
+
+    try:
+        mailbox = get_mailbox(args.mailbox)
+    except MailboxError as e:
+        parser.error(str(e))
+    config = mailbox.load_config()
+    try:
+        options = output_options(config)
+    except ValueError as e:
+        print(f"Warning: {e}; writing pages as rendered")
+        options = None
+    try:
+        with open(mailbox.database_path, 'r') as f:
+            database = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: database not found: {mailbox.database_path}", file=sys.stderr)
+        return 2
+
+    dates = None
+    if args.month:
+        dates = [d for d in database.get('days', {}) if d[:7] in set(args.month)]
+    archive = ArchiveIndex(mailbox, config, options)
+    written = archive.update(database, dates, rebuild=args.rebuild)
+    for path in written:
+        print(f"  wrote {path}")
+    print(f"Archive: {len(written)} page(s) written in {archive.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Weekday x Hour Baselines
+
+Running statistics of hourly email volume and unread count per (weekday, hour),
+kept next to the JSON database (database/email_database_baselines.npz for
+email_database.json) and folded forward by the ingester with only the days a
+merge touched, so a dashboard can ask "is 10 AM on this Tuesday unusual?"
+without scanning the history.
+
+Three aggregates per weekday x hour x metric:
+- all-time mean/variance (Welford, merged batch-wise with Chan's formulas;
+  a re-ingested day is removed with the inverse update before it is re-added)
+- EWMA over that weekday's days in date order (alpha = ewma_alpha)
+- sums, sums of squares and counts over the last `window_weeks` weeks; days
+  expire out of the window as newer days arrive
+
+The store also keeps each folded day's 2 x 24 values. That log is what makes a
+day removable and lets the EWMA and window be rebuilt (after a late day or a
+config change) without reading the database.
+
+A dashboard baseline for a date is leave-one-out: that day is taken back out
+of the window and all-time figures before the band is computed. The band is
+EWMA +/- band_sigma standard deviations (window spread, or all-time once the
+window has fewer than min_samples days); hours with fewer samples have none.
+
+Configured in sla_config.json (all optional):
+
+    "baselines": {"ewma_alpha": 0.3, "window_weeks": 8, "band_sigma": 2, "min_samples": 3}
+
+Key Features:
+- Vectorized batch updates: one np.add.at per aggregate for a whole merge
+- Missing values (no email data, no unread reading) are skipped, not zeros
+- The first ingest (no store yet) folds in every day; an alpha/window change replays the log
+- CLI: rebuild the store from the database, or print a day's bands
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+from lazy_imports import lazy_import
+from mailboxes import MailboxError, get_mailbox
+
+np = lazy_import('numpy')
+
+METRICS = ('emails', 'unread')
+HOURS = 24
+DEFAULT_OPTIONS = {'ewma_alpha': 0.3, 'window_weeks': 8, 'band_sigma': 2.0, 'min_samples': 3}
+
+
+def baseline_options(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The "baselines" section of an SLA config with defaults filled in."""
+    section = (config or {}).get('baselines') or {}
+    options = {
+        'ewma_alpha': float(section.get('ewma_alpha', DEFAULT_OPTIONS['ewma_alpha'])),
+        'window_weeks': int(section.get('window_weeks', DEFAULT_OPTIONS['window_weeks'])),
+        'band_sigma': float(section.get('band_sigma', DEFAULT_OPTIONS['band_sigma'])),
+        'min_samples': int(section.get('min_samples', DEFAULT_OPTIONS['min_samples'])),
+    }
+    if not 0 < options['ewma_alpha'] <= 1:
+        raise ValueError(f"baselines.ewma_alpha must be in (0, 1], got {options['ewma_alpha']}")
+    if options['window_weeks'] < 1 or options['min_samples'] < 2:
+        raise ValueError("baselines.window_weeks must be >= 1 and baselines.min_samples >= 2")
+    return options
+
+
+def baseline_store_for(database_path: Union[str, Path], options: Optional[Dict[str, Any]] = None) -> 'BaselineStore':
+    """Return the baseline store that sits next to a JSON database file."""
+    path = Path(database_path).resolve()
+    return BaselineStore(path.with_name(f"{path.stem}_baselines.npz"), options)
+
+
+def day_values(day: Optional[Dict[str, Any]]) -> Any:
+    """(metric, hour) array of a database day: emails received and unread count, NaN where missing."""
+    values = np.full((len(METRICS), HOURS), np.nan)
+    if not day:
+        return values
+    has_emails = day.get('has_email_data', False)
+    for entry in day.get('hourly_data') or []:
+        hour = entry.get('hour')
+        if not isinstance(hour, int) or not 0 <= hour < HOURS:
+            continue
+        emails = entry.get('emails_received')
+        if has_emails and isinstance(emails, (int, float)):
+            values[0, hour] = emails
+        unread = entry.get('unread_count')
+        if isinstance(unread, (int, float)):
+            values[1, hour] = unread
+    return values
+
+
+def _weekdays(dates: Any) -> Any:
+    """Monday=0 weekday of datetime64[D] dates (1970-01-01 was a Thursday)."""
+    return (dates.astype('int64') + 3) % 7
+
+
+def _moments(values: Any, weekdays: Any) -> Any:
+    """Per-weekday count, mean and sum of squared deviations of a batch of days, shape (3, 7, metric, hour)."""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    n = np.zeros((7,) + values.shape[1:])
+    total = np.zeros_like(n)
+    np.add.at(n, weekdays, present)
+    np.add.at(total, weekdays, filled)
+    mean = np.divide(total, n, out=np.zeros_like(n), where=n > 0)
+    m2 = np.zeros_like(n)
+    np.add.at(m2, weekdays, np.where(present, (filled - mean[weekdays]) ** 2, 0.0))
+    return np.stack([n, mean, m2])
+
+
+def _merge(a: Any, b: Any, sign: int = 1) -> Any:
+    """Chan's parallel update of (count, mean, M2) moments: a plus b, or a minus b with sign=-1."""
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + sign * n_b
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if sign > 0:
+            delta = mean_b - mean_a
+            mean = mean_a + np.where(n > 0, delta * n_b / n, 0.0)
+            m2 = m2_a + m2_b + np.where(n > 0, delta ** 2 * n_a * n_b / n, 0.0)
+        else:
+            mean = np.where(n > 0, (n_a * mean_a - n_b * mean_b) / n, 0.0)
+            delta = mean_b - mean
+            m2 = m2_a - m2_b - np.where(n_a > 0, delta ** 2 * n * n_b / n_a, 0.0)
+    empty = n <= 0
+    return np.stack([np.where(empty, 0.0, n), np.where(empty, 0.0, mean), np.where(empty, 0.0, np.maximum(m2, 0.0))])
+
+
+def _window_sums(values: Any, weekdays: Any) -> Any:
+    """Per-weekday count, sum and sum of squares, shape (3, 7, metric, hour)."""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    sums = np.zeros((3, 7) + values.shape[1:])
+    np.add.at(sums[0], weekdays, present)
+    np.add.at(sums[1], weekdays, filled)
+    np.add.at(sums[2], weekdays, filled ** 2)
+    return sums
+
+
+def _std(n: Any, mean: Any, m2: Any) -> Any:
+    """Sample standard deviation from (count, mean, M2); NaN below two samples."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 1, np.sqrt(np.maximum(m2, 0.0) / (n - 1)), np.nan)
+
+
+class BaselineStore:
+    """Running weekday x hour aggregates plus the per-day value log they were built from."""
+
+    def __init__(self, path: Union[str, Path], options: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.options = {**DEFAULT_OPTIONS, **(options or {})}
+        self._state = None
+        self._loaded_mtime = None
+
+    @property
+    def window_days(self) -> int:
+        return self.options['window_weeks'] * 7
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _empty(self) -> Dict[str, Any]:
+        shape = (7, len(METRICS), HOURS)
+        return {
+            'dates': np.empty(0, dtype='datetime64[D]'),
+            'values': np.empty((0, len(METRICS), HOURS)),
+            'moments': np.zeros((3,) + shape),
+            'ewma': np.full(shape, np.nan),
+            'ewma_through': np.full(7, np.datetime64('NaT'), dtype='datetime64[D]'),
+            'window': np.zeros((3,) + shape),
+            'window_end': np.datetime64('NaT', 'D'),
+            'ewma_alpha': self.options['ewma_alpha'],
+            'window_weeks': self.options['window_weeks'],
+        }
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> Dict[str, Any]:
+        """The stored state (empty if there is no store yet); reloaded when another process rewrote it."""
+        mtime = self._mtime()
+        if self._state is None or mtime != self._loaded_mtime:
+            if mtime is not None:
+                with np.load(self.path) as stored:
+                    self._state = {name: stored[name] for name in stored.files}
+                self._state['window_end'] = self._state['window_end'][()]
+                for name in ('ewma_alpha', 'window_weeks'):
+                    self._state[name] = self._state[name].item()
+            else:
+                self._state = self._empty()
+            self._loaded_mtime = mtime
+        return self._state
+
+    def save(self) -> Path:
+        """Write the state (atomic rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.stem}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(tmp_path, **self.load())
+        os.replace(tmp_path, self.path)
+        self._loaded_mtime = self._mtime()
+        return self.path
+
+    def update(self, days: Mapping[str, Dict[str, Any]], dates: Optional[Iterable[str]] = None) -> int:
+        """Fold the database days `dates` (default: all) into the aggregates and save.
+
+        With no days stored yet every day in `days` is folded in; after an
+        ewma_alpha/window_weeks change the aggregates are first rebuilt from the
+        stored log. Returns the number of days folded.
+        """
+        state = self.load()
+        rebuild = bool(len(state['dates'])) and (state['ewma_alpha'] != self.options['ewma_alpha']
+                                                 or state['window_weeks'] != self.options['window_weeks'])
+        if rebuild:
+            log_dates, log_values = state['dates'], state['values']
+            state = self._state = self._empty()
+            self._fold(log_dates, log_values)
+        if dates is None or not len(state['dates']):
+            dates = days
+        keys = sorted(key for key in set(dates) if key in days)
+        if keys:
+            self._fold(np.array(keys, dtype='datetime64[D]'), np.stack([day_values(days[key]) for key in keys]))
+        if keys or rebuild:
+            self.save()
+        return len(keys)
+
+    def _fold(self, new_dates: Any, new_values: Any) -> None:
+        """Replace or add days (sorted datetime64[D]) and update every aggregate incrementally."""
+        state = self.load()
+        log_dates, log_values = state['dates'], state['values']
+        positions = np.searchsorted(log_dates, new_dates)
+        replaced = np.zeros(len(new_dates), dtype=bool)
+        inside = positions < len(log_dates)
+        replaced[inside] = log_dates[positions[inside]] == new_dates[inside]
+        old_rows = positions[replaced]
+
+        # All-time moments: take the replaced days' old values out, add the new values
+        moments = state['moments']
+        if replaced.any():
+            moments = _merge(moments, _moments(log_values[old_rows], _weekdays(log_dates[old_rows])), sign=-1)
+        state['moments'] = _merge(moments, _moments(new_values, _weekdays(new_dates)))
+
+        # Window: expire what falls out as the end advances, swap replaced days that are inside it
+        old_end = state['window_end']
+        new_end = new_dates.max() if np.isnat(old_end) else max(old_end, new_dates.max())
+        new_start = new_end - np.timedelta64(self.window_days - 1, 'D')
+        if not np.isnat(old_end):
+            old_start = old_end - np.timedelta64(self.window_days - 1, 'D')
+            was_inside = log_dates >= old_start
+            leaving = was_inside & (log_dates < new_start)
+            leaving[old_rows] |= was_inside[old_rows]
+            if leaving.any():
+                state['window'] -= _window_sums(log_values[leaving], _weekdays(log_dates[leaving]))
+        entering = new_dates >= new_start
+        if entering.any():
+            state['window'] += _window_sums(new_values[entering], _weekdays(new_dates[entering]))
+        state['window'][0] = np.maximum(state['window'][0], 0.0)
+        state['window_end'] = new_end
+
+        # Log: overwrite replaced rows, insert the rest in date order
+        log_values = log_values.copy()
+        log_values[old_rows] = new_values[replaced]
+        added = ~replaced
+        state['dates'] = np.insert(log_dates, positions[added], new_dates[added])
+        state['values'] = np.insert(log_values, positions[added], new_values[added], axis=0)
+
+        # EWMA: continue forward when a weekday only gained later days, otherwise replay that weekday's log
+        weekdays = _weekdays(new_dates)
+        log_weekdays = _weekdays(state['dates'])
+        for weekday in np.unique(weekdays).tolist():
+            through = state['ewma_through'][weekday]
+            mine = weekdays == weekday
+            if not np.isnat(through) and new_dates[mine].min() > through:
+                rows = new_values[mine]
+            else:
+                state['ewma'][weekday] = np.nan
+                rows = state['values'][log_weekdays == weekday]
+            state['ewma'][weekday] = self._ewma(state['ewma'][weekday], rows)
+            state['ewma_through'][weekday] = state['dates'][log_weekdays == weekday].max()
+
+    def _ewma(self, ewma: Any, rows: Any) -> Any:
+        alpha = self.options['ewma_alpha']
+        for values in rows:
+            present = ~np.isnan(values)
+            ewma = np.where(present, np.where(np.isnan(ewma), values, alpha * values + (1 - alpha) * ewma), ewma)
+        return ewma
+
+    def baseline(self, day: Union[str, date], band_sigma: Optional[float] = None,
+                 min_samples: Optional[int] = None) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Leave-one-out band per metric for `day`'s weekday: expected, low, high, samples (24 hours each).
+
+        Hours with fewer than min_samples other days have NaN bounds. None without a store.
+        """
+        state = self.load()
+        if not len(state['dates']):
+            return None
+        band_sigma = self.options['band_sigma'] if band_sigma is None else band_sigma
+        min_samples = self.options['min_samples'] if min_samples is None else min_samples
+        day = np.datetime64(str(day), 'D')
+        weekday = int(_weekdays(np.array([day]))[0])
+        moments = state['moments'][:, weekday]
+        window = state['window'][:, weekday].copy()
+        ewma = state['ewma'][weekday].copy()
+
+        row = np.searchsorted(state['dates'], day)
+        if row < len(state['dates']) and state['dates'][row] == day:
+            own = state['values'][row][None]
+            present = ~np.isnan(own[0])
+            moments = _merge(moments[:, None], _moments(own, np.zeros(1, dtype=int))[:, :1], sign=-1)[:, 0]
+            start = state['window_end'] - np.timedelta64(self.window_days - 1, 'D')
+            if day >= start:
+                window -= _window_sums(own, np.zeros(1, dtype=int))[:, 0]
+            if state['ewma_through'][weekday] == day:
+                # This day was the last EWMA step: undo it where there was an earlier value
+                alpha = self.options['ewma_alpha']
+                undo = present & (moments[0] > 0)
+                ewma = np.where(undo, (ewma - alpha * np.nan_to_num(own[0])) / (1 - alpha), ewma) if alpha < 1 else ewma
+                ewma = np.where(present & (moments[0] == 0), np.nan, ewma)
+
+        n_window, total, squares = window
+        with np.errstate(invalid='ignore', divide='ignore'):
+            window_mean = np.where(n_window > 0, total / n_window, np.nan)
+            window_std = np.where(n_window > 1, np.sqrt(np.maximum(squares - n_window * window_mean ** 2, 0.0)
+                                                        / (n_window - 1)), np.nan)
+        all_std = _std(*moments)
+        use_window = n_window >= min_samples
+        spread = np.where(use_window, window_std, all_std)
+        expected = np.where(np.isnan(ewma), moments[1], ewma)
+        samples = np.where(use_window, n_window, moments[0])
+        valid = samples >= min_samples
+        expected = np.where(valid, expected, np.nan)
+        low = np.where(valid, np.maximum(expected - band_sigma * spread, 0.0), np.nan)
+        high = np.where(valid, expected + band_sigma * spread, np.nan)
+        return {
+            metric: {'expected': expected[i], 'low': low[i], 'high': high[i], 'samples': samples[i].astype(int)}
+            for i, metric in enumerate(METRICS)
+        }
+
+
+    def fingerprint(self, day: Union[str, date]) -> str:
+        """Short hash of `day`'s bands ('' without a store), for caches keyed on what a dashboard shows."""
+        if not self.exists():
+            return ''
+        bands = self.baseline(day)
+        if bands is None:
+            return ''
+        digest = hashlib.sha1()
+        for metric in METRICS:
+            for name in ('expected', 'low', 'high', 'samples'):
+                digest.update(np.ascontiguousarray(bands[metric][name]).tobytes())
+        return digest.hexdigest()[:16]
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain and inspect weekday x hour baselines.")
+    parser.add_argument('--mailbox', help="Mailbox (a configured name or 'combined'). Default: the original layout.")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the store from every day in the database.")
+    parser.add_argument('--date', help="Print the baseline bands for this date (YYYY-MM-DD).")
+    args = parser.parse_args(argv)
+
+    try:
+        mailbox = get_mailbox(args.mailbox)
+        options = baseline_options(mailbox.load_config())
+    except (MailboxError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    store = baseline_store_for(mailbox.database_path, options)
+
+    if args.rebuild or not store.exists():
+        with open(mailbox.database_path) as f:
+            days = json.load(f).get('days', {})
+        if store.exists():
+            store.path.unlink()
+        print(f"Folded {store.update(days)} days into {store.path}")
+
+    if args.date:
+        bands = store.baseline(args.date)
+        if bands is None:
+            print("No baselines stored")
+            return 1
+        print(f"{args.date} ({date.fromisoformat(args.date).strftime('%A')})")
+        print(f"{'hour':>4}  " + '  '.join(f"{metric + ' expected':>16} {'band':>13} {'n':>3}" for metric in METRICS))
+        for hour in range(HOURS):
+            cells = []
+            for metric in METRICS:
+                band = bands[metric]
+                if np.isnan(band['expected'][hour]):
+                    cells.append(f"{'-':>16} {'-':>13} {band['samples'][hour]:>3}")
+                else:
+                    span = f"{band['low'][hour]:.1f}-{band['high'][hour]:.1f}"
+                    cells.append(f"{band['expected'][hour]:>16.1f} {span:>13} {band['samples'][hour]:>3}")
+            print(f"{hour:>4}  " + '  '.join(cells))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
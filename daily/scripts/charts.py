@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+SVG Chart Engine
+
+Shared, NumPy-vectorized geometry for the dashboards' SVG charts. Callers
+pass whole series (lists or arrays, None/NaN for missing values) and get
+back pixel coordinates and compact SVG path strings; the templates only
+place them.
+
+Missing values are gaps: lines and areas are broken into separate subpaths
+around them instead of being bridged or drawn at zero.
+
+When a series has more points than the plot has pixels it is decimated
+before any path is built:
+- "lttb"   Largest-Triangle-Three-Buckets, keeps the visual shape (default)
+- "minmax" the minimum and maximum of each pixel column, keeps every spike
+Decimation runs per gap-free run, so gaps survive it.
+
+Key Features:
+- ChartFrame: canvas and margins, value -> pixel scaling, y-axis ticks
+- line_path / area_path: straight or Catmull-Rom smoothed, one subpath per run
+- bar_path: any number of bars as a single <path>
+- band_path: a filled range between two series (e.g. a baseline band)
+- heatmap: intensity levels for a matrix plus a legend of the value ranges
+- Coordinates rounded to `precision` decimals, trailing zeros dropped
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+DEFAULT_PRECISION = 2
+HEATMAP_LEVELS = 8
+
+
+class ChartFrame:
+    """An SVG canvas with margins around the plot area."""
+
+    def __init__(self, width: float, height: float, left: float = 0, right: float = 0,
+                 top: float = 0, bottom: float = 0):
+        self.width = width
+        self.height = height
+        self.left = left
+        self.right = right
+        self.top = top
+        self.bottom = bottom
+        self.plot_width = width - left - right
+        self.plot_height = height - top - bottom
+        self.baseline = height - bottom
+
+    @property
+    def max_points(self) -> int:
+        """Points worth drawing across the plot: one per pixel column."""
+        return max(int(self.plot_width), 3)
+
+    def x_positions(self, count: int) -> Any:
+        """Evenly spaced x for `count` points spanning the plot width."""
+        step = self.plot_width / (count - 1) if count > 1 else 0
+        return self.left + np.arange(count) * step
+
+    def y_positions(self, values: Any, max_value: float) -> Any:
+        """y for values on a 0..max_value scale (SVG y grows downwards); NaN stays NaN."""
+        values = as_series(values)
+        if max_value <= 0:
+            return np.where(np.isnan(values), np.nan, self.baseline)
+        return self.top + self.plot_height * (1 - values / max_value)
+
+    def y_ticks(self, max_value: float, count: int = 5) -> List[Dict[str, int]]:
+        """Axis labels at count + 1 evenly spaced values from 0 to max_value."""
+        fractions = np.arange(count + 1) / count
+        values = (max_value * fractions).astype(int)
+        ys = np.rint(self.top + self.plot_height * (1 - fractions)).astype(int)
+        return [{'value': v, 'y': y} for v, y in zip(values.tolist(), ys.tolist())]
+
+
+def as_series(values: Any) -> Any:
+    """Float array with None mapped to NaN."""
+    if isinstance(values, np.ndarray):
+        return values.astype(float, copy=False)
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def runs(valid: Any) -> List[Tuple[int, int]]:
+    """(start, stop) of every run of True values."""
+    padded = np.concatenate(([False], np.asarray(valid, dtype=bool), [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def format_numbers(values: Any, precision: int = DEFAULT_PRECISION) -> List[str]:
+    """Shortest text for each value rounded to `precision` decimals ("340", "82.17")."""
+    rounded = np.round(np.asarray(values, dtype=float), precision)
+    return [str(int(v)) if v.is_integer() else repr(v) for v in rounded.tolist()]
+
+
+# --- Decimation ---------------------------------------------------------------
+
+def lttb_indices(x: Any, y: Any, threshold: int) -> Any:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps (first and last included)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # threshold - 2 buckets over the interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    starts, stops = edges[:-1], edges[1:]
+    sizes = stops - starts
+    mean_x = np.add.reduceat(x[:n - 1], starts) / sizes
+    mean_y = np.add.reduceat(y[:n - 1], starts) / sizes
+    # The "next bucket" of the last bucket is the final point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i, (start, stop) in enumerate(zip(starts.tolist(), stops.tolist())):
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs((ax - next_x[i]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (next_y[i] - ay))
+        anchor = start + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def minmax_indices(y: Any, buckets: int) -> Any:
+    """Indices of the minimum and maximum of each of `buckets` equal slices, in order."""
+    n = len(y)
+    if buckets * 2 >= n or buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    sizes = np.diff(edges)
+    bucket_of = np.repeat(np.arange(buckets), sizes)
+    keep = [[0, n - 1]]
+    for extreme in (np.minimum, np.maximum):
+        # First position in each bucket holding the bucket's extreme value
+        hits = np.flatnonzero(y == np.repeat(extreme.reduceat(y, edges[:-1]), sizes))
+        _, first = np.unique(bucket_of[hits], return_index=True)
+        keep.append(hits[first])
+    return np.unique(np.concatenate(keep))
+
+
+def decimate(x: Any, y: Any, max_points: int, method: str = 'lttb') -> Tuple[Any, Any]:
+    """Reduce a series to about `max_points` points; NaN gaps are kept as gaps."""
+    if method not in ('lttb', 'minmax'):
+        raise ValueError(f"Unknown decimation method '{method}' (use lttb or minmax)")
+    x = np.asarray(x, dtype=float)
+    y = as_series(y)
+    if len(y) <= max_points:
+        return x, y
+    valid = ~np.isnan(y)
+    spans = runs(valid)
+    total = int(valid.sum())
+    keep = []
+    for start, stop in spans:
+        budget = max(2, round(max_points * (stop - start) / total))
+        if method == 'minmax':
+            indices = minmax_indices(y[start:stop], budget // 2)
+        else:
+            indices = lttb_indices(x[start:stop], y[start:stop], budget)
+        keep.append(start + indices)
+        if stop < len(y):
+            keep.append([stop])  # one NaN keeps the gap
+    indices = np.concatenate(keep).astype(np.intp) if keep else np.empty(0, dtype=np.intp)
+    return x[indices], y[indices]
+
+
+# --- Paths --------------------------------------------------------------------
+
+def _run_path(x: Any, y: Any, smooth: bool, tension: float, precision: int) -> str:
+    xs, ys = format_numbers(x, precision), format_numbers(y, precision)
+    head = f"M {xs[0]},{ys[0]}"
+    if len(xs) == 1:
+        return head
+    if not smooth:
+        return head + ' L ' + ' '.join(f"{px},{py}" for px, py in zip(xs[1:], ys[1:]))
+    # Catmull-Rom through every point, as cubic Bezier control points
+    i = np.arange(len(x) - 1)
+    before, after = np.maximum(i - 1, 0), np.minimum(i + 2, len(x) - 1)
+    c1x = format_numbers(x[i] + (x[i + 1] - x[before]) / 6.0 * tension, precision)
+    c1y = format_numbers(y[i] + (y[i + 1] - y[before]) / 6.0 * tension, precision)
+    c2x = format_numbers(x[i + 1] - (x[after] - x[i]) / 6.0 * tension, precision)
+    c2y = format_numbers(y[i + 1] - (y[after] - y[i]) / 6.0 * tension, precision)
+    segments = zip(c1x, c1y, c2x, c2y, xs[1:], ys[1:])
+    return head + ''.join(f" C {a},{b} {c},{d} {px},{py}" for a, b, c, d, px, py in segments)
+
+
+def line_path(x: Any, y: Any, smooth: bool = False, tension: float = 1.0,
+              precision: int = DEFAULT_PRECISION) -> str:
+    """Path through the points; NaN values split it into separate subpaths."""
+    x, y = np.asarray(x, dtype=float), as_series(y)
+    return ' '.join(_run_path(x[a:b], y[a:b], smooth, tension, precision) for a, b in runs(~np.isnan(y)))
+
+
+def area_path(x: Any, y: Any, baseline: float, smooth: bool = False, tension: float = 1.0,
+              precision: int = DEFAULT_PRECISION) -> str:
+    """Closed area between the line and `baseline`, one closed subpath per gap-free run."""
+    x, y = np.asarray(x, dtype=float), as_series(y)
+    base = format_numbers([baseline], precision)[0]
+    parts = []
+    for a, b in runs(~np.isnan(y)):
+        first, last = format_numbers([x[a], x[b - 1]], precision)
+        parts.append(f"{_run_path(x[a:b], y[a:b], smooth, tension, precision)} L {last},{base} L {first},{base} Z")
+    return ' '.join(parts)
+
+
+def bar_path(x: Any, y: Any, width: float, baseline: float, precision: int = DEFAULT_PRECISION) -> str:
+    """Bars centred on x from `baseline` up to y, all in one path; NaN bars are skipped."""
+    x, y = np.asarray(x, dtype=float), as_series(y)
+    present = ~np.isnan(y)
+    lefts = format_numbers(x[present] - width / 2, precision)
+    tops = format_numbers(y[present], precision)
+    w, base = format_numbers([width, baseline], precision)
+    return ' '.join(f"M {left},{base} V {top} h {w} V {base} Z" for left, top in zip(lefts, tops))
+
+
+def band_path(x: Any, y_low: Any, y_high: Any, precision: int = DEFAULT_PRECISION) -> str:
+    """Closed region between two series, one subpath per run where both are present."""
+    x, y_low, y_high = np.asarray(x, dtype=float), as_series(y_low), as_series(y_high)
+    parts = []
+    for a, b in runs(~(np.isnan(y_low) | np.isnan(y_high))):
+        upper = _run_path(x[a:b], y_high[a:b], False, 1.0, precision)
+        lower = zip(format_numbers(x[a:b][::-1], precision), format_numbers(y_low[a:b][::-1], precision))
+        parts.append(upper + ''.join(f" L {px},{py}" for px, py in lower) + ' Z')
+    return ' '.join(parts)
+
+
+# --- Heatmap ------------------------------------------------------------------
+
+def heatmap_levels(matrix: Any, levels: int = HEATMAP_LEVELS) -> Tuple[Any, float]:
+    """Intensity level (0..levels-1) of every cell relative to the largest value, and that value."""
+    values = np.nan_to_num(np.asarray(matrix, dtype=float))
+    peak = float(values.max()) if values.size else 0.0
+    if peak <= 0:
+        return np.zeros(values.shape, dtype=int), peak
+    # Half-up rounding of value / peak onto the level scale
+    return np.clip(np.floor(values / peak * (levels - 1) + 0.5), 0, levels - 1).astype(int), peak
+
+
+def heatmap_legend(peak: float, levels: int = HEATMAP_LEVELS) -> List[Dict[str, Any]]:
+    """The integer value range of each level ("0", "4-9", "31-36", or "" when a level is empty)."""
+    step = peak / (levels - 1) if peak > 0 else 0
+    legend = []
+    for level in range(levels):
+        if step == 0:
+            label = '0' if level == 0 else ''
+        else:
+            low = 0 if level == 0 else int(np.ceil((level - 0.5) * step))
+            high = int(peak) if level == levels - 1 else int(np.ceil((level + 0.5) * step)) - 1
+            label = '' if low > high else (str(low) if low == high else f"{low}-{high}")
+        legend.append({'level': level, 'label': label})
+    return legend
+
+
+def heatmap(matrix: Any, frame: ChartFrame, row_labels: Sequence[str], column_labels: Sequence[str],
+            gap: float = 4, levels: int = HEATMAP_LEVELS, precision: int = 1) -> Dict[str, Any]:
+    """Cell rectangles (with level and value), axis label positions and the legend for a matrix."""
+    values = np.nan_to_num(np.asarray(matrix, dtype=float))
+    rows, columns = values.shape
+    level, peak = heatmap_levels(values, levels)
+    cell_w = (frame.plot_width - gap * (columns - 1)) / columns
+    cell_h = (frame.plot_height - gap * (rows - 1)) / rows
+    xs = frame.left + np.arange(columns) * (cell_w + gap)
+    ys = frame.top + np.arange(rows) * (cell_h + gap)
+    x_text, y_text = format_numbers(xs, precision), format_numbers(ys, precision)
+    cells = [
+        {'x': x_text[c], 'y': y_text[r], 'level': int(level[r, c]), 'value': int(values[r, c]),
+         'row': row_labels[r], 'column': column_labels[c]}
+        for r in range(rows) for c in range(columns)
+    ]
+    return {
+        'cells': cells,
+        'cell_width': format_numbers([cell_w], precision)[0],
+        'cell_height': format_numbers([cell_h], precision)[0],
+        'rows': [{'label': label, 'y': y} for label, y in
+                 zip(row_labels, format_numbers(ys + cell_h / 2, precision))],
+        'columns': [{'label': label, 'x': x} for label, x in
+                    zip(column_labels, format_numbers(xs + cell_w / 2, precision))],
+        'legend': heatmap_legend(peak, levels),
+        'max_value': int(peak),
+    }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Dashboard Context Cache
+
+Serializes the per-day context computed by DashboardGenerator.generate_dashboard
+(KPIs, percentiles, two-hour table, SVG paths and coordinates) to
+data/cache/contexts/<mailbox>/<date>.json, so any number of templates and
+themes can be rendered from it without touching the database or redoing the
+percentile/SVG math.
+
+An entry is valid while the data it was computed from is unchanged:
+
+1. Fast path: the stat signature of everything the context depends on (the
+   database file, the SLA config files, the day's fact and series partitions,
+   the baseline store) matches the one stored with the entry. Nothing else is read.
+2. Otherwise the database is loaded and the day's content key (its JSON entry,
+   the SLA config, the chart resolution, the partition mtimes and the day's
+   baseline bands) is compared.
+   An ingest that did not change this day only refreshes the stored signature.
+3. Otherwise the context is recomputed and rewritten.
+
+Key Features:
+- Plain JSON entries (contexts are JSON-safe), one file per day
+- Database loaded at most once per cache instance, and only on a miss
+- day_fingerprint() is shared with the dashboard server's response cache
+- Atomic writes, safe to read from parallel render workers
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from mailboxes import Mailbox
+
+CACHE_VERSION = 2
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return Path(path).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def day_fingerprint(day: Optional[Dict[str, Any]], fact_path: Path, series_path: Path, baseline: str = '') -> str:
+    """Hash of one day's database entry, the mtimes of its fact/series partitions
+    and (for daily dashboards) its baseline fingerprint."""
+    payload = [json.dumps(day, sort_keys=True, default=str), _mtime(fact_path), _mtime(series_path), baseline]
+    return hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest()
+
+
+class ContextCache:
+    """Per-day dashboard contexts for one mailbox, backed by JSON files."""
+
+    def __init__(self, generator: Any, mailbox: Optional[Mailbox] = None, root: Optional[Path] = None):
+        self.generator = generator
+        self.mailbox = mailbox or Mailbox()
+        self.root = Path(root) if root else self.mailbox.project_root / 'data' / 'cache' / 'contexts' / self.mailbox.name
+        self._database: Optional[Dict[str, Any]] = None
+        self._config_hash = hashlib.sha1(json.dumps(
+            [generator.sla_config, generator.get_chart_resolution(), CACHE_VERSION], sort_keys=True, default=str
+        ).encode('utf-8')).hexdigest()
+
+    @property
+    def database(self) -> Dict[str, Any]:
+        """The mailbox database, loaded on first use."""
+        if self._database is None:
+            self._database = self.generator.load_data()
+        return self._database
+
+    def entry_path(self, date_str: str) -> Path:
+        return self.root / f"{date_str}.json"
+
+    def source_signature(self, date_str: str) -> List[Any]:
+        """Stat signature of every file the day's context is computed from."""
+        paths = [self.mailbox.database_path, *self.mailbox.config_files,
+                 self.generator.fact_store.partition_path(date_str),
+                 self.generator.series_store.partition_path(date_str),
+                 self.generator.baseline_store.path]
+        return [str(p) for p in paths] + [_mtime(p) for p in paths]
+
+    def content_key(self, date_str: str) -> str:
+        day = self.database.get('days', {}).get(date_str)
+        fingerprint = day_fingerprint(day, self.generator.fact_store.partition_path(date_str),
+                                      self.generator.series_store.partition_path(date_str),
+                                      self.generator.baseline_store.fingerprint(date_str))
+        return f"{self._config_hash[:16]}{fingerprint[:24]}"
+
+    def get(self, date_str: str, refresh: bool = False) -> Tuple[Dict[str, Any], str]:
+        """Return (context, status) for one day; status is 'hit', 'revalidated' or 'computed'."""
+        path = self.entry_path(date_str)
+        signature = self.source_signature(date_str)
+        entry = None if refresh else self._read(path)
+        if entry is not None and entry.get('signature') == signature and entry.get('config') == self._config_hash:
+            return entry['context'], 'hit'
+
+        key = self.content_key(date_str)
+        if entry is not None and entry.get('key') == key:
+            entry['signature'] = signature
+            self._write(path, entry)
+            return entry['context'], 'revalidated'
+
+        context = self.generator.generate_dashboard(target_date=date_str, data=self.database)
+        self._write(path, {'version': CACHE_VERSION, 'date': date_str, 'config': self._config_hash,
+                           'key': key, 'signature': signature, 'context': context})
+        return context, 'computed'
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry if entry.get('version') == CACHE_VERSION else None
+
+    @staticmethod
+    def _write(path: Path, entry: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_path, path)
+
+
+def load_context(path: Path) -> Dict[str, Any]:
+    """Read the context of a cache entry file (used by render workers)."""
+    with open(path, 'r') as f:
+        return json.load(f)['context']
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Persistent Conversation State
+
+One row per conversation, kept next to the JSON database
+(database/email_database_conversations.npz for email_database.json) and
+indexed by the fact table's conversation code (sorted, looked up with
+searchsorted):
+
+    code          int64           conversation_code() of the Conversation-Id
+    first_inbox   datetime64[s]   earliest Inbox email
+    last_inbox    datetime64[s]   latest Inbox email
+    last_event    datetime64[s]   latest Inbox or response time
+    open_inbox    int32           Inbox emails still pending
+    last_status   int8            status of the latest Inbox email (fact_table.STATUS_CODES)
+
+plus the open items themselves, one (conversation, inbox time) pair per
+pending email. Both are folded forward from the fact partitions the ingester
+(or classifier) just wrote, with the same rule as the fact table: a day that
+was written replaces that day's open items, so the open items are always the
+pending facts. Conversation rows only widen (earliest/latest times are merged
+with min/max); `--rebuild` refolds every partition after facts were removed.
+
+The open-item aging report buckets the pending emails by their age in
+business minutes at an as-of time (default: the latest event in the store),
+reading only this file, so it never rescans events or fact partitions.
+Edges are configured in sla_config.json (business minutes, ascending):
+
+    "aging": {"buckets_minutes": [60, 120, 240, 480, 960]}
+
+Key Features:
+- Incremental: each ingest folds only the days it wrote; the first one (no store yet) folds every partition
+- Vectorized: per-conversation aggregates with reduceat, business-minute ages with fact_table.business_minutes
+- CLI: aging report (text or JSON), one conversation's state, or a rebuild from the facts
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from fact_table import STATUS_CODES, STATUS_NAMES, business_minutes, conversation_code, fact_store_for
+from lazy_imports import lazy_import
+from mailboxes import MailboxError, get_mailbox
+
+np = lazy_import('numpy')
+
+COLUMNS = ('code', 'first_inbox', 'last_inbox', 'last_event', 'open_inbox', 'last_status')
+OPEN_COLUMNS = ('open_conversation', 'open_since')
+DEFAULT_BUCKETS = (60, 120, 240, 480, 960)
+
+
+def aging_options(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The "aging" section of an SLA config with defaults filled in, plus its business hours."""
+    section = (config or {}).get('aging') or {}
+    edges = [float(edge) for edge in section.get('buckets_minutes', DEFAULT_BUCKETS)]
+    if not edges or edges[0] <= 0 or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError(f"aging.buckets_minutes must be positive and ascending, got {edges}")
+    business = (config or {}).get('sla_thresholds', {}).get('business_hours', {})
+    return {
+        'buckets_minutes': edges,
+        'start_hour': int(business.get('start_hour', 7)),
+        'end_hour': int(business.get('end_hour', 21)),
+        'business_days': list(business.get('business_days', range(7))),
+    }
+
+
+def conversation_state_for(database_path: Union[str, Path]) -> 'ConversationStateStore':
+    """Return the conversation state store that sits next to a JSON database file."""
+    path = Path(database_path).resolve()
+    return ConversationStateStore(path.with_name(f"{path.stem}_conversations.npz"))
+
+
+def _bucket_label(low: float, high: Optional[float]) -> str:
+    if high is None:
+        return f"{low:g}+"
+    return f"<{high:g}" if low == 0 else f"{low:g}-{high:g}"
+
+
+def summarize(facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-conversation aggregates (sorted by code) of fact-table columns."""
+    order = np.lexsort((facts['inbox_ts'], facts['conversation']))
+    codes = facts['conversation'][order]
+    inbox = facts['inbox_ts'][order]
+    response = facts['response_ts'][order]
+    unique, starts = np.unique(codes, return_index=True)
+    if not len(unique):
+        return {'code': unique, 'first_inbox': inbox, 'last_inbox': inbox, 'last_event': inbox,
+                'last_status': facts['status'][order]}
+    last = np.append(starts[1:], len(codes)) - 1
+    event = np.fmax(inbox, response)
+    return {
+        'code': unique,
+        'first_inbox': inbox[starts],
+        'last_inbox': inbox[last],
+        'last_event': np.maximum.reduceat(event, starts),
+        'last_status': facts['status'][order][last],
+    }
+
+
+class ConversationStateStore:
+    """Conversation rows indexed by code, plus the open (pending) items they count."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._state = None
+        self._loaded_mtime = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {
+            'code': np.empty(0, dtype=np.int64),
+            'first_inbox': np.empty(0, dtype='datetime64[s]'),
+            'last_inbox': np.empty(0, dtype='datetime64[s]'),
+            'last_event': np.empty(0, dtype='datetime64[s]'),
+            'open_inbox': np.empty(0, dtype=np.int32),
+            'last_status': np.empty(0, dtype=np.int8),
+            'open_conversation': np.empty(0, dtype=np.int64),
+            'open_since': np.empty(0, dtype='datetime64[s]'),
+        }
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> Dict[str, Any]:
+        """The stored state (empty if there is no store yet); reloaded when another process rewrote it."""
+        mtime = self._mtime()
+        if self._state is None or mtime != self._loaded_mtime:
+            if mtime is not None:
+                with np.load(self.path) as stored:
+                    self._state = {name: stored[name] for name in COLUMNS + OPEN_COLUMNS}
+            else:
+                self._state = self._empty()
+            self._loaded_mtime = mtime
+        return self._state
+
+    def save(self) -> Path:
+        """Write the state (atomic rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp_path, **self.load())
+        os.replace(tmp_path, self.path)
+        self._loaded_mtime = self._mtime()
+        return self.path
+
+    def update(self, fact_store: Any, days: Iterable[str]) -> int:
+        """Fold the fact partitions of `days` into the state and save.
+
+        With no store yet every partition is folded. A day without a partition
+        only loses its open items. Returns the number of days folded.
+        """
+        if not self.exists():
+            return self.rebuild(fact_store)
+        days = sorted(set(days))
+        if not days:
+            return 0
+        self._fold(fact_store.read_days(days), days)
+        self.save()
+        return len(days)
+
+    def rebuild(self, fact_store: Any) -> int:
+        """Replace the state with a fold of every fact partition."""
+        days = fact_store.days()
+        self.load()
+        self._state = self._empty()
+        self._fold(fact_store.read_days(days), days)
+        self.save()
+        return len(days)
+
+    def _fold(self, facts: Dict[str, Any], days: List[str]) -> None:
+        state = self.load()
+
+        # Open items: the written days are replaced by their pending facts
+        pending = facts['status'] == STATUS_CODES['Pending']
+        kept = ~np.isin(state['open_since'].astype('datetime64[D]'), np.array(days, dtype='datetime64[D]'))
+        open_conversation = np.concatenate([state['open_conversation'][kept], facts['conversation'][pending]])
+        open_since = np.concatenate([state['open_since'][kept], facts['inbox_ts'][pending].astype('datetime64[s]')])
+        order = np.argsort(open_since, kind='stable')
+        state['open_conversation'], state['open_since'] = open_conversation[order], open_since[order]
+
+        # Conversation rows: union of codes; times widen, the latest Inbox email sets the status
+        new = summarize(facts)
+        codes = np.union1d(state['code'], new['code'])
+        old_at = np.searchsorted(codes, state['code'])
+        new_at = np.searchsorted(codes, new['code'])
+        merged = {'code': codes}
+        for name in ('first_inbox', 'last_inbox', 'last_event'):
+            values = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[s]')
+            values[old_at] = state[name]
+            merged[name] = values
+        merged['last_status'] = np.zeros(len(codes), dtype=np.int8)
+        merged['last_status'][old_at] = state['last_status']
+        newer = np.isnat(merged['last_inbox'][new_at]) | (new['last_inbox'] >= merged['last_inbox'][new_at])
+        merged['last_status'][new_at[newer]] = new['last_status'][newer]
+        merged['first_inbox'][new_at] = np.fmin(merged['first_inbox'][new_at], new['first_inbox'])
+        merged['last_inbox'][new_at] = np.fmax(merged['last_inbox'][new_at], new['last_inbox'])
+        merged['last_event'][new_at] = np.fmax(merged['last_event'][new_at], new['last_event'])
+
+        # Open counts follow from the open items
+        merged['open_inbox'] = np.zeros(len(codes), dtype=np.int32)
+        open_codes, open_counts = np.unique(state['open_conversation'], return_counts=True)
+        merged['open_inbox'][np.searchsorted(codes, open_codes)] = open_counts
+        state.update(merged)
+
+    def lookup(self, codes: Any) -> Dict[str, Any]:
+        """Rows of the given conversation codes; only the entries marked in 'found' hold a row."""
+        state = self.load()
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.int64))
+        if not len(state['code']):
+            return {**{name: state[name] for name in COLUMNS}, 'found': np.zeros(len(codes), dtype=bool)}
+        at = np.minimum(np.searchsorted(state['code'], codes), len(state['code']) - 1)
+        rows = {name: state[name][at] for name in COLUMNS}
+        rows['found'] = state['code'][at] == codes
+        return rows
+
+    def aging(self, options: Dict[str, Any], as_of: Optional[Any] = None) -> Dict[str, Any]:
+        """Open items bucketed by business-minute age at `as_of` (default: the latest stored event).
+
+        Items that arrived after `as_of` are left out. Conversations are counted
+        in the bucket of their oldest open item.
+        """
+        state = self.load()
+        if as_of is None:
+            as_of = state['last_event'].max() if len(state['last_event']) else np.datetime64('NaT', 's')
+        as_of = np.datetime64(as_of, 's')
+        arrived = state['open_since'] <= as_of  # all False for an empty store (NaT)
+        since = state['open_since'][arrived]
+        conversation = state['open_conversation'][arrived]
+        ages = business_minutes(since, np.full(len(since), as_of), options['start_hour'],
+                                options['end_hour'], options['business_days'])
+
+        edges = options['buckets_minutes']
+        bucket = np.searchsorted(edges, ages, side='right')
+        # open_since is sorted, so the first item of each conversation is its oldest
+        _, oldest = np.unique(conversation, return_index=True)
+        messages = np.bincount(bucket, minlength=len(edges) + 1)
+        conversations = np.bincount(bucket[oldest], minlength=len(edges) + 1)
+        lows = [0.0] + list(edges)
+        highs = list(edges) + [None]
+        return {
+            'as_of': None if np.isnat(as_of) else str(as_of).replace('T', ' '),
+            'open_messages': int(len(since)),
+            'open_conversations': int(len(oldest)),
+            'oldest_minutes': float(ages.max()) if len(ages) else None,
+            'buckets': [
+                {'label': _bucket_label(low, high), 'min_minutes': low, 'max_minutes': high,
+                 'messages': int(messages[i]), 'conversations': int(conversations[i])}
+                for i, (low, high) in enumerate(zip(lows, highs))
+            ],
+        }
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect the persistent conversation state and open-item aging.")
+    parser.add_argument('--mailbox', help="Mailbox (a configured name or 'combined'). Default: the original layout.")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the state from every fact partition.")
+    parser.add_argument('--as-of', help="Age open items at this time (YYYY-MM-DD[ HH:MM], or 'now'). "
+                                        "Default: the latest stored event.")
+    parser.add_argument('--conversation', help="Print the state of this Conversation-Id instead of the aging report.")
+    parser.add_argument('--json', dest='json_path', help="Write the aging report to this file ('-' for stdout).")
+    args = parser.parse_args(argv)
+
+    try:
+        mailbox = get_mailbox(args.mailbox)
+        options = aging_options(mailbox.load_config())
+        as_of = None
+        if args.as_of:
+            as_of = datetime.now().replace(microsecond=0) if args.as_of == 'now' else datetime.fromisoformat(args.as_of)
+    except (MailboxError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    store = conversation_state_for(mailbox.database_path)
+
+    if args.rebuild or not store.exists():
+        print(f"Folded {store.rebuild(fact_store_for(mailbox.database_path))} fact partitions into {store.path}")
+
+    if args.conversation:
+        row = store.lookup(conversation_code(args.conversation))
+        if not row['found'][0]:
+            print(f"No state for conversation {args.conversation}")
+            return 1
+        for name in ('first_inbox', 'last_inbox', 'last_event'):
+            print(f"{name:<12} {str(row[name][0]).replace('T', ' ')}")
+        print(f"{'open_inbox':<12} {row['open_inbox'][0]}")
+        print(f"{'last_status':<12} {STATUS_NAMES[int(row['last_status'][0])]}")
+        return 0
+
+    report = store.aging(options, as_of)
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 0
+    print(f"Open items as of {report['as_of'] or '-'}: {report['open_messages']} emails "
+          f"in {report['open_conversations']} conversations")
+    print(f"{'business minutes':>16}  {'emails':>7}  {'conversations':>13}")
+    for bucket in report['buckets']:
+        print(f"{bucket['label']:>16}  {bucket['messages']:>7}  {bucket['conversations']:>13}")
+    if report['oldest_minutes'] is not None:
+        print(f"Oldest open item: {report['oldest_minutes']:.0f} business minutes")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
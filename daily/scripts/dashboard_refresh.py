@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Dashboard Refresh
+
+Re-renders one mailbox's daily and weekly dashboards for the dates an ingest
+touched. Shared by the watch daemon (one resident mailbox) and the
+multi-mailbox runner (one refresher per worker process).
+
+Key Features:
+- Daily dashboards only for touched dates that have SLA data
+- Weekly dashboards for every ISO week containing a touched date
+- latest.html is updated only when the newest complete day / newest week is affected
+- Archive index pages (archive_index.py) of the affected months are brought up to date last
+- Outputs go to the mailbox's own output folders
+"""
+
+import logging
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from baselines import baseline_store_for
+from generate_dashboard import DashboardGenerator
+from mailboxes import Mailbox
+import fact_table
+import rendering
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'weekly' / 'scripts'))
+import generate_weekly_dashboard as weekly  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardRefresher:
+    """Renders the dashboards of one mailbox for a set of touched dates."""
+
+    def __init__(self, mailbox: Optional[Mailbox] = None, render_weekly: bool = True,
+                 template: str = rendering.DAILY_TEMPLATE):
+        self.mailbox = mailbox or Mailbox()
+        self.render_weekly = render_weekly
+        self.generator = DashboardGenerator(
+            json_path=str(self.mailbox.database_path),
+            template_path=template,
+            output_path=str(self.mailbox.daily_output_dir),
+            sla_config_path=str(self.mailbox.config_path),
+            sla_config_overlay_path=str(self.mailbox.overlay_path) if self.mailbox.overlay_path else None,
+        )
+        self.weekly_config = weekly.load_sla_config(self.mailbox)
+        self.facts = fact_table.fact_store_for(self.mailbox.database_path)
+        self.archive = self._archive()
+
+    def _archive(self):
+        from archive_index import ArchiveIndex
+        return ArchiveIndex(self.mailbox, self.generator.sla_config, self.generator.get_output_options())
+
+    def reload_config(self) -> None:
+        self.generator.load_sla_config()
+        self.generator.baseline_store = baseline_store_for(self.generator.json_path,
+                                                           self.generator.get_baseline_options())
+        self.weekly_config = weekly.load_sla_config(self.mailbox)
+        self.archive = self._archive()
+
+    def refresh(self, database: Dict[str, Any], touched_dates: Iterable[str]) -> Tuple[int, int]:
+        """Render everything affected by touched_dates; returns (daily, weekly) counts."""
+        touched_dates = sorted(touched_dates)
+        daily_count = self.render_daily(database, touched_dates)
+        weekly_count = self.render_weekly_dashboards(database, touched_dates) if self.render_weekly else 0
+        self.update_archive(database, touched_dates)
+        return daily_count, weekly_count
+
+    def update_archive(self, database: Dict[str, Any], touched_dates: Iterable[str]) -> int:
+        """Rewrite the archive pages whose inputs the touched dates changed; returns the page count."""
+        try:
+            written = self.archive.update(database, touched_dates)
+        except Exception as e:
+            logger.error(f"[{self.mailbox.name}] Failed to update the dashboard archive: {e}")
+            return 0
+        logger.debug(f"[{self.mailbox.name}] Archive pages written: {', '.join(p.name for p in written) or 'none'}")
+        return len(written)
+
+    def render_daily(self, database: Dict[str, Any], touched_dates: Iterable[str]) -> int:
+        """Re-render daily dashboards for touched dates that have SLA data."""
+        days = database.get('days', {})
+        try:
+            latest_date, _ = self.generator.get_latest_complete_day(database)
+        except ValueError:
+            latest_date = None
+
+        rendered = 0
+        for date_str in touched_dates:
+            summary = (days.get(date_str) or {}).get('daily_summary') or {}
+            if summary.get('sla_compliance_rate') is None:
+                logger.debug(f"Skipping daily dashboard for {date_str}: no SLA data")
+                continue
+            try:
+                context = self.generator.generate_dashboard(target_date=date_str, data=database)
+                html = self.generator.render_template(context)
+                self.generator.save_dashboard(html, date_str, write_latest=(date_str == latest_date))
+                rendered += 1
+            except Exception as e:
+                logger.error(f"[{self.mailbox.name}] Failed to render daily dashboard for {date_str}: {e}")
+        return rendered
+
+    def render_weekly_dashboards(self, database: Dict[str, Any], touched_dates: Iterable[str]) -> int:
+        """Re-render the ISO weeks containing touched dates."""
+        weeks = sorted({date.fromisoformat(d).isocalendar()[:2] for d in touched_dates})
+        latest = database.get('metadata', {}).get('latest_date')
+        latest_week = date.fromisoformat(latest).isocalendar()[:2] if latest else None
+
+        rendered = 0
+        for year, week in weeks:
+            week_str = f"{year}-W{week:02d}"
+            start_date = date.fromisocalendar(year, week, 1)
+            end_date = start_date + timedelta(days=6)
+            try:
+                context = weekly.build_weekly_context(database, self.weekly_config, start_date, end_date,
+                                                      facts=self.facts,
+                                                      daily_output_dir=self.mailbox.daily_output_dir)
+                html = weekly.render_dashboard_html(context)
+                weekly.save_dashboard(html, week_str, write_latest=((year, week) == latest_week),
+                                      output_dir=self.mailbox.weekly_output_dir,
+                                      output_options=self.generator.get_output_options())
+                rendered += 1
+            except Exception as e:
+                logger.error(f"[{self.mailbox.name}] Failed to render weekly dashboard for {week_str}: {e}")
+        return rendered
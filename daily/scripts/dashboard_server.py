@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Dashboard Server
+
+Local HTTP server that renders dashboards on demand instead of reading
+pre-rendered files. It reuses the same code paths as the CLIs
+(DashboardGenerator.generate_dashboard/render_template for days,
+build_weekly_context/compute_weekly_kpis for weeks and ranges):
+
+    /                          redirect to the latest complete day
+    /day/YYYY-MM-DD            daily dashboard (?template=<name> for a theme)
+    /week/YYYY-Www             weekly dashboard for an ISO week
+    /range?from=...&to=...     weekly-style dashboard for any date range
+    /api/dates                 dates with completeness flags
+    /api/day/YYYY-MM-DD        daily KPIs as JSON
+    /api/week/YYYY-Www         weekly KPIs as JSON
+    /api/range?from=&to=       KPIs for a date range as JSON
+    /api/cache                 cache statistics
+
+The database, SLA config and compiled templates stay loaded, and are reloaded
+only when another process (ingestion, the watch daemon) changes them on disk.
+Every response has a data fingerprint: a hash of the route, the config and
+the JSON of each day it covers (plus the day's fact/series partition mtimes).
+Rendered responses are kept in an LRU keyed by that fingerprint, and the
+fingerprint is the response's ETag, so an unchanged page is answered with
+304 Not Modified without rendering anything.
+
+Key Features:
+- Standard library http.server; one process, threaded, renders serialized
+- Cache entries are invalidated per day, not per database reload
+- Server-Timing header reports the render time of each response
+- --mailbox serves one mailbox's database and config (or 'combined')
+
+Usage:
+    python3 daily/scripts/dashboard_server.py --port 8050
+    python3 daily/scripts/dashboard_server.py --mailbox billing --cache-size 512
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from backlog import has_sla
+from context_cache import day_fingerprint
+from dashboard_refresh import DashboardRefresher
+from mailboxes import Mailbox, MailboxError, get_mailbox
+import rendering
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'weekly' / 'scripts'))
+import generate_weekly_dashboard as weekly  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+WEEK_PATTERN = re.compile(r'^(\d{4})-W(\d{2})$')
+DAILY_KPI_KEYS = ('date_str', 'total_emails', 'avg_unread_count', 'avg_response_time', 'median_response_time',
+                  'sla_compliance', 'unread_threshold', 'response_time_target', 'sla_compliance_target',
+                  'response_time_percentiles', 'unread_derived', 'daily_data')
+
+
+class RequestError(Exception):
+    """A request that cannot be served; carries the HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    __slots__ = ('status', 'content_type', 'body', 'etag', 'headers')
+
+    def __init__(self, status: int, content_type: str = 'text/plain; charset=utf-8', body: bytes = b'',
+                 etag: Optional[str] = None, headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.etag = etag
+        self.headers = headers or {}
+
+
+class ResponseCache:
+    """LRU of rendered bodies keyed by data fingerprint."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, fingerprint: str) -> Optional[Tuple[str, bytes]]:
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(fingerprint)
+        self.hits += 1
+        return entry
+
+    def put(self, fingerprint: str, content_type: str, body: bytes) -> None:
+        self._entries[fingerprint] = (content_type, body)
+        self._entries.move_to_end(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': sum(len(body) for _, body in self._entries.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+        }
+
+
+def parse_day(value: Optional[str]) -> date:
+    if not value or not DATE_PATTERN.match(value):
+        raise RequestError(400, f"Expected a date as YYYY-MM-DD (got {value!r})")
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise RequestError(400, f"Invalid date {value!r}")
+
+
+def parse_week(value: str) -> Tuple[date, date]:
+    """(Monday, Sunday) of an ISO week 'YYYY-Www'."""
+    match = WEEK_PATTERN.match(value)
+    if not match:
+        raise RequestError(400, f"Expected an ISO week as YYYY-Www (got {value!r})")
+    try:
+        start_date = date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+    except ValueError:
+        raise RequestError(400, f"Invalid ISO week {value!r}")
+    return start_date, start_date + timedelta(days=6)
+
+
+def parse_range(query: Dict[str, List[str]]) -> Tuple[date, date]:
+    start_date = parse_day((query.get('from') or [None])[0])
+    end_date = parse_day((query.get('to') or [None])[0])
+    if end_date < start_date:
+        raise RequestError(400, "'to' must not be before 'from'")
+    return start_date, end_date
+
+
+class DashboardService:
+    """Routes, fingerprints and caches dashboard responses for one mailbox."""
+
+    def __init__(self, mailbox: Optional[Mailbox] = None, template: str = rendering.DAILY_TEMPLATE,
+                 cache_size: int = 256):
+        self.mailbox = mailbox or Mailbox()
+        self.template = template
+        self.refresher = DashboardRefresher(self.mailbox, template=template)
+        self.generator = self.refresher.generator
+        self.cache = ResponseCache(cache_size)
+        self.templates = set(rendering.available_templates())
+        self.database: Optional[Dict[str, Any]] = None
+        self._db_mtime = None
+        self._config_signature = None
+        self._config_hash = ''
+        self._day_fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    # -- state -------------------------------------------------------------
+
+    def load(self) -> None:
+        """Load the database and config up front (raises RequestError if missing)."""
+        with self._lock:
+            self.refresh_state()
+
+    def warm(self) -> None:
+        """Render the latest complete day once, so imports and template compilation
+        are paid before the first request."""
+        started = time.perf_counter()
+        with self._lock:
+            try:
+                latest, _ = self._latest_day()
+            except RequestError:
+                return
+        response = self.handle(f"/day/{latest}")
+        logger.info(f"Warmed up with /day/{latest} ({response.status}) in "
+                    f"{(time.perf_counter() - started) * 1000:.0f}ms")
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def refresh_state(self) -> None:
+        """Reload database/config only when another process changed them on disk."""
+        config_signature = tuple(self._mtime(p) for p in self.mailbox.config_files)
+        if config_signature != self._config_signature:
+            if self._config_signature is not None:
+                logger.info("SLA config changed on disk; reloading")
+                self.refresher.reload_config()
+            self._config_signature = config_signature
+            self._config_hash = hashlib.sha1(json.dumps(
+                [self.generator.sla_config, self.refresher.weekly_config], sort_keys=True, default=str
+            ).encode('utf-8')).hexdigest()
+
+        db_mtime = self._mtime(self.mailbox.database_path)
+        if self.database is None or db_mtime != self._db_mtime:
+            if db_mtime is None:
+                raise RequestError(503, f"Database not found at {self.mailbox.database_path}")
+            self.database = self.generator.load_data()
+            self._db_mtime = db_mtime
+            self._day_fingerprints.clear()
+            logger.info(f"Loaded database with {len(self.database.get('days', {}))} days")
+
+    def day_fingerprint(self, date_str: str) -> str:
+        """Hash of one day's database entry and its fact/series partitions."""
+        fingerprint = self._day_fingerprints.get(date_str)
+        if fingerprint is None:
+            fingerprint = day_fingerprint(self.database.get('days', {}).get(date_str),
+                                          self.generator.fact_store.partition_path(date_str),
+                                          self.generator.series_store.partition_path(date_str))
+            self._day_fingerprints[date_str] = fingerprint
+        return fingerprint
+
+    def fingerprint(self, route: str, dates: List[str]) -> str:
+        digest = hashlib.sha1(f"{route}|{self._config_hash}".encode('utf-8'))
+        for date_str in dates:
+            digest.update(self.day_fingerprint(date_str).encode('ascii'))
+        if route.startswith('day|'):
+            # Daily pages also show the weekday baseline bands
+            digest.update(self.generator.baseline_store.fingerprint(dates[0]).encode('ascii'))
+        return digest.hexdigest()
+
+    # -- routing -----------------------------------------------------------
+
+    def handle(self, target: str, if_none_match: Optional[str] = None) -> Response:
+        """Serve one GET request target (path plus query string)."""
+        parts = urlsplit(target)
+        path = parts.path.rstrip('/') or '/'
+        query = parse_qs(parts.query)
+        try:
+            with self._lock:
+                self.refresh_state()
+                if path == '/':
+                    latest, _ = self._latest_day()
+                    return Response(302, headers={'Location': f"/day/{latest}"})
+                if path == '/api/dates':
+                    return self._json(self._dates())
+                if path == '/api/cache':
+                    return self._json(self.cache.stats())
+                return self._cached(path, query, if_none_match)
+        except RequestError as e:
+            return Response(e.status, body=f"{e}\n".encode('utf-8'))
+        except Exception as e:
+            # A failing render must still answer the client, not drop the connection
+            logger.exception(f"Error serving {target}")
+            return Response(500, body=f"Internal error: {type(e).__name__}: {e}\n".encode('utf-8'))
+
+    def _cached(self, path: str, query: Dict[str, List[str]], if_none_match: Optional[str]) -> Response:
+        kind, start_date, end_date, template = self._route(path, query)
+        dates = [d.isoformat() for d in weekly.daterange(start_date, end_date)]
+        route = f"{kind}|{template}|{dates[0]}|{dates[-1]}"
+        fingerprint = self.fingerprint(route, dates)
+        etag = f'"{fingerprint[:20]}"'
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+            self.cache.not_modified += 1
+            return Response(304, etag=etag)
+
+        cached = self.cache.get(fingerprint)
+        if cached is not None:
+            content_type, body = cached
+            return Response(200, content_type, body, etag, {'Server-Timing': 'cache;desc="hit"'})
+
+        started = time.perf_counter()
+        content_type, body = self._render(kind, start_date, end_date, template)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.cache.put(fingerprint, content_type, body)
+        return Response(200, content_type, body, etag, {'Server-Timing': f'render;dur={elapsed_ms:.1f}'})
+
+    def _route(self, path: str, query: Dict[str, List[str]]) -> Tuple[str, date, date, str]:
+        """(kind, start date, end date, template) for a cacheable path."""
+        api = path.startswith('/api/')
+        segments = path.split('/')[2 if api else 1:]
+        if len(segments) == 2 and segments[0] in ('day', 'week'):
+            kind = segments[0]
+            start_date, end_date = ((parse_day(segments[1]),) * 2) if kind == 'day' else parse_week(segments[1])
+        elif segments == ['range']:
+            kind = 'range'
+            start_date, end_date = parse_range(query)
+        else:
+            raise RequestError(404, f"Not found: {path}")
+
+        template = rendering.WEEKLY_TEMPLATE if kind != 'day' else self.template
+        requested = (query.get('template') or [None])[0]
+        if requested and kind == 'day' and not api:
+            template = rendering.resolve_template_name(requested) if '/' not in requested else requested
+            if template not in self.templates:
+                raise RequestError(404, f"Unknown template {requested!r}")
+        return ('api-' if api else '') + kind, start_date, end_date, template
+
+    # -- rendering ---------------------------------------------------------
+
+    def _render(self, kind: str, start_date: date, end_date: date, template: str) -> Tuple[str, bytes]:
+        if kind in ('day', 'api-day'):
+            date_str = start_date.isoformat()
+            if date_str not in self.database.get('days', {}):
+                raise RequestError(404, f"Date {date_str} not found in database")
+            context = self.generator.generate_dashboard(target_date=date_str, data=self.database)
+            if kind == 'api-day':
+                return self._json_body({key: context.get(key) for key in DAILY_KPI_KEYS})
+            if template == self.template:
+                html = self.generator.render_template(context)
+            else:
+                html = rendering.render(template, context)
+            return 'text/html; charset=utf-8', html.encode('utf-8')
+
+        if kind.startswith('api-'):
+            kpis = weekly.compute_weekly_kpis(self.database, self.refresher.weekly_config, start_date, end_date,
+                                              daily_output_dir=self.mailbox.daily_output_dir)
+            return self._json_body({'from': start_date.isoformat(), 'to': end_date.isoformat(), **kpis})
+
+        context = weekly.build_weekly_context(self.database, self.refresher.weekly_config, start_date, end_date,
+                                              facts=self.refresher.facts,
+                                              daily_output_dir=self.mailbox.daily_output_dir)
+        if kind == 'range':
+            context['week_title'] = (f"{start_date.strftime('%b %d, %Y')} – {end_date.strftime('%b %d, %Y')} "
+                                     f"({(end_date - start_date).days + 1} days)")
+        return 'text/html; charset=utf-8', weekly.render_dashboard_html(context).encode('utf-8')
+
+    def _latest_day(self) -> Tuple[str, Dict[str, Any]]:
+        try:
+            return self.generator.get_latest_complete_day(self.database)
+        except ValueError as e:
+            raise RequestError(404, str(e))
+
+    def _dates(self) -> List[Dict[str, Any]]:
+        days = self.database.get('days', {})
+        return [{
+            'date': date_str,
+            'complete': bool(days[date_str].get('has_email_data') and has_sla(days[date_str])),
+            'sla_derived': bool(days[date_str].get('sla_derived')),
+            'total_emails': (days[date_str].get('daily_summary') or {}).get('total_emails', 0),
+        } for date_str in sorted(days)]
+
+    @staticmethod
+    def _json_body(payload: Any) -> Tuple[str, bytes]:
+        return 'application/json', json.dumps(payload, indent=2, default=str).encode('utf-8')
+
+    def _json(self, payload: Any) -> Response:
+        content_type, body = self._json_body(payload)
+        return Response(200, content_type, body)
+
+
+def make_handler(service: DashboardService):
+    class DashboardRequestHandler(BaseHTTPRequestHandler):
+        server_version = 'EmailDashboard/1.0'
+
+        def do_GET(self):
+            response = service.handle(self.path, self.headers.get('If-None-Match'))
+            self.send_response(response.status)
+            if response.status != 304:
+                self.send_header('Content-Type', response.content_type)
+                self.send_header('Content-Length', str(len(response.body)))
+            if response.etag:
+                self.send_header('ETag', response.etag)
+                self.send_header('Cache-Control', 'no-cache')
+            for name, value in response.headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if response.status != 304:
+                self.wfile.write(response.body)
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return DashboardRequestHandler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve daily, weekly and date-range dashboards on demand.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: %(default)s).")
+    parser.add_argument("--port", type=int, default=8050, help="Port to listen on (default: %(default)s).")
+    parser.add_argument("--mailbox", help="Mailbox to serve (a configured name or 'combined'). Default: the original layout.")
+    parser.add_argument("--template", default=rendering.DAILY_TEMPLATE,
+                        help="Default daily template or theme (default: %(default)s).")
+    parser.add_argument("--cache-size", type=int, default=256, help="Rendered responses kept in memory (default: %(default)s).")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        mailbox = get_mailbox(args.mailbox)
+    except MailboxError as e:
+        parser.error(str(e))
+
+    service = DashboardService(mailbox, template=args.template, cache_size=args.cache_size)
+    try:
+        service.load()
+    except RequestError as e:
+        logger.error(str(e))
+        return 1
+    service.warm()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    logger.info(f"Serving {mailbox.name} dashboards on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Dashboard server stopped")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
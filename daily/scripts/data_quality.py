@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Export Data Quality
+
+Screens canonicalized exports between CSV load and matching, so bad rows
+neither crash a loader nor flow into the KPIs. Every rule is a boolean column
+mask over the whole frame, evaluated in one pass; a row failing any rule is
+removed and written, with all of its reasons, to a quarantine CSV:
+
+    kind     rule                       rejects
+    events   unparseable_timestamp      TimeStamp missing or matching no declared format
+             missing_conversation_id    empty Conversation-Id
+             unknown_event_type         EventType other than Inbox/Replied/Completed
+             response_before_inbox      Replied event of a message earlier than that message's Inbox event
+             conflicting_duplicate      Inbox MessageId seen again with a different time
+    records  unparseable_timestamp      InboxTime missing/unparseable, or EventTime for an answered email
+             missing_conversation_id    empty Conversation-Id
+             unknown_event_type         EventType other than Inbox/Replied/Completed/Pending
+             response_before_inbox      response time earlier than the Inbox time
+             negative_response_time     ResponseTime below zero
+             conflicting_duplicate      MessageId seen again with a different Inbox time
+    sla      unparseable_date           Date missing or not a date
+             hour_out_of_range          Hour missing, fractional or outside 0-23
+             non_numeric_unread         TotalUnread missing, non-numeric or negative
+             conflicting_duplicate      Date + Hour seen again with a different TotalUnread
+
+A conversation may legitimately start with a reply (or with events of an
+earlier export), and Completed events are re-logged many times under one
+MessageId, so only Inbox events are checked for conflicting times and a reply
+is only compared with the Inbox event of the same message. Of conflicting
+event and record duplicates the earliest row is kept; of conflicting unread
+readings the last in file order, the one the hourly merge has always used.
+Exact duplicate rows are not rejected here; the loaders drop them as before.
+
+The quarantine file keeps the export's original columns and header, plus
+`source_row` (line number in the export) and `quarantine_reasons`, so the
+adapters still recognise it: fix the rows by hand and put the file in the
+ingest folder under the export's name (Complete_List_Raw.csv/UnreadCount.csv).
+Only those rows are ingested; the other emails and readings of the days they
+touch are kept from the stored facts and the database. Rejected events were
+never added to the seen-event index, but a fixed Inbox row is matched only with
+the events in its file; to pair it with its reply, fix the row in the export
+itself and drop the whole export again (only the conversations holding the
+fixed rows are re-matched). benchmarks/quarantine_roundtrip.py checks both.
+
+Key Features:
+- One vectorized pass per export: masks, no per-row Python
+- Per-rule counts for the run report (dq_<kind>_<rule>) and the log
+- Quarantine CSVs in data/quarantine/ (data/quarantine/<mailbox>/ for named mailboxes)
+"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from instrumentation import count
+from interning import EVENT_TYPES, STATUSES
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Pre-matched exports name the final state of each email
+RECORD_EVENT_TYPES = tuple(dict.fromkeys(EVENT_TYPES + STATUSES))
+
+RULES = {
+    'events': ('unparseable_timestamp', 'missing_conversation_id', 'unknown_event_type',
+               'response_before_inbox', 'conflicting_duplicate'),
+    'records': ('unparseable_timestamp', 'missing_conversation_id', 'unknown_event_type',
+                'response_before_inbox', 'negative_response_time', 'conflicting_duplicate'),
+    'sla': ('unparseable_date', 'hour_out_of_range', 'non_numeric_unread', 'conflicting_duplicate'),
+}
+
+
+def _blank(values: Any) -> Any:
+    """Missing or whitespace-only."""
+    return values.isna() | (values.astype(str).str.strip() == '')
+
+
+def _conflicting_duplicates(df: Any, keys: list, value: str, keep: str = 'min') -> Any:
+    """Rows whose key repeats with a `value` other than the kept one.
+
+    Per key the row with the lowest value (keep='min') or the last row in file
+    order (keep='last') is kept; exact repeats of the kept value are not conflicts.
+    """
+    conflicting = np.zeros(len(df), dtype=bool)
+    frame = df[keys + [value]].reset_index(drop=True)
+    frame = frame[frame.notna().all(axis=1)]
+    if frame.empty:
+        return conflicting
+    kept = frame.groupby(keys, sort=False)[value].transform(keep)
+    conflicting[frame.index[(frame[value] != kept).to_numpy()]] = True
+    return conflicting
+
+
+def _event_masks(df: Any) -> Dict[str, Any]:
+    event_type = df['EventType'].astype(object)
+    inbox = (event_type == 'Inbox').to_numpy()
+    # A message arrives once; Completed events are re-logged under whatever MessageId
+    arrived = df['TimeStamp'].where(inbox).groupby(df['MessageId'], sort=False).transform('min')
+    conflicting = np.zeros(len(df), dtype=bool)
+    conflicting[inbox] = _conflicting_duplicates(df[inbox], ['MessageId'], 'TimeStamp')
+    return {
+        'unparseable_timestamp': df['TimeStamp'].isna(),
+        'missing_conversation_id': _blank(df['Conversation-Id']),
+        'unknown_event_type': ~event_type.isin(EVENT_TYPES),
+        'response_before_inbox': (event_type == 'Replied') & (df['TimeStamp'] < arrived),
+        'conflicting_duplicate': conflicting,
+    }
+
+
+def _record_masks(df: Any, raw: Any) -> Dict[str, Any]:
+    answered = df['status'].astype(object) != 'Pending'
+    return {
+        'unparseable_timestamp': df['inbox_timestamp'].isna() | (answered & df['response_timestamp'].isna()),
+        'missing_conversation_id': _blank(df['conversation_id']),
+        'unknown_event_type': ~raw['EventType'].isin(RECORD_EVENT_TYPES),
+        'response_before_inbox': df['response_timestamp'] < df['inbox_timestamp'],
+        'negative_response_time': df['response_time_minutes'] < 0,
+        'conflicting_duplicate': _conflicting_duplicates(df, ['inbox_message_id'], 'inbox_timestamp'),
+    }
+
+
+def _sla_masks(df: Any) -> Dict[str, Any]:
+    hour = df['Hour']
+    return {
+        'unparseable_date': df['Date'].isna(),
+        'hour_out_of_range': ~((hour >= 0) & (hour <= 23) & (hour == hour.round())),
+        'non_numeric_unread': ~(df['TotalUnread'] >= 0),
+        'conflicting_duplicate': _conflicting_duplicates(df, ['Date', 'Hour'], 'TotalUnread', keep='last'),
+    }
+
+
+def evaluate(kind: str, df: Any, raw: Optional[Any] = None) -> Dict[str, Any]:
+    """Rule -> boolean mask (aligned with df) for a canonicalized export of `kind`."""
+    if kind == 'events':
+        masks = _event_masks(df)
+    elif kind == 'records':
+        masks = _record_masks(df, raw if raw is not None else df)
+    elif kind == 'sla':
+        masks = _sla_masks(df)
+    else:
+        raise ValueError(f"Unknown export kind '{kind}' (expected one of {', '.join(RULES)})")
+    return {rule: np.asarray(masks[rule], dtype=bool) for rule in RULES[kind]}
+
+
+def quarantine_path(quarantine_dir: Union[str, Path], source: Union[str, Path]) -> Path:
+    """data/quarantine/<export stem>_quarantine_<timestamp>.csv"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return Path(quarantine_dir) / f"{Path(source).stem}_quarantine_{timestamp}.csv"
+
+
+def write_quarantine(raw: Any, masks: Dict[str, Any], rejected: Any, path: Union[str, Path]) -> Path:
+    """Rejected raw rows with their line numbers and '; '-joined reasons."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = raw[rejected].copy()
+    reasons = np.full(len(rows), '', dtype=object)
+    for rule, mask in masks.items():
+        hit = mask[rejected]
+        reasons[hit] = np.where(reasons[hit] == '', rule, reasons[hit] + '; ' + rule)
+    # Header is line 1, so row i of the frame is line i + 2 of the export
+    rows['source_row'] = np.flatnonzero(rejected) + 2
+    rows['quarantine_reasons'] = reasons
+    tmp = path.with_name(path.name + '.tmp')
+    rows.to_csv(tmp, index=False, encoding='utf-8-sig')
+    tmp.replace(path)
+    return path
+
+
+def screen(kind: str, df: Any, raw: Any, source: Union[str, Path],
+           quarantine_dir: Optional[Union[str, Path]] = None) -> Tuple[Any, Dict[str, Any]]:
+    """Drop the rows failing any rule; returns (clean df, summary).
+
+    raw is the export as read (same row order as df); rejected rows are
+    quarantined from it when quarantine_dir is set. The summary holds 'rows',
+    'rejected', per-rule counts under 'rules' and the 'quarantine' path.
+    """
+    masks = evaluate(kind, df, raw)
+    rejected = np.logical_or.reduce(list(masks.values())) if masks else np.zeros(len(df), dtype=bool)
+    summary = {
+        'kind': kind,
+        'source': Path(source).name,
+        'rows': len(df),
+        'rejected': int(rejected.sum()),
+        'rules': {rule: int(mask.sum()) for rule, mask in masks.items()},
+        'quarantine': None,
+    }
+    if not summary['rejected']:
+        return df, summary
+    if quarantine_dir is not None:
+        summary['quarantine'] = str(write_quarantine(raw, masks, rejected, quarantine_path(quarantine_dir, source)))
+    hits = ', '.join(f"{rule} {n}" for rule, n in summary['rules'].items() if n)
+    logger.warning(f"{summary['source']}: quarantined {summary['rejected']} of {summary['rows']} rows ({hits})"
+                   + (f" -> {summary['quarantine']}" if summary['quarantine'] else ""))
+    return df[~rejected], summary
+
+
+def record_counts(summaries: list) -> None:
+    """Run-report counters from screen() summaries: dq_<kind>_rejected and dq_<kind>_<rule>."""
+    totals: Dict[str, int] = {}
+    for summary in summaries:
+        kind = summary['kind']
+        totals[f"dq_{kind}_rejected"] = totals.get(f"dq_{kind}_rejected", 0) + summary['rejected']
+        for rule, n in summary['rules'].items():
+            if n:
+                totals[f"dq_{kind}_{rule}"] = totals.get(f"dq_{kind}_{rule}", 0) + n
+    for name, value in totals.items():
+        count(name, value)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Derived Fields and Config Dependencies
+
+Records which SLA configuration produced each derived value in the database,
+so a config edit only recomputes what it invalidates. Every derived field
+depends on a few config keys:
+
+    field                  depends on
+    sla_met                unread_email_threshold
+    sla_compliance_rate    unread_email_threshold, business_hours.start_hour/end_hour
+    avg_unread_count       business_hours.start_hour/end_hour
+    response_times         business_hours.start_hour/end_hour/business_days
+                           (fact-table business minutes, daily avg/median,
+                           hourly avg_response_time, series response sums)
+
+Each day carries `config_hashes`: field -> short hash of the values of the keys
+it depends on when it was computed. The ingester stamps the fields it computes;
+refresh() recomputes any field whose stamp differs from the current config:
+an unread threshold edit rewrites sla_met and compliance from the stored hourly
+unread counts, and a business-window edit re-times responses from the fact
+table. Days with no stamps are adopted as produced by the current config.
+
+Key Features:
+- Dependency map and hashes also written to metadata.derived_fields
+- Threshold changes never touch response times, and vice versa
+- Response times are recomputed only for days that have a fact partition
+- CLI: report stale fields, or apply the recomputation after a config edit
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+from lazy_imports import lazy_import
+import fact_table
+
+np = lazy_import('numpy')
+
+# Config key -> (path in sla_config.json, default used by the ingester)
+CONFIG_KEYS = {
+    'unread_email_threshold': (('sla_thresholds', 'unread_email_threshold'), 30),
+    'business_hours.start_hour': (('sla_thresholds', 'business_hours', 'start_hour'), 7),
+    'business_hours.end_hour': (('sla_thresholds', 'business_hours', 'end_hour'), 21),
+    'business_hours.business_days': (('sla_thresholds', 'business_hours', 'business_days'), [0, 1, 2, 3, 4, 5, 6]),
+}
+
+DEPENDENCIES = {
+    'sla_met': ('unread_email_threshold',),
+    'sla_compliance_rate': ('unread_email_threshold', 'business_hours.start_hour', 'business_hours.end_hour'),
+    'avg_unread_count': ('business_hours.start_hour', 'business_hours.end_hour'),
+    'response_times': ('business_hours.start_hour', 'business_hours.end_hour', 'business_hours.business_days'),
+}
+
+SLA_FIELDS = ('sla_met', 'sla_compliance_rate', 'avg_unread_count')
+EMAIL_FIELDS = ('response_times',)
+
+
+def config_values(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Resolved value of every tracked config key."""
+    values = {}
+    for key, (path, default) in CONFIG_KEYS.items():
+        node = config or {}
+        for part in path:
+            node = node.get(part) if isinstance(node, dict) else None
+        values[key] = default if node is None else node
+    return values
+
+
+def config_hashes(config: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Field -> 12-hex-digit hash of the config values it depends on."""
+    values = config_values(config)
+    hashes = {}
+    for field, keys in DEPENDENCIES.items():
+        payload = json.dumps({k: values[k] for k in keys}, sort_keys=True)
+        hashes[field] = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+    return hashes
+
+
+def stamp(day: Dict[str, Any], fields: Iterable[str], hashes: Dict[str, str]) -> None:
+    """Record that `fields` of this day were computed under `hashes`."""
+    tags = day.setdefault('config_hashes', {})
+    for field in fields:
+        tags[field] = hashes[field]
+
+
+def stale_fields(day: Dict[str, Any], hashes: Dict[str, str]) -> List[str]:
+    """Fields of this day computed under a different config (unstamped fields are not stale)."""
+    tags = day.get('config_hashes') or {}
+    return [field for field in DEPENDENCIES if field in tags and tags[field] != hashes[field]]
+
+
+def describe(hashes: Dict[str, str]) -> Dict[str, Any]:
+    """The dependency map with current hashes, for metadata.derived_fields."""
+    return {field: {'depends_on': list(keys), 'config_hash': hashes[field]} for field, keys in DEPENDENCIES.items()}
+
+
+class DerivedFieldRefresher:
+    """Recomputes stale derived fields of a database for one config."""
+
+    def __init__(self, config: Optional[Dict[str, Any]], fact_store: Any, series_store: Any = None):
+        self.values = config_values(config)
+        self.hashes = config_hashes(config)
+        self.fact_store = fact_store
+        self.series_store = series_store
+
+    def refresh(self, database: Dict[str, Any], dry_run: bool = False) -> Dict[str, int]:
+        """Bring every day up to the current config; returns days recomputed per field.
+
+        Unstamped days are stamped as-is. 'response_times_skipped' counts days
+        whose response times are stale but have no fact partition.
+        """
+        counts = {field: 0 for field in DEPENDENCIES}
+        counts['response_times_skipped'] = 0
+        for date_str, day in database.get('days', {}).items():
+            adopt = [f for f in self._fields_present(day) if f not in (day.get('config_hashes') or {})]
+            stale = stale_fields(day, self.hashes)
+            if dry_run:
+                for field in stale:
+                    counts[field] += 1
+                continue
+            if adopt:
+                stamp(day, adopt, self.hashes)
+            if set(stale) & set(SLA_FIELDS):
+                self._recompute_sla(day)
+                stamp(day, SLA_FIELDS, self.hashes)
+                for field in SLA_FIELDS:
+                    counts[field] += field in stale
+            if 'response_times' in stale:
+                if self._recompute_response_times(date_str, day):
+                    stamp(day, EMAIL_FIELDS, self.hashes)
+                    counts['response_times'] += 1
+                else:
+                    counts['response_times_skipped'] += 1
+        if not dry_run:
+            database.setdefault('metadata', {})['derived_fields'] = describe(self.hashes)
+        return counts
+
+    @staticmethod
+    def _fields_present(day: Dict[str, Any]) -> List[str]:
+        fields = []
+        if day.get('has_sla_data') or day.get('sla_derived'):
+            fields.extend(SLA_FIELDS)
+        if day.get('has_email_data'):
+            fields.extend(EMAIL_FIELDS)
+        return fields
+
+    def _recompute_sla(self, day: Dict[str, Any]) -> None:
+        """sla_met per hour, then compliance/avg unread over the business window.
+
+        Measured days use their measured hours only (as ingestion does); days
+        whose SLA figures are reconstructed use the reconstructed hours.
+        """
+        threshold = self.values['unread_email_threshold']
+        start, end = self.values['business_hours.start_hour'], self.values['business_hours.end_hour']
+        window = []
+        for entry in day.get('hourly_data', []):
+            if entry.get('unread_count') is None:
+                continue
+            entry['sla_met'] = bool(entry['unread_count'] <= threshold)
+            measured = not entry.get('unread_derived')
+            if start <= entry.get('hour', -1) < end and (measured or not day.get('has_sla_data')):
+                window.append(entry)
+        if window:
+            day.setdefault('daily_summary', {}).update({
+                'sla_compliance_rate': round(sum(e['sla_met'] for e in window) / len(window) * 100, 1),
+                'avg_unread_count': round(sum(e['unread_count'] for e in window) / len(window), 1),
+            })
+
+    def _recompute_response_times(self, date_str: str, day: Dict[str, Any]) -> bool:
+        """Re-time one day's responses from its fact partition; False if it has none."""
+        facts = self.fact_store.read_day(date_str)
+        if facts is None:
+            return False
+        facts['business_minutes'] = fact_table.business_minutes(
+            facts['inbox_ts'], facts['response_ts'], self.values['business_hours.start_hour'],
+            self.values['business_hours.end_hour'], self.values['business_hours.business_days'])
+        self.fact_store.write_day(date_str, facts)
+
+        minutes = facts['business_minutes']
+        answered = ~np.isnan(minutes)
+        # Rounded as numpy floats (half to even), exactly like the ingester's merge
+        day.setdefault('daily_summary', {}).update({
+            'avg_response_time_minutes': round(minutes[answered].mean(), 1) if answered.any() else None,
+            'median_response_time_minutes': round(np.median(minutes[answered]), 1) if answered.any() else None,
+        })
+        hours = fact_table.inbox_hours(facts)
+        sums = np.bincount(hours[answered], weights=minutes[answered], minlength=24)
+        responses = np.bincount(hours[answered], minlength=24)
+        for entry in day.get('hourly_data', []):
+            hour = entry.get('hour')
+            if 'avg_response_time' in entry and hour is not None:
+                entry['avg_response_time'] = round(float(sums[hour] / responses[hour]), 1) if responses[hour] else None
+
+        if self.series_store is not None:
+            self._recompute_series(date_str, facts)
+        return True
+
+    def _recompute_series(self, date_str: str, facts: Dict[str, Any]) -> None:
+        # Imported here: only needed when a business-window edit meets stored series
+        from time_series import aggregate
+        series = self.series_store.read_day(date_str)
+        if series is None:
+            return
+        resolution = series.pop('resolution')
+        _, _, sums = aggregate(facts['inbox_ts'], facts['status'] == fact_table.STATUS_CODES['Replied'],
+                               facts['business_minutes'], resolution)
+        series['response_sum'] = sums['response_sum'][0]
+        series['responses'] = sums['responses'][0]
+        self.series_store.write_day(date_str, series, resolution)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from mailboxes import MailboxError, get_mailbox
+    from time_series import series_store_for
+
+    parser = argparse.ArgumentParser(description="Recompute derived fields invalidated by SLA config edits.")
+    parser.add_argument("--mailbox", help="Mailbox to refresh (default: the original layout).")
+    parser.add_argument("--dry-run", action="store_true", help="Only report stale fields.")
+    args = parser.parse_args(argv)
+
+    try:
+        mailbox = get_mailbox(args.mailbox)
+    except MailboxError as e:
+        parser.error(str(e))
+    with open(mailbox.database_path, 'r') as f:
+        database = json.load(f)
+    refresher = DerivedFieldRefresher(mailbox.load_config(), fact_table.fact_store_for(mailbox.database_path),
+                                      series_store_for(mailbox.database_path))
+
+    print("Dependency map (field: config keys -> current hash)")
+    for field, keys in DEPENDENCIES.items():
+        print(f"  {field:<22} {', '.join(keys)} -> {refresher.hashes[field]}")
+    counts = refresher.refresh(database, dry_run=args.dry_run)
+    verb = "stale" if args.dry_run else "recomputed"
+    print(', '.join(f"{field}: {n} days {verb}" for field, n in counts.items() if field in DEPENDENCIES))
+    if counts['response_times_skipped']:
+        print(f"  {counts['response_times_skipped']} days have stale response times but no fact partition "
+              f"(re-ingest their exports to re-time them)")
+    if not args.dry_run:
+        with open(mailbox.database_path, 'w') as f:
+            f.write(json.dumps(database, indent=2, default=str))
+        print(f"Updated {mailbox.database_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,36 +12,66 @@ Features:
 - Daily SLA compliance rate calculations (≤30 emails = SLA MET)
 - Multi-day unified JSON database with both email and SLA metrics
 - Dashboard-ready data structure for KPI generation
+- Rows failing data-quality rules are quarantined to data/quarantine/ (see data_quality.py)
+- Written fact days are folded into the persistent conversation state (see conversation_state.py)
 
 Business Hours: Configurable via config/sla_config.json (default 7:00 AM – 9:00 PM, Monday–Sunday)
 SLA Threshold: 30 unread emails
 """
 
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import logging
 import json
 import os
 import re
+import argparse
 from pathlib import Path
 
+from instrumentation import stage, timed, count, start_run, finish_run, profiled
+from lazy_imports import lazy_import
+from fact_table import fact_store_for
+from conversation_state import conversation_state_for
+from source_adapters import open_export, EVENT_COLUMNS
+from data_quality import screen, record_counts
+from interning import (DictionaryStore, dictionary_store_for, intern_columns, as_categorical,
+                       EVENT_INTERNED, RECORD_INTERNED, EVENT_TYPES, STATUSES, MISSING)
+
+# pandas is imported on first use so importing this module stays cheap
+pd = lazy_import('pandas')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Canonical pre-matched record columns -> this classifier's result columns
+PREMATCHED_TO_RESULT = {
+    'conversation_id': 'Conversation-Id',
+    'inbox_timestamp': 'Inbox_TimeStamp',
+    'inbox_subject': 'Inbox_Subject',
+    'inbox_emails': 'Inbox_Emails',
+    'inbox_message_id': 'Inbox_MessageId',
+    'status': 'Status',
+    'response_timestamp': 'Response_TimeStamp',
+    'response_time_minutes': 'Response_Time_Business_Minutes',
+}
+
 class EmailClassifier:
     """Main class for processing and classifying email data."""
     
-    def __init__(self, csv_file_path='../../data/Complete_List_Raw.csv', sla_file_path='../../data/UnreadCount.csv', sla_config_path='../../config/sla_config.json'):
+    def __init__(self, csv_file_path='../../data/Complete_List_Raw.csv', sla_file_path='../../data/UnreadCount.csv', sla_config_path='../../config/sla_config.json',
+                 quarantine_dir='../../data/quarantine'):
         """Initialize the classifier with data file paths."""
         self.csv_file_path = self._resolve_relative_to_script(csv_file_path)
         self.sla_file_path = self._resolve_relative_to_script(sla_file_path)
         self.sla_config_path = self._resolve_relative_to_script(sla_config_path)
+        self.quarantine_dir = self._resolve_relative_to_script(quarantine_dir)
         self.df = None
+        self.prematched_df = None  # rows from pre-matched exports (Reserve.csv style), result schema
         self.sla_df = None
+        self._sla_by_date = None  # date -> SLA rows, built on first process_sla_hourly_data call
         self.sla_config = None
         self.loaded_event_files = []  # names of event CSVs successfully loaded
+        self.dictionaries = DictionaryStore()  # run() switches to the store next to the database
         
         # Load SLA configuration
         self.load_sla_config()
@@ -82,6 +112,7 @@ class EmailClassifier:
             }
             logger.warning("Using fallback SLA configuration")
         
+    @timed()
     def load_data(self):
         """Load and preprocess email event CSV data. Supports multiple daily files (MM-DD-YY.csv)."""
         logger.info(f"Loading data from {self.csv_file_path}")
@@ -105,34 +136,62 @@ class EmailClassifier:
             
             frames = []
             self.loaded_event_files = []
-            for fp in files_to_load:
-                try:
-                    df_part = pd.read_csv(fp)
-                    frames.append(df_part)
-                    logger.info(f"Loaded {len(df_part)} records from {fp.name}")
-                    self.loaded_event_files.append(fp.name)
-                except Exception as fe:
-                    logger.warning(f"Skipping file {fp} due to read error: {fe}")
+            with stage('load_csv'):
+                for fp in files_to_load:
+                    try:
+                        # The header decides the shape: event log or pre-matched records
+                        adapter, df_part = open_export(fp, kind='events')
+                        frames.append((adapter, df_part, fp))
+                        logger.info(f"Loaded {len(df_part)} records from {fp.name}")
+                        self.loaded_event_files.append(fp.name)
+                    except Exception as fe:
+                        logger.warning(f"Skipping file {fp} due to read error: {fe}")
+                
+                if not frames:
+                    raise RuntimeError("No CSV files could be loaded successfully.")
+            
+            # Convert timestamps to datetime while mapping each file to the canonical schema
+            with stage('normalize_dates'):
+                canonical = [(a, a.canonicalize(f), f, fp) for a, f, fp in frames]
             
-            if not frames:
-                raise RuntimeError("No CSV files could be loaded successfully.")
+            # Each file's rows failing a data-quality rule are quarantined before matching
+            with stage('data_quality'):
+                screened = [(a,) + screen(a.kind, df_part, f, fp, self.quarantine_dir) for a, df_part, f, fp in canonical]
+            record_counts([quality for _, _, quality in screened])
+            event_frames = [df_part for a, df_part, _ in screened if a.kind == 'events']
+            record_frames = [df_part for a, df_part, _ in screened if a.kind == 'records']
+            self.df = (pd.concat(event_frames, ignore_index=True) if event_frames
+                       else pd.DataFrame({c: pd.Series(dtype='datetime64[ns]' if c == 'TimeStamp' else object)
+                                          for c in EVENT_COLUMNS}))
+            self.prematched_df = pd.concat(record_frames, ignore_index=True) if record_frames else None
             
-            self.df = pd.concat(frames, ignore_index=True)
-            logger.info(f"Total loaded records across files: {len(self.df)} (from {len(frames)} files)")
+            # Long identifiers -> int codes, EventType/Status -> categoricals
+            with stage('intern'):
+                self.df = intern_columns(self.df, self.dictionaries, EVENT_INTERNED)
+                self.df['EventType'] = as_categorical(self.df['EventType'], EVENT_TYPES)
+                if self.prematched_df is not None:
+                    self.prematched_df = intern_columns(self.prematched_df, self.dictionaries, RECORD_INTERNED)
+                    self.prematched_df['status'] = as_categorical(self.prematched_df['status'], STATUSES)
+                    self.prematched_df = self.prematched_df.rename(columns=PREMATCHED_TO_RESULT)
+            logger.info(f"Total loaded records across files: {len(self.df)} events"
+                        f"{f', {len(self.prematched_df)} pre-matched' if self.prematched_df is not None else ''}"
+                        f" (from {len(frames)} files)")
+            count('email_event_rows', len(self.df))
+            if self.prematched_df is not None:
+                count('prematched_records', len(self.prematched_df))
 
             # Deduplicate events to prevent double-counting across overlapping files
             if all(col in self.df.columns for col in ['Conversation-Id', 'TimeStamp', 'EventType', 'MessageId']):
-                before = len(self.df)
-                self.df = self.df.drop_duplicates(subset=['Conversation-Id', 'TimeStamp', 'EventType', 'MessageId'], keep='first')
-                after = len(self.df)
+                with stage('dedup'):
+                    before = len(self.df)
+                    self.df = self.df.drop_duplicates(subset=['Conversation-Id', 'TimeStamp', 'EventType', 'MessageId'], keep='first')
+                    after = len(self.df)
                 if after != before:
                     logger.info(f"Deduplicated events: removed {before - after} duplicate rows")
             
-            # Convert timestamp to datetime
-            self.df['TimeStamp'] = pd.to_datetime(self.df['TimeStamp'])
-            
             # Sort by conversation ID and timestamp for easier processing
-            self.df = self.df.sort_values(['Conversation-Id', 'TimeStamp'])
+            with stage('sort'):
+                self.df = self.df.sort_values(['Conversation-Id', 'TimeStamp'])
             
             logger.info("Data preprocessing completed")
             
@@ -203,15 +262,44 @@ class EmailClassifier:
         # No matching event found
         return None, 'Pending'
     
+    @timed()
     def process_conversations(self):
         """Process all conversations and classify emails."""
         logger.info("Processing conversations and matching events...")
         
+        with stage('match_events'):
+            results = self._match_conversations()
+        
+        # Calculate response times for emails with a matching event
+        with stage('business_minutes'):
+            for result in results:
+                if result['Response_TimeStamp'] is not None:
+                    result['Response_Time_Business_Minutes'] = self.calculate_business_minutes(
+                        result['Inbox_TimeStamp'],
+                        result['Response_TimeStamp']
+                    )
+        
+        results_df = pd.DataFrame(results)
+        if not results_df.empty:
+            results_df['Status'] = as_categorical(results_df['Status'], STATUSES)
+            for column in ('Conversation-Id', 'Inbox_Emails', 'Inbox_MessageId', 'Response_MessageId'):
+                results_df[column] = results_df[column].fillna(MISSING).astype('int32')
+        if self.prematched_df is not None:
+            # Pre-matched exports already carry status and response minutes
+            results_df = pd.concat([results_df, self.prematched_df], ignore_index=True)
+        
+        logger.info(f"Processed {len(results_df)} inbox emails")
+        count('inbox_emails', len(results_df))
+        return results_df
+    
+    def _match_conversations(self):
+        """Pair every Inbox email with its matching event; response times are filled in by the caller."""
         results = []
         
         # Group by conversation ID
         conversations = self.df.groupby('Conversation-Id')
         total_conversations = len(conversations)
+        count('conversations', total_conversations)
         
         for conv_idx, (conv_id, conv_events) in enumerate(conversations):
             if conv_idx % 50 == 0:
@@ -224,14 +312,6 @@ class EmailClassifier:
                 # Find matching event
                 match_event, status = self.find_matching_event(inbox_email, conv_events)
                 
-                # Calculate response time if match found
-                response_time_minutes = None
-                if match_event is not None:
-                    response_time_minutes = self.calculate_business_minutes(
-                        inbox_email['TimeStamp'], 
-                        match_event['TimeStamp']
-                    )
-                
                 # Create result record
                 result = {
                     'Conversation-Id': conv_id,
@@ -242,14 +322,13 @@ class EmailClassifier:
                     'Status': status,
                     'Response_TimeStamp': match_event['TimeStamp'] if match_event is not None else None,
                     'Response_Subject': match_event['Subject'] if match_event is not None else None,
-                    'Response_MessageId': match_event['MessageId'] if match_event is not None else None,
-                    'Response_Time_Business_Minutes': response_time_minutes
+                    'Response_MessageId': match_event['MessageId'] if match_event is not None else MISSING,
+                    'Response_Time_Business_Minutes': None
                 }
                 
                 results.append(result)
         
-        logger.info(f"Processed {len(results)} inbox emails")
-        return pd.DataFrame(results)
+        return results
     
     def generate_summary_stats(self, results_df):
         """Generate summary statistics for the classification results."""
@@ -277,6 +356,14 @@ class EmailClassifier:
         
         return summary
     
+    def _inbox_events(self):
+        """Inbox emails (TimeStamp column) from the event log plus any pre-matched records."""
+        inbox = self.df.loc[self.df['EventType'] == 'Inbox', ['TimeStamp']]
+        if self.prematched_df is not None:
+            inbox = pd.concat([inbox, self.prematched_df[['Inbox_TimeStamp']].rename(columns={'Inbox_TimeStamp': 'TimeStamp'})],
+                              ignore_index=True)
+        return inbox.copy()
+    
     def analyze_hourly_distribution(self):
         """Analyze email distribution by hour of the day (0-23)."""
         logger.info("Analyzing hourly email distribution...")
@@ -286,7 +373,7 @@ class EmailClassifier:
             return None
             
         # Filter only Inbox emails
-        inbox_emails = self.df[self.df['EventType'] == 'Inbox'].copy()
+        inbox_emails = self._inbox_events()
         
         # Extract hour from timestamp
         inbox_emails['Hour'] = inbox_emails['TimeStamp'].dt.hour
@@ -363,28 +450,35 @@ class EmailClassifier:
         if not hourly_response_stats.empty:
             fastest_hour = hourly_response_stats.loc[hourly_response_stats['Avg_Response_Time_Minutes'].idxmin()]
             slowest_hour = hourly_response_stats.loc[hourly_response_stats['Avg_Response_Time_Minutes'].idxmax()]
+    @timed()
     def load_sla_data(self):
         """Load and preprocess the SLA data from UnreadCount.csv."""
         logger.info(f"Loading SLA data from {self.sla_file_path}")
         
         try:
-            self.sla_df = pd.read_csv(self.sla_file_path)
-            logger.info(f"Loaded {len(self.sla_df)} SLA records")
+            with stage('load_csv'):
+                adapter, raw = open_export(self.sla_file_path, kind='sla')
+            logger.info(f"Loaded {len(raw)} SLA records")
+            count('sla_rows', len(raw))
             
-            # Convert date to datetime
-            self.sla_df['Date'] = pd.to_datetime(self.sla_df['Date'])
+            # Canonical columns (Date, Hour, TotalUnread, Title) with parsed dates and numeric hour/unread
+            with stage('normalize_dates'):
+                self.sla_df = adapter.canonicalize(raw)
             
-            # Convert Hour to integer
-            self.sla_df['Hour of the Day'] = pd.to_numeric(self.sla_df['Hour of the Day'])
+            with stage('data_quality'):
+                self.sla_df, quality = screen(adapter.kind, self.sla_df, raw, self.sla_file_path, self.quarantine_dir)
+            record_counts([quality])
             
-            # Convert TotalUnread to integer
-            self.sla_df['TotalUnread'] = pd.to_numeric(self.sla_df['TotalUnread'])
-            
-            # Add SLA status as boolean (True = SLA MET, False = SLA NOT MET)
-            self.sla_df['SLA_Met'] = self.sla_df['Title'] == 'SLA MET'
+            # Add SLA status as boolean (True = SLA MET, False = SLA NOT MET);
+            # exports without a Title column are judged against the unread threshold
+            if self.sla_df['Title'].notna().any():
+                self.sla_df['SLA_Met'] = self.sla_df['Title'] == 'SLA MET'
+            else:
+                self.sla_df['SLA_Met'] = self.sla_df['TotalUnread'] <= self.unread_threshold
             
             # Sort by date and hour
-            self.sla_df = self.sla_df.sort_values(['Date', 'Hour of the Day'])
+            self.sla_df = self.sla_df.sort_values(['Date', 'Hour'])
+            self._sla_by_date = None
             
             logger.info("SLA data preprocessing completed")
             
@@ -400,13 +494,16 @@ class EmailClassifier:
             target = pd.to_datetime(date_str).date()
         except Exception:
             return None
-        df_day = self.sla_df[pd.to_datetime(self.sla_df['Date']).dt.date == target]
-        if df_day.empty:
+        # Dates are parsed once in load_sla_data; split the frame by day once, not per call
+        if self._sla_by_date is None:
+            self._sla_by_date = {d: g for d, g in self.sla_df.groupby(self.sla_df['Date'].dt.date)}
+        df_day = self._sla_by_date.get(target)
+        if df_day is None or df_day.empty:
             return {}
         hourly = {}
         for _, row in df_day.iterrows():
             try:
-                h = int(row['Hour of the Day'])
+                h = int(row['Hour'])
             except Exception:
                 continue
             unread = int(row['TotalUnread']) if 'TotalUnread' in df_day.columns and not pd.isna(row['TotalUnread']) else None
@@ -418,6 +515,7 @@ class EmailClassifier:
             }
         return hourly
 
+    @timed('sla_rates')
     def calculate_daily_sla_rates(self):
         """Calculate per-day SLA compliance rate (%) and average unread count within business hours/days."""
         if self.sla_df is None or self.sla_df.empty:
@@ -426,11 +524,11 @@ class EmailClassifier:
         df = self.sla_df.copy()
         # Normalize types
         df['Date'] = pd.to_datetime(df['Date'])
-        df['Hour of the Day'] = pd.to_numeric(df['Hour of the Day'], errors='coerce')
+        df['Hour'] = pd.to_numeric(df['Hour'], errors='coerce')
         df['TotalUnread'] = pd.to_numeric(df['TotalUnread'], errors='coerce')
         # Filter to configured business hours
         start_h, end_h = self.business_start_hour, self.business_end_hour
-        df = df[(df['Hour of the Day'] >= start_h) & (df['Hour of the Day'] <= end_h)]
+        df = df[(df['Hour'] >= start_h) & (df['Hour'] <= end_h)]
         # Filter to configured business days of week
         df['weekday'] = df['Date'].dt.weekday
         df = df[df['weekday'].isin(self.business_days)]
@@ -488,14 +586,14 @@ class EmailClassifier:
 
     def analyze_hourly_distribution_for_date(self, date_str):
         """Count inbox emails per hour for a specific date; returns DataFrame with Hour and Email_Count."""
-        if self.df is None or self.df.empty:
+        if self.df is None:
             return None
         try:
             target = pd.to_datetime(date_str).date()
         except Exception:
             return None
-        df_inbox = self.df[self.df['EventType'] == 'Inbox'].copy()
-        df_inbox = df_inbox[pd.to_datetime(df_inbox['TimeStamp']).dt.date == target]
+        df_inbox = self._inbox_events()
+        df_inbox = df_inbox[df_inbox['TimeStamp'].dt.date == target]
         if df_inbox.empty:
             # Still return a 24-hour frame with zeros for consistency
             return pd.DataFrame({'Hour': range(24), 'Email_Count': [0]*24})
@@ -527,6 +625,7 @@ class EmailClassifier:
         # Keep Avg_Response_Time_Minutes as float with NaNs (will be interpreted as None in JSON mapping step)
         return merged
 
+    @timed()
     def save_to_unified_json(self, results_df, summary_stats, hourly_distribution, hourly_response_times, 
                             daily_sla_rates, json_file='../../email_database.json'):
         """Save data to unified multi-day JSON database with both email and SLA data (idempotent merge)."""
@@ -593,50 +692,51 @@ class EmailClassifier:
                 }) for h in range(24)]
             return days[date_str]
 
-        # Merge SLA days
-        if daily_sla_rates is not None and not daily_sla_rates.empty:
-            for _, drow in daily_sla_rates.iterrows():
-                dstr = drow['date'].strftime('%Y-%m-%d')
-                day = ensure_day(dstr)
-                day["has_sla_data"] = True
-                day["daily_summary"]["sla_compliance_rate"] = drow['SLA_Compliance_Rate']
-                day["daily_summary"]["avg_unread_count"] = drow['Avg_Unread_Count']
-                hourly_sla = self.process_sla_hourly_data(dstr) or {}
-                for h in range(24):
-                    s = hourly_sla.get(h, {})
-                    day["hourly_data"][h]["unread_count"] = s.get('unread_count')
-                    day["hourly_data"][h]["sla_met"] = s.get('sla_met')
-
-        # Merge Email days
-        if results_df is not None and not results_df.empty:
-            for dstr in self.get_email_dates(results_df):
-                day = ensure_day(dstr)
-                day["has_email_data"] = True
-                # summaries
-                dsum = self.generate_summary_stats_for_date(results_df, dstr)
-                if dsum:
-                    day["daily_summary"].update({
-                        "total_emails": dsum['Total_Inbox_Emails'],
-                        "reply_rate_percent": dsum['Reply_Rate_Percent'],
-                        "avg_response_time_minutes": dsum['Avg_Response_Time_Minutes'],
-                        "median_response_time_minutes": dsum['Median_Response_Time_Minutes']
-                    })
-                # hourly
-                dist = self.analyze_hourly_distribution_for_date(dstr)
-                resp = self.analyze_response_time_by_hour_for_date(results_df, dstr)
-                dist_map = {int(r['Hour']): int(r.get('Email_Count', 0)) for r in (dist.to_dict('records') if dist is not None else [])}
-                resp_map = {int(r['Hour']): {'count': int(r.get('Email_Count', 0)), 'avg': r.get('Avg_Response_Time_Minutes')} for r in (resp.to_dict('records') if resp is not None else [])}
-                for h in range(24):
-                    day["hourly_data"][h]["emails_received"] = dist_map.get(h, 0)
-                    rinfo = resp_map.get(h)
-                    day["hourly_data"][h]["emails_replied"] = rinfo['count'] if rinfo else 0
-                    avg_val = rinfo.get('avg') if rinfo else None
-                    # Normalize NaN to None for JSON safety
-                    if avg_val is not None and not pd.isna(avg_val):
-                        avg_rt = float(avg_val)
-                    else:
-                        avg_rt = None
-                    day["hourly_data"][h]["avg_response_time"] = avg_rt
+        with stage('merge'):
+            # Merge SLA days
+            if daily_sla_rates is not None and not daily_sla_rates.empty:
+                for _, drow in daily_sla_rates.iterrows():
+                    dstr = drow['date'].strftime('%Y-%m-%d')
+                    day = ensure_day(dstr)
+                    day["has_sla_data"] = True
+                    day["daily_summary"]["sla_compliance_rate"] = drow['SLA_Compliance_Rate']
+                    day["daily_summary"]["avg_unread_count"] = drow['Avg_Unread_Count']
+                    hourly_sla = self.process_sla_hourly_data(dstr) or {}
+                    for h in range(24):
+                        s = hourly_sla.get(h, {})
+                        day["hourly_data"][h]["unread_count"] = s.get('unread_count')
+                        day["hourly_data"][h]["sla_met"] = s.get('sla_met')
+
+            # Merge Email days
+            if results_df is not None and not results_df.empty:
+                for dstr in self.get_email_dates(results_df):
+                    day = ensure_day(dstr)
+                    day["has_email_data"] = True
+                    # summaries
+                    dsum = self.generate_summary_stats_for_date(results_df, dstr)
+                    if dsum:
+                        day["daily_summary"].update({
+                            "total_emails": dsum['Total_Inbox_Emails'],
+                            "reply_rate_percent": dsum['Reply_Rate_Percent'],
+                            "avg_response_time_minutes": dsum['Avg_Response_Time_Minutes'],
+                            "median_response_time_minutes": dsum['Median_Response_Time_Minutes']
+                        })
+                    # hourly
+                    dist = self.analyze_hourly_distribution_for_date(dstr)
+                    resp = self.analyze_response_time_by_hour_for_date(results_df, dstr)
+                    dist_map = {int(r['Hour']): int(r.get('Email_Count', 0)) for r in (dist.to_dict('records') if dist is not None else [])}
+                    resp_map = {int(r['Hour']): {'count': int(r.get('Email_Count', 0)), 'avg': r.get('Avg_Response_Time_Minutes')} for r in (resp.to_dict('records') if resp is not None else [])}
+                    for h in range(24):
+                        day["hourly_data"][h]["emails_received"] = dist_map.get(h, 0)
+                        rinfo = resp_map.get(h)
+                        day["hourly_data"][h]["emails_replied"] = rinfo['count'] if rinfo else 0
+                        avg_val = rinfo.get('avg') if rinfo else None
+                        # Normalize NaN to None for JSON safety
+                        if avg_val is not None and not pd.isna(avg_val):
+                            avg_rt = float(avg_val)
+                        else:
+                            avg_rt = None
+                        day["hourly_data"][h]["avg_response_time"] = avg_rt
 
         # Metadata
         all_dates = sorted(days.keys())
@@ -654,10 +754,25 @@ class EmailClassifier:
             "days": days
         }
 
-        with open(json_path, 'w') as f:
-            json.dump(database, f, indent=2, default=str)
+        with stage('serialize'):
+            payload = json.dumps(database, indent=2, default=str)
+        with stage('write'):
+            with open(json_path, 'w') as f:
+                f.write(payload)
 
         logger.info(f"Unified database saved to {json_file}")
+
+        # Per-email facts next to the database (exact dashboard percentiles)
+        fact_store = fact_store_for(json_path)
+        with stage('write_facts'):
+            fact_days = fact_store.write_frame(
+                results_df, conversation='Conversation-Id', inbox='Inbox_TimeStamp',
+                response='Response_TimeStamp', status='Status', minutes='Response_Time_Business_Minutes',
+                conversation_dictionary=self.dictionaries['conversation_id'])
+            self.dictionaries.save()
+        count('fact_partitions', len(fact_days))
+        with stage('conversation_state'):
+            count('conversation_state_days', conversation_state_for(json_path).update(fact_store, fact_days))
         logger.info(f"Database contains {len(days)} days from {earliest_date} to {latest_date}")
 
         if summary_stats:
@@ -673,10 +788,13 @@ class EmailClassifier:
                 pass
             logger.info(f"SLA data days: {len(daily_sla_rates) if daily_sla_rates is not None else 0}")
     
-    def run(self):
+    def run(self, json_file='../../email_database.json'):
         """Execute the complete email classification process."""
         logger.info("Starting email classification process...")
         
+        # Identifier dictionaries persist next to the database they describe
+        self.dictionaries = dictionary_store_for(self._resolve_relative_to_script(json_file))
+        
         # Load and preprocess data
         self.load_data()
         
@@ -697,7 +815,8 @@ class EmailClassifier:
         daily_sla_rates = self.calculate_daily_sla_rates()
         
         # Save all data to unified multi-day JSON database
-        self.save_to_unified_json(results_df, summary_stats, hourly_distribution, hourly_response_times, daily_sla_rates)
+        self.save_to_unified_json(results_df, summary_stats, hourly_distribution, hourly_response_times, daily_sla_rates,
+                                  json_file=json_file)
         
         logger.info("Email classification process completed successfully!")
         
@@ -706,8 +825,16 @@ class EmailClassifier:
 
 def main():
     """Main function to run the email classifier."""
-    classifier = EmailClassifier()
-    results, summary, hourly_dist, hourly_response = classifier.run()
+    parser = argparse.ArgumentParser(description="Classify email events and update the unified JSON database.")
+    parser.add_argument("--profile", action="store_true", help="Dump cProfile stats for the run to data/runs/.")
+    parser.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peaks per stage (slower).")
+    args = parser.parse_args()
+
+    start_run('classifier', trace_memory=args.trace_memory)
+    with profiled(args.profile, 'classifier'):
+        classifier = EmailClassifier()
+        results, summary, hourly_dist, hourly_response = classifier.run()
+    finish_run(emit=logger.info)
     return results, summary, hourly_dist, hourly_response
 
 
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Per-Email Fact Table
+
+Columnar store of matched email records, one row per Inbox event, written by
+the ingester and the classifier next to the JSON database they update
+(database/email_database_facts/ for email_database.json). Each day is its own
+partition, <db>_facts/YYYY-MM/YYYY-MM-DD.npz, holding parallel NumPy arrays:
+
+    conversation      int64           stable code for the Conversation-Id
+    inbox_ts          datetime64[s]   Inbox event time
+    response_ts       datetime64[s]   matched Replied/Completed time (NaT if pending)
+    status            int8            0=Pending, 1=Replied, 2=Completed
+    business_minutes  float64         business-hours response time (NaN if pending)
+
+The JSON database keeps only hourly averages; dashboards read these partitions
+to compute exact response-time percentiles and medians. A week reads seven
+partitions, a day one. Days ingested before the fact table existed have no
+partition and callers fall back to the hourly approximation.
+"""
+
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from lazy_imports import lazy_import
+
+hashlib = lazy_import('hashlib')
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+COLUMNS = ('conversation', 'inbox_ts', 'response_ts', 'status', 'business_minutes')
+STATUS_CODES = {'Pending': 0, 'Replied': 1, 'Completed': 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+DayKey = Union[str, date]
+
+
+def conversation_code(conversation_id: str) -> int:
+    """Stable signed 64-bit code for a Conversation-Id (same value in every process)."""
+    digest = hashlib.blake2b(str(conversation_id).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def conversation_codes(values: Any, dictionary: Any = None) -> Any:
+    """conversation_code() for a whole column, hashing each distinct id once.
+
+    If `values` holds interned codes, pass the interning.StringDictionary that decodes them.
+    """
+    series = pd.Series(values)
+    uniques = series.unique()
+    names = dictionary.decode(uniques) if dictionary is not None else uniques
+    codes = {u: conversation_code(name) for u, name in zip(uniques, names)}
+    return series.map(codes).to_numpy(dtype=np.int64)
+
+
+def fact_store_for(database_path: Union[str, Path]) -> 'EmailFactStore':
+    """Return the fact store that sits next to a JSON database file."""
+    path = Path(database_path).resolve()
+    return EmailFactStore(path.with_name(f"{path.stem}_facts"))
+
+
+def inbox_hours(facts: Dict[str, Any]) -> Any:
+    """Hour of day (0–23) of each row's Inbox timestamp."""
+    ts = facts['inbox_ts']
+    return ((ts - ts.astype('datetime64[D]')) // np.timedelta64(1, 'h')).astype(np.int8)
+
+
+def response_minutes(facts: Optional[Dict[str, Any]], start_hour: int = 0, end_hour: int = 24) -> Any:
+    """Business-minute response times of answered rows whose Inbox hour is in [start_hour, end_hour)."""
+    if facts is None or len(facts['business_minutes']) == 0:
+        return np.empty(0, dtype=np.float64)
+    minutes = facts['business_minutes']
+    hours = inbox_hours(facts)
+    mask = (facts['status'] != STATUS_CODES['Pending']) & ~np.isnan(minutes) & (hours >= start_hour) & (hours < end_hour)
+    return minutes[mask]
+
+
+def business_minutes(inbox_ts: Any, response_ts: Any, start_hour: int, end_hour: int,
+                     business_days: Iterable[int]) -> Any:
+    """Business minutes from each Inbox time to its response time (NaN if unanswered).
+
+    Vectorized equivalent of IntelligentIngester.calculate_business_minutes: a
+    cumulative business-minute clock over calendar days, read at both ends.
+    """
+    result = np.full(len(inbox_ts), np.nan)
+    done = ~np.isnat(response_ts)
+    if not done.any():
+        return result
+    start, end = inbox_ts[done], response_ts[done]
+    origin = min(start.min(), end.min()).astype('datetime64[D]')
+    horizon = max(start.max(), end.max()).astype('datetime64[D]') + 1
+
+    # Business minutes per calendar day and their running total (minutes before each day)
+    calendar = np.arange(origin, horizon + 1, dtype='datetime64[D]')
+    weekdays = (calendar.astype(np.int64) - 4) % 7  # 1970-01-01 was a Thursday
+    is_business = np.isin(weekdays, list(business_days))
+    per_day = np.where(is_business, (end_hour - start_hour) * 60.0, 0.0)
+    before = np.concatenate([[0.0], np.cumsum(per_day)])
+
+    def clock(ts):
+        day = ts.astype('datetime64[D]')
+        index = (day - origin).astype(np.int64)
+        minute = (ts - day).astype('timedelta64[s]').astype(np.float64) / 60
+        inside = np.clip(minute, start_hour * 60, end_hour * 60) - start_hour * 60
+        return before[index] + np.where(is_business[index], inside, 0.0)
+
+    minutes = np.where(end > start, clock(end) - clock(start), 0.0)
+    result[done] = np.round(minutes, 2)
+    return result
+
+
+class EmailFactStore:
+    """Day-partitioned columnar store of per-email facts."""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def partition_path(self, day: DayKey) -> Path:
+        day_str = day.isoformat() if isinstance(day, date) else str(day)
+        return self.root / day_str[:7] / f"{day_str}.npz"
+
+    def has_day(self, day: DayKey) -> bool:
+        return self.partition_path(day).exists()
+
+    def days(self) -> List[str]:
+        """All partition dates (YYYY-MM-DD), sorted."""
+        if not self.root.exists():
+            return []
+        return sorted(p.stem for p in self.root.glob('*/*.npz'))
+
+    def read_day(self, day: DayKey) -> Optional[Dict[str, Any]]:
+        """Load one day's columns, or None if the day has no partition."""
+        path = self.partition_path(day)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return {name: data[name] for name in COLUMNS}
+
+    def read_days(self, days: Iterable[DayKey]) -> Dict[str, Any]:
+        """Concatenate the partitions of the given days (missing days are skipped)."""
+        parts = [p for p in (self.read_day(d) for d in days) if p is not None]
+        if not parts:
+            return self._empty()
+        return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+    def write_day(self, day: DayKey, columns: Dict[str, Any]) -> Path:
+        """Replace one day's partition (atomic rename, so readers never see a partial file)."""
+        path = self.partition_path(day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez(tmp_path, **{name: columns[name] for name in COLUMNS})
+        os.replace(tmp_path, path)
+        return path
+
+    def write_frame(self, df: Any, conversation: str, inbox: str, response: str,
+                    status: str, minutes: str, conversation_dictionary: Any = None,
+                    conversation_coded: bool = False) -> List[str]:
+        """Partition a matched-email DataFrame by Inbox day and replace those partitions.
+
+        Column arguments name the DataFrame columns holding each fact. If the
+        conversation column holds interned codes, pass the interning.StringDictionary
+        that decodes them; if it already holds conversation_code() values, pass
+        conversation_coded=True. Returns the dates written. Like the JSON merge, a
+        day present in the frame is rebuilt from the frame alone.
+        """
+        if df is None or df.empty:
+            return []
+        if conversation_coded:
+            conversation_values = df[conversation].to_numpy(dtype=np.int64)
+        else:
+            conversation_values = conversation_codes(df[conversation], conversation_dictionary)
+        inbox_ts = pd.to_datetime(df[inbox]).to_numpy(dtype='datetime64[s]')
+        columns = {
+            'conversation': conversation_values,
+            'inbox_ts': inbox_ts,
+            'response_ts': pd.to_datetime(df[response]).to_numpy(dtype='datetime64[s]'),
+            'status': df[status].map(STATUS_CODES).fillna(STATUS_CODES['Pending']).to_numpy(dtype=np.int8),
+            'business_minutes': pd.to_numeric(df[minutes], errors='coerce').to_numpy(dtype=np.float64),
+        }
+
+        order = np.argsort(inbox_ts, kind='stable')
+        columns = {name: values[order] for name, values in columns.items()}
+        day_values = columns['inbox_ts'].astype('datetime64[D]')
+        unique_days, starts = np.unique(day_values, return_index=True)
+        bounds = list(starts) + [len(day_values)]
+
+        written = []
+        for i, day in enumerate(unique_days):
+            day_str = str(day)
+            self.write_day(day_str, {name: values[bounds[i]:bounds[i + 1]] for name, values in columns.items()})
+            written.append(day_str)
+        return written
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {
+            'conversation': np.empty(0, dtype=np.int64),
+            'inbox_ts': np.empty(0, dtype='datetime64[s]'),
+            'response_ts': np.empty(0, dtype='datetime64[s]'),
+            'status': np.empty(0, dtype=np.int8),
+            'business_minutes': np.empty(0, dtype=np.float64),
+        }
@@ -12,17 +12,38 @@ import os
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from jinja2 import Template
-import statistics
 import argparse
 
+from instrumentation import stage, timed, start_run, finish_run, profiled
+from lazy_imports import lazy_import
+import charts
+import fact_table
+import rendering
+from mailboxes import MailboxError, get_mailbox, read_config
+from backlog import has_sla
+from time_series import resolution_from_config, series_store_for, validate_resolution
+from baselines import baseline_options, baseline_store_for
+
+# Listing and validation never need NumPy; keep CLI start-up pure stdlib
+np = lazy_import('numpy')
+
 class DashboardGenerator:
-    def __init__(self, json_path, template_path, output_path, sla_config_path=None):
+    def __init__(self, json_path, template_path, output_path, sla_config_path=None, sla_config_overlay_path=None,
+                 resolution_minutes=None):
+        """template_path: path to a template file or a rendering template name
+        (e.g. "daily/kpi_cards.html", "themes/<name>.html" or just "<name>").
+        sla_config_overlay_path: optional mailbox overlay merged over sla_config_path.
+        resolution_minutes: chart bucket width; defaults to aggregation.resolution_minutes."""
         self.json_path = json_path
         self.template_path = template_path
         self.output_path = output_path
         self.sla_config_path = sla_config_path
+        self.sla_config_overlay_path = sla_config_overlay_path
         self.sla_config = None
+        self._template = None  # compiled template, reused across renders
+        self.fact_store = fact_table.fact_store_for(json_path)
+        self.series_store = series_store_for(json_path)
+        self.resolution_minutes = resolution_minutes
         
         # Load SLA configuration if provided
         if sla_config_path:
@@ -36,9 +57,15 @@ class DashboardGenerator:
         self.chart_top_margin = 60
         self.chart_bottom_margin = 60
         
+        self.frame = charts.ChartFrame(self.chart_width, self.chart_height, self.chart_left_margin,
+                                       self.chart_right_margin, self.chart_top_margin, self.chart_bottom_margin)
+        
         # Calculate plotting area
-        self.plot_width = self.chart_width - self.chart_left_margin - self.chart_right_margin
-        self.plot_height = self.chart_height - self.chart_top_margin - self.chart_bottom_margin
+        self.plot_width = self.frame.plot_width
+        self.plot_height = self.frame.plot_height
+        
+        # Weekday x hour baselines kept up to date by the ingester (see baselines.py)
+        self.baseline_store = baseline_store_for(json_path, self.get_baseline_options())
         
     def get_business_hour_bounds(self):
         """Return (start_hour, end_hour) from SLA config if available, else defaults (7, 21).
@@ -59,11 +86,60 @@ class DashboardGenerator:
         end_hour = max(0, min(23, end_hour))
         return start_hour, end_hour
         
+    def get_chart_resolution(self):
+        """Bucket width (minutes) of the hourly distribution chart."""
+        if self.resolution_minutes is not None:
+            return validate_resolution(self.resolution_minutes)
+        try:
+            return resolution_from_config(self.sla_config)
+        except ValueError as e:
+            print(f"Warning: {e}; charting hourly")
+            return 60
+    
+    def get_output_options(self):
+        """Minify/precompress options from the SLA config's "output" section (None: write as rendered)."""
+        from output_optimizer import output_options
+
+        try:
+            return output_options(self.sla_config)
+        except ValueError as e:
+            print(f"Warning: {e}; writing dashboards as rendered")
+            return None
+    
+    def get_baseline_options(self):
+        """Band width and sample minimum from the SLA config's "baselines" section."""
+        try:
+            return baseline_options(self.sla_config)
+        except ValueError as e:
+            print(f"Warning: {e}; using default baselines")
+            return None
+    
+    def extract_business_series(self, series, business_data):
+        """Sub-hour chart values for the business window from a day's bucket arrays.
+
+        Returns (email_values, unread_values, unread_derived). Unread readings are
+        hourly, so each bucket shows its hour's measured reading; the reconstructed
+        backlog is used only in hours whose unread count is itself reconstructed,
+        and hours without any reading stay gaps, as on the hourly chart.
+        """
+        resolution = series['resolution']
+        start_hour, end_hour = self.get_business_hour_bounds()
+        first, last = start_hour * 60 // resolution, (end_hour + 1) * 60 // resolution
+        email_values = [int(v) for v in series['emails_received'][first:last]]
+        backlog = series.get('backlog')
+        hours = {item['hour']: item for item in business_data}
+        unread_values, unread_derived = [], []
+        for bucket in range(first, last):
+            item = hours.get(bucket * resolution // 60, {})
+            derived = bool(item.get('unread_derived'))
+            unread_values.append(int(backlog[bucket]) if derived and backlog is not None else item.get('unread'))
+            unread_derived.append(derived)
+        return email_values, unread_values, unread_derived
+    
     def load_sla_config(self):
         """Load SLA configuration from JSON file."""
         try:
-            with open(self.sla_config_path, 'r') as f:
-                self.sla_config = json.load(f)
+            self.sla_config = read_config(self.sla_config_path, self.sla_config_overlay_path)
             print(f"Loaded SLA config: {self.sla_config['metadata']['version']}")
         except Exception as e:
             print(f"Warning: Could not load SLA config from {self.sla_config_path}: {e}")
@@ -78,7 +154,7 @@ class DashboardGenerator:
         """Find the most recent day with both email and SLA data"""
         for date_str in sorted(data['days'].keys(), reverse=True):
             day_data = data['days'][date_str]
-            if day_data.get('has_email_data', False) and day_data.get('has_sla_data', False):
+            if day_data.get('has_email_data', False) and has_sla(day_data):
                 return date_str, day_data
         raise ValueError("No complete day found with both email and SLA data")
     
@@ -96,6 +172,7 @@ class DashboardGenerator:
                     'emails': hour_data.get('emails_received', 0) or 0,
                     'unread': unread_count,  # Keep None for missing data
                     'sla_met': hour_data.get('sla_met', False),
+                    'unread_derived': hour_data.get('unread_derived', False),
                     'avg_response_time': hour_data.get('avg_response_time', None),
                     'emails_replied': hour_data.get('emails_replied', 0) or 0
                 })
@@ -191,19 +268,20 @@ class DashboardGenerator:
         
         return result
     
-    def calculate_response_time_percentiles(self, hourly_data):
-        """Calculate response time percentiles and bar widths for the new design."""
-        response_times = []
-        
-        for hour_data in hourly_data:
-            response_time = hour_data.get('avg_response_time', None)
-            replied_count = hour_data.get('emails_replied', 0) or 0
-            
-            if response_time is not None and replied_count > 0:
-                for _ in range(int(replied_count)):
-                    response_times.append(response_time)
+    def calculate_response_time_percentiles(self, hourly_data, day_facts=None):
+        """Calculate response time percentiles and bar widths for the new design.
+        With the day's fact-table partition the percentiles are exact; otherwise each
+        hour's avg_response_time is repeated emails_replied times (approximation).
+        """
+        if day_facts is not None:
+            hours = [h['hour'] for h in hourly_data]
+            response_times = fact_table.response_minutes(day_facts, min(hours), max(hours) + 1) if hours else np.empty(0)
+        else:
+            weighted = [(h['avg_response_time'], int(h['emails_replied'])) for h in hourly_data
+                        if h.get('avg_response_time') is not None and (h.get('emails_replied') or 0) > 0]
+            response_times = np.repeat([rt for rt, _ in weighted], [w for _, w in weighted]).astype(float)
         
-        if not response_times:
+        if len(response_times) == 0:
             return {
                 'percentiles': [
                     {'label': 'P25', 'value': 0, 'percentage': 25, 'color': 'muted', 'bar_width': 0},
@@ -217,28 +295,11 @@ class DashboardGenerator:
                 'sla_target': self.sla_config['kpi_targets']['response_time_target_minutes'] if self.sla_config else 60
             }
         
-        response_times.sort()
-        total_count = len(response_times)
-
-        # Helper to compute percentiles accurately
-        def get_percentile(arr, p):
-            # P50 should match true median for even/odd counts
-            if p == 50:
-                return statistics.median(arr)
-            # Use inclusive method to match common dashboard expectations
-            try:
-                qs = statistics.quantiles(arr, n=100, method='inclusive')
-                return qs[p - 1]
-            except Exception:
-                # Fallback: nearest-rank style using bounds
-                idx = int(round((p / 100) * (len(arr) - 1)))
-                idx = max(0, min(idx, len(arr) - 1))
-                return arr[idx]
+        # Linear interpolation == statistics.quantiles(method='inclusive'); P50 is the true median
+        percentile_values = np.percentile(response_times, [25, 50, 75, 90, 95])
 
         percentiles = []
-        for p_value, p_label in [(25, 'P25'), (50, 'P50'), (75, 'P75'), (90, 'P90'), (95, 'P95')]:
-            value = get_percentile(response_times, p_value)
-
+        for value, (p_value, p_label) in zip(percentile_values.tolist(), [(25, 'P25'), (50, 'P50'), (75, 'P75'), (90, 'P90'), (95, 'P95')]):
             if value <= 60:
                 color = 'success'
             elif value <= 120:
@@ -267,10 +328,10 @@ class DashboardGenerator:
         p75_val = percentiles[2]['value']
         
         quartiles = {
-            'q1_count': sum(1 for rt in response_times if rt <= p25_val),
-            'q2_count': sum(1 for rt in response_times if p25_val < rt <= p50_val),
-            'q3_count': sum(1 for rt in response_times if p50_val < rt <= p75_val),
-            'q4_count': sum(1 for rt in response_times if rt > p75_val)
+            'q1_count': int(np.count_nonzero(response_times <= p25_val)),
+            'q2_count': int(np.count_nonzero((response_times > p25_val) & (response_times <= p50_val))),
+            'q3_count': int(np.count_nonzero((response_times > p50_val) & (response_times <= p75_val))),
+            'q4_count': int(np.count_nonzero(response_times > p75_val))
         }
         
         return {
@@ -280,14 +341,15 @@ class DashboardGenerator:
             'sla_target': self.sla_config['kpi_targets']['response_time_target_minutes'] if self.sla_config else 60
         }
     
-    def aggregate_two_hour_intervals(self, hourly_data):
+    def aggregate_two_hour_intervals(self, hourly_data, day_facts=None):
         """Aggregate hourly metrics into 2-hour blocks across configured business hours.
         Computes totals/averages per block:
         - emails: sum of emails_received
         - avg_unread: mean of unread_count (ignoring None)
         - sla_met: True only if all measured hours in the block met SLA; None if no data
         - avg_response_time: weighted average by emails_replied
-        - median_response_time: weighted median using per-hour avg_response_time expanded by emails_replied
+        - median_response_time: exact median from the day's fact-table partition when available,
+          else weighted median using per-hour avg_response_time expanded by emails_replied
         - avg_mean_time: same as avg_response_time (business minutes)
         """
         intervals = []
@@ -317,14 +379,17 @@ class DashboardGenerator:
                     total_weight += w
             avg_rt = round(weighted_sum / total_weight, 1) if total_weight > 0 else None
 
-            # Weighted median approximation by expanding per-hour averages by emails_replied
-            rt_samples = []
-            for h in hours:
-                rt = h.get('avg_response_time')
-                w = h.get('emails_replied') or 0
-                if rt is not None and w > 0:
-                    rt_samples.extend([rt] * int(w))
-            median_rt = round(statistics.median(rt_samples), 1) if rt_samples else None
+            if day_facts is not None:
+                rt_samples = fact_table.response_minutes(day_facts, start, start + 2)
+            else:
+                # Weighted median approximation by expanding per-hour averages by emails_replied
+                rt_samples = []
+                for h in hours:
+                    rt = h.get('avg_response_time')
+                    w = h.get('emails_replied') or 0
+                    if rt is not None and w > 0:
+                        rt_samples.extend([rt] * int(w))
+            median_rt = round(float(np.median(rt_samples)), 1) if len(rt_samples) else None
 
             intervals.append({
                 'label': f"{self.format_hour_label(start)} – {self.format_hour_label(end)}",
@@ -340,103 +405,140 @@ class DashboardGenerator:
 
         return intervals
     
-    def calculate_svg_coordinates(self, data_points, max_value, is_emails=True):
-        """Calculate SVG coordinates for line chart data"""
-        coordinates = []
-        
-        # Calculate X positions (evenly spaced across plot width)
-        hours_count = len(data_points)
-        x_step = self.plot_width / (hours_count - 1) if hours_count > 1 else 0
+    def calculate_svg_coordinates(self, data_points, max_value, is_emails=True, resolution_minutes=60):
+        """Calculate SVG coordinates for line chart data (one point per bucket of resolution_minutes).
+        None values keep their x but get y None and is_missing_data set."""
+        count = len(data_points)
         start_hour, _ = self.get_business_hour_bounds()
+        xs = np.rint(self.frame.x_positions(count)).astype(int).tolist()
+        ys = np.rint(self.frame.y_positions(data_points, max_value)).tolist()
         
-        for i, value in enumerate(data_points):
-            # X coordinate
-            x = self.chart_left_margin + (i * x_step)
-            
-            # Y coordinate (inverted because SVG y=0 is at top)
-            if max_value > 0:
-                y_ratio = value / max_value
-                y = self.chart_top_margin + (self.plot_height * (1 - y_ratio))
-            else:
-                y = self.chart_top_margin + self.plot_height
-            
+        coordinates = []
+        for i, (value, x, y) in enumerate(zip(data_points, xs, ys)):
+            # Starting from configured business-hour start
+            hour, minute = divmod(start_hour * 60 + i * resolution_minutes, 60)
             coordinates.append({
-                'x': round(x),
-                'y': round(y),
+                'x': x,
+                'y': None if value is None else int(y),
                 'value': value,
-                'hour': start_hour + i  # Starting from configured business-hour start
+                'hour': hour,
+                'time_label': f"{hour}:{minute:02d}",
+                'is_marker': minute == 0,  # points and labels are drawn on the hour only
+                'is_missing_data': value is None
             })
         
         return coordinates
     
+    def coordinate_series(self, coordinates):
+        """x and y arrays of coordinates (missing data as NaN), decimated to the plot's pixel width."""
+        x = [c['x'] for c in coordinates]
+        y = [None if c.get('is_missing_data', False) else c['y'] for c in coordinates]
+        return charts.decimate(x, y, self.frame.max_points)
+    
     def create_svg_path(self, coordinates):
-        """Create SVG path string from coordinates"""
+        """Create SVG path string from coordinates; missing data breaks the line."""
         if not coordinates:
             return ""
-        
-        path_parts = [f"M {coordinates[0]['x']},{coordinates[0]['y']}"]
-        for coord in coordinates[1:]:
-            path_parts.append(f"L {coord['x']},{coord['y']}")
-        
-        return " ".join(path_parts)
+        return charts.line_path(*self.coordinate_series(coordinates))
     
     def create_smooth_svg_path(self, coordinates, tension: float = 1.0):
         """Create a smoothed SVG path using Catmull–Rom to cubic Bezier conversion.
-        If fewer than 2 points, returns a move command only.
-        Handles missing data by skipping points marked as missing_data.
+        Missing data points break the curve into separate subpaths instead of being bridged.
         """
         if not coordinates:
             return ""
-        
-        # Filter out missing data points
-        valid_coords = [c for c in coordinates if not c.get('is_missing_data', False)]
-        
-        if not valid_coords:
-            return ""
-        if len(valid_coords) == 1:
-            return f"M {valid_coords[0]['x']},{valid_coords[0]['y']}"
-
-        # Extract points from valid coordinates only
-        pts = [(c['x'], c['y']) for c in valid_coords]
-        path = [f"M {pts[0][0]},{pts[0][1]}"]
-
-        for i in range(len(pts) - 1):
-            p0 = pts[i - 1] if i - 1 >= 0 else pts[i]
-            p1 = pts[i]
-            p2 = pts[i + 1]
-            p3 = pts[i + 2] if i + 2 < len(pts) else pts[i + 1]
-
-            c1x = p1[0] + (p2[0] - p0[0]) / 6.0 * tension
-            c1y = p1[1] + (p2[1] - p0[1]) / 6.0 * tension
-            c2x = p2[0] - (p3[0] - p1[0]) / 6.0 * tension
-            c2y = p2[1] - (p3[1] - p1[1]) / 6.0 * tension
-
-            path.append(
-                f"C {round(c1x, 2)},{round(c1y, 2)} {round(c2x, 2)},{round(c2y, 2)} {p2[0]},{p2[1]}"
-            )
-
-        return " ".join(path)
+        return charts.line_path(*self.coordinate_series(coordinates), smooth=True, tension=tension)
 
     def create_area_path(self, coordinates, baseline_y: float, use_smooth: bool = True, tension: float = 1.0):
-        """Create a closed area path under the line down to the given baseline (x-axis)."""
+        """Create a closed area path under the line down to the given baseline (x-axis), one per run of data."""
         if not coordinates:
             return ""
-        
-        # Filter out missing data for area path too
-        valid_coords = [c for c in coordinates if not c.get('is_missing_data', False)]
-        
-        if not valid_coords:
-            return ""
-            
-        line_path = (
-            self.create_smooth_svg_path(coordinates, tension) if use_smooth else self.create_svg_path(coordinates)
-        )
-        first_x = valid_coords[0]['x']
-        last_x = valid_coords[-1]['x']
-        # Close down to baseline and back to start
-        area_path = f"{line_path} L {last_x},{baseline_y} L {first_x},{baseline_y} Z"
-        return area_path
+        x, y = self.coordinate_series(coordinates)
+        return charts.area_path(x, y, baseline_y, smooth=use_smooth, tension=tension)
     
+    def calculate_baseline_bands(self, date_str, business_data, coordinates, max_value, resolution_minutes=60):
+        """Typical-range bands (SVG paths) for the chart and markers for hours outside them.
+        Bands come from the ingester's weekday x hour store, so no other day is read; emails
+        are scaled to the chart's bucket width, unread counts are levels and are not."""
+        result = {'email_band_path': '', 'unread_band_path': '', 'anomalies': [], 'has_baseline': False}
+        bands = self.baseline_store.baseline(date_str) if self.baseline_store.exists() else None
+        if bands is None or not coordinates:
+            return result
+        
+        x = [c['x'] for c in coordinates]
+        hours = np.array([c['hour'] for c in coordinates])
+        for metric, key, scale in (('emails', 'email_band_path', resolution_minutes / 60), ('unread', 'unread_band_path', 1)):
+            band = bands[metric]
+            low = np.minimum(band['low'][hours] * scale, max_value)
+            high = np.minimum(band['high'][hours] * scale, max_value)
+            result[key] = charts.band_path(x, self.frame.y_positions(low, max_value), self.frame.y_positions(high, max_value))
+            result['has_baseline'] |= bool(np.isfinite(band['expected'][hours]).any())
+        
+        # Hourly values against the hourly bands, marked above the plot at the hour's position
+        marker_x = {c['hour']: c['x'] for c in coordinates if c['is_marker']}
+        for row, (metric, field, label) in enumerate((('emails', 'emails', 'emails'), ('unread', 'unread', 'unread'))):
+            band = bands[metric]
+            for item in business_data:
+                value, hour = item[field], item['hour']
+                if value is None or hour not in marker_x or np.isnan(band['expected'][hour]):
+                    continue
+                low, high = float(band['low'][hour]), float(band['high'][hour])
+                if low <= value <= high:
+                    continue
+                result['anomalies'].append({
+                    'metric': metric,
+                    'hour': hour,
+                    'x': marker_x[hour],
+                    'y': self.chart_top_margin - 36 + row * 18,
+                    'value': value,
+                    'direction': 'above' if value > high else 'below',
+                    'title': (f"{self.format_hour_label(hour)}: {value} {label}, typical "
+                              f"{low:.1f}–{high:.1f} (expected {band['expected'][hour]:.1f}, "
+                              f"{int(band['samples'][hour])} days)"),
+                })
+        return result
+    
+    def business_avg_response_time(self, business_data, daily_data):
+        """Business-hours weighted avg response time; fallback to daily summary minutes if present."""
+        weighted_sum = 0
+        total_weight = 0
+        for h in business_data:
+            rt = h.get('avg_response_time')
+            w = h.get('emails_replied') or 0
+            if rt is not None and w > 0:
+                weighted_sum += rt * w
+                total_weight += w
+        # Prefer business-hours computed average to keep scope consistent with percentiles/median
+        if total_weight > 0:
+            return round(weighted_sum / total_weight, 1)
+        return daily_data.get('avg_response_time_minutes') or 0
+
+    def validation_kpis(self, target_date=None, data=None):
+        """The KPIs --validate-only checks, read from the day's JSON entry alone.
+
+        Same values as the rendered dashboard's KPI cards, without the charts,
+        fact-table percentiles or baselines, so validation stays pure stdlib.
+        """
+        if data is None:
+            data = self.load_data()
+        if target_date:
+            if target_date not in data['days']:
+                raise ValueError(f"Date {target_date} not found in database")
+            date_str, day_data = target_date, data['days'][target_date]
+        else:
+            date_str, day_data = self.get_latest_complete_day(data)
+        daily_data = day_data['daily_summary']
+        business_data = self.extract_business_hours_data(day_data['hourly_data'])
+        return {
+            'date_str': date_str,
+            'daily_data': daily_data,
+            'hourly_data': day_data['hourly_data'],
+            'total_emails': daily_data.get('total_emails') or sum(item['emails'] for item in business_data),
+            'avg_unread_count': daily_data.get('avg_unread_count', 0),
+            'sla_compliance': round(daily_data['sla_compliance_rate'], 1),
+            'avg_response_time': self.business_avg_response_time(business_data, daily_data),
+        }
+
     def format_hour_label(self, hour):
         """Format hour as 12-hour time"""
         if hour == 0:
@@ -448,10 +550,15 @@ class DashboardGenerator:
         else:
             return f"{hour - 12} PM"
     
-    def generate_dashboard(self, target_date=None):
-        """Generate the complete dashboard"""
+    @timed()
+    def generate_dashboard(self, target_date=None, data=None):
+        """Generate the complete dashboard.
+        Pass an already-loaded database dict as `data` to skip re-reading the JSON file.
+        """
         # Load data
-        data = self.load_data()
+        if data is None:
+            with stage('load_database'):
+                data = self.load_data()
         
         # Get target day data
         if target_date:
@@ -462,13 +569,24 @@ class DashboardGenerator:
         else:
             date_str, day_data = self.get_latest_complete_day(data)
         
+        # Per-email facts for exact percentiles (None for days ingested before the fact table)
+        with stage('load_facts'):
+            day_facts = self.fact_store.read_day(date_str)
+        
         # Extract business hours data
         business_data = self.extract_business_hours_data(day_data['hourly_data'])
         
-        # Extract data series
-        email_values = [item['emails'] for item in business_data]
-        # For unread values, handle missing data properly
-        unread_raw_values = [item['unread'] for item in business_data]
+        # Extract data series: hourly from the database, or sub-hour from the day's bucket arrays
+        resolution = self.get_chart_resolution()
+        day_series = self.series_store.read_day(date_str, resolution) if resolution < 60 else None
+        if day_series is not None:
+            email_values, unread_raw_values, unread_derived_values = self.extract_business_series(day_series, business_data)
+        else:
+            resolution = 60
+            email_values = [item['emails'] for item in business_data]
+            # For unread values, handle missing data properly
+            unread_raw_values = [item['unread'] for item in business_data]
+            unread_derived_values = [item['unread_derived'] for item in business_data]
         
         # Targets and thresholds needed for scaling and template
         unread_threshold = (self.sla_config or {}).get('sla_thresholds', {}).get('unread_email_threshold', 30)
@@ -480,14 +598,12 @@ class DashboardGenerator:
         max_unread = max(valid_unread_values) if valid_unread_values else 1
         overall_max = max(max_emails, max_unread, unread_threshold)
         
-        # Calculate coordinates - use 0 for display but track original values
-        unread_display_values = [v if v is not None else 0 for v in unread_raw_values]
-        email_coords = self.calculate_svg_coordinates(email_values, overall_max, True)
-        unread_coords = self.calculate_svg_coordinates(unread_display_values, overall_max, False)
+        # Calculate coordinates - missing unread values become gaps in the line
+        email_coords = self.calculate_svg_coordinates(email_values, overall_max, True, resolution)
+        unread_coords = self.calculate_svg_coordinates(unread_raw_values, overall_max, False, resolution)
         
-        # Mark coordinates that represent missing data
         for i, coord in enumerate(unread_coords):
-            coord['is_missing_data'] = unread_raw_values[i] is None
+            coord['is_derived'] = unread_derived_values[i]
             
         # Filter out missing data coordinates for template rendering (data points)
         unread_coords_filtered = [coord for coord in unread_coords if not coord.get('is_missing_data', False)]
@@ -502,25 +618,24 @@ class DashboardGenerator:
         # Create smoothed SVG paths and area fills
         email_path = self.create_smooth_svg_path(email_coords)
         unread_path = self.create_smooth_svg_path(unread_coords)
-        baseline_y = self.chart_height - self.chart_bottom_margin
+        baseline_y = self.frame.baseline
         email_area_path = self.create_area_path(email_coords, baseline_y, use_smooth=True)
         unread_area_path = self.create_area_path(unread_coords, baseline_y, use_smooth=True)
         
+        # Typical range per hour for this weekday, and the hours outside it
+        baseline = self.calculate_baseline_bands(date_str, business_data, email_coords, overall_max, resolution)
+        
         # Generate Y-axis labels
-        y_labels = []
-        for i in range(6):  # 5 grid lines + 1
-            value = int((overall_max / 5) * i)
-            y_pos = self.chart_top_margin + (self.plot_height * (1 - i/5))
-            y_labels.append({'value': value, 'y': round(y_pos)})
+        y_labels = self.frame.y_ticks(overall_max)  # 5 grid lines + 1
         
         # Generate X-axis labels
         x_labels = []
-        start_hour, _ = self.get_business_hour_bounds()
-        for i, coord in enumerate(email_coords):
-            hour = start_hour + i
+        for coord in email_coords:
+            if not coord['is_marker']:
+                continue
             x_labels.append({
-                'hour': hour,
-                'label': self.format_hour_label(hour),
+                'hour': coord['hour'],
+                'label': self.format_hour_label(coord['hour']),
                 'x': coord['x']
             })
         
@@ -528,8 +643,8 @@ class DashboardGenerator:
         response_time_by_hour = self.calculate_response_time_by_hour(day_data['hourly_data'])
         response_time_distribution = self.calculate_response_time_distribution(day_data['hourly_data'])
         # Use business hours for percentiles to match KPI avg scope
-        response_time_percentiles_data = self.calculate_response_time_percentiles(business_data)
-        two_hour_metrics = self.aggregate_two_hour_intervals(day_data['hourly_data'])
+        response_time_percentiles_data = self.calculate_response_time_percentiles(business_data, day_facts)
+        two_hour_metrics = self.aggregate_two_hour_intervals(day_data['hourly_data'], day_facts)
         # For scaling microbars in the two-hour table
         if two_hour_metrics:
             two_hour_max_emails = max(item['emails'] for item in two_hour_metrics)
@@ -587,21 +702,7 @@ class DashboardGenerator:
         response_time_target = (self.sla_config or {}).get('kpi_targets', {}).get('response_time_target_minutes', 60)
         sla_compliance_target = (self.sla_config or {}).get('kpi_targets', {}).get('sla_compliance_target_percent', 85)
 
-        # Compute business-hours weighted avg response time; fallback to daily summary minutes if present
-        weighted_sum = 0
-        total_weight = 0
-        for h in business_data:
-            rt = h.get('avg_response_time')
-            w = h.get('emails_replied') or 0
-            if rt is not None and w > 0:
-                weighted_sum += rt * w
-                total_weight += w
-        computed_avg_rt = round(weighted_sum / total_weight, 1) if total_weight > 0 else None
-        # Prefer business-hours computed average to keep scope consistent with percentiles/median
-        if computed_avg_rt is not None:
-            avg_response_time_val = computed_avg_rt
-        else:
-            avg_response_time_val = daily_data.get('avg_response_time_minutes') or 0
+        avg_response_time_val = self.business_avg_response_time(business_data, daily_data)
 
         # Median (P50) for quick reference in KPI card
         median_response_time = next((p['value'] for p in response_time_percentiles if p['label'] == 'P50'), 0)
@@ -614,6 +715,7 @@ class DashboardGenerator:
 
         context = {
             'formatted_date': formatted_date,
+            'day_name': datetime.strptime(date_str, '%Y-%m-%d').strftime('%A'),
             'date_str': date_str,
             'generated_at': generated_at,
             'daily_data': daily_data,
@@ -637,8 +739,14 @@ class DashboardGenerator:
             'unread_path': unread_path,
             'email_area_path': email_area_path,
             'unread_area_path': unread_area_path,
+            'email_band_path': baseline['email_band_path'],
+            'unread_band_path': baseline['unread_band_path'],
+            'has_baseline': baseline['has_baseline'],
+            'anomalies': baseline['anomalies'],
             'email_coords': email_coords,
             'unread_coords': unread_coords_filtered,
+            'unread_derived': any(unread_derived_values),
+            'chart_resolution_minutes': resolution,
             'sla_line_y': sla_line_y,
             'y_labels': y_labels,
             'x_labels': x_labels,
@@ -661,42 +769,38 @@ class DashboardGenerator:
         
         return context
     
+    @timed('render')
     def render_template(self, context):
         """Render the dashboard template with context data"""
-        # Load template
-        with open(self.template_path, 'r') as f:
-            template_content = f.read()
-        
-        # Convert hardcoded template to Jinja2 template (if needed)
-        template_content = self.convert_to_jinja_template(template_content)
-        
-        template = Template(template_content)
-        return template.render(context)
-    
-    def convert_to_jinja_template(self, html_content):
-        """Convert the hardcoded HTML template to use Jinja2 variables"""
-        # This function is optional - if the template already uses Jinja2 syntax,
-        # it will just return the content as-is
-        return html_content
+        if self._template is None:
+            # template_path may be a file path, a template name or a theme shorthand
+            self._template = rendering.get_template(self.template_path)
+        return self._template.render(context)
     
+    @timed('write')
     def save_dashboard(self, rendered_html, date_str, write_latest: bool = True):
         """Save the rendered dashboard to output file.
         Optionally also write a convenient 'latest.html' alias in the same directory.
+        With an "output" section in the SLA config, files are minified and get .gz/.br siblings.
         """
+        from output_optimizer import OptimizedOutput, format_report
+
         output_filename = f"email_dashboard_{date_str}.html"
         output_path = os.path.join(self.output_path, output_filename)
         
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        options = self.get_output_options()
         
-        with open(output_path, 'w') as f:
-            f.write(rendered_html)
+        output = OptimizedOutput(rendered_html, options)
+        report = output.write(output_path)
+        if options:
+            print(f"Optimized {format_report(report)}")
         
         # Also write a 'latest.html' alias to quickly open the most recently generated dashboard
         if write_latest:
             latest_path = os.path.join(self.output_path, "latest.html")
             try:
-                with open(latest_path, 'w') as f:
-                    f.write(rendered_html)
+                output.write(latest_path)
                 print(f"Dashboard saved to: {output_path} (alias: {latest_path})")
             except Exception as e:
                 # Still consider main save successful
@@ -714,24 +818,51 @@ def main():
                         help="Validate KPIs for the selected date; print summary and exit non-zero if required fields are missing.")
     parser.add_argument("--list-dates", dest="list_dates", action="store_true",
                         help="List available dates from email_database.json and whether each is complete.")
+    parser.add_argument("--profile", dest="profile", action="store_true",
+                        help="Dump cProfile stats for the run to data/runs/.")
+    parser.add_argument("--trace-memory", dest="trace_memory", action="store_true",
+                        help="Record tracemalloc peaks per stage (slower).")
+    parser.add_argument("--template", dest="template", default=rendering.DAILY_TEMPLATE,
+                        help="Template name or theme (e.g. light, themes/light.html). Default: %(default)s")
+    parser.add_argument("--list-templates", dest="list_templates", action="store_true",
+                        help="List selectable template names and exit.")
+    parser.add_argument("--mailbox", dest="mailbox",
+                        help="Mailbox to report on (a configured name or 'combined'). Default: the original layout.")
+    parser.add_argument("--resolution", dest="resolution", type=int,
+                        help="Chart bucket width in minutes (5, 15, 30, 60). Default: aggregation.resolution_minutes.")
     args = parser.parse_args()
-
-    # Get script directory
-    script_dir = Path(__file__).parent
-    project_root = script_dir.parent.parent
-    
-    # Define paths
-    json_path = project_root / "database" / "email_database.json"
-    template_path = project_root / "daily" / "dashboard" / "templates" / "kpi_cards.html"
-    sla_config_path = project_root / "config" / "sla_config.json"
-    output_dir = project_root / "daily" / "dashboard" / "output"
+    if args.resolution is not None:
+        try:
+            validate_resolution(args.resolution)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.list_templates:
+        for name in rendering.available_templates():
+            print(name)
+        sys.exit(0)
+    try:
+        template_name = rendering.resolve_template_name(args.template)
+    except ValueError as e:
+        parser.error(str(e))
+    if template_name not in rendering.available_templates():
+        parser.error(f"Unknown template '{args.template}' (available: {', '.join(rendering.available_templates())})")
+
+    # Define paths (partitioned per mailbox)
+    try:
+        mailbox = get_mailbox(args.mailbox)
+    except MailboxError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
     
     # Create generator
     generator = DashboardGenerator(
-        json_path=str(json_path),
-        template_path=str(template_path),
-        output_path=str(output_dir),
-        sla_config_path=str(sla_config_path)
+        json_path=str(mailbox.database_path),
+        template_path=args.template,
+        output_path=str(mailbox.daily_output_dir),
+        sla_config_path=str(mailbox.config_path),
+        sla_config_overlay_path=str(mailbox.overlay_path) if mailbox.overlay_path else None,
+        resolution_minutes=args.resolution,
     )
     
     # Handle "list dates" mode
@@ -741,9 +872,11 @@ def main():
             days = data.get('days', {})
             for date_key in sorted(days.keys()):
                 day = days[date_key]
-                complete = day.get('has_email_data', False) and day.get('has_sla_data', False)
+                complete = day.get('has_email_data', False) and has_sla(day)
                 total = (day.get('daily_summary') or {}).get('total_emails', 0)
                 status = "complete" if complete else "incomplete"
+                if complete and not day.get('has_sla_data', False):
+                    status = "complete (backlog reconstructed)"
                 print(f"{date_key}  {status}  total_emails={total}")
             print(f"Found {len(days)} dates.")
             sys.exit(0)
@@ -754,7 +887,7 @@ def main():
     # Handle validation mode
     if args.validate_only:
         try:
-            context = generator.generate_dashboard(target_date=args.date)
+            context = generator.validation_kpis(target_date=args.date)
         except Exception as e:
             print(f"Validation error: {e}", file=sys.stderr)
             sys.exit(2)
@@ -782,15 +915,24 @@ def main():
             print("\u2713 Validation passed")
             sys.exit(0)
     
-    # Generate dashboard context
-    context = generator.generate_dashboard(target_date=args.date)
-    
-    # Render template
-    rendered_html = generator.render_template(context)
-    
-    # Save dashboard
-    date_str = context.get('date_str') or datetime.now().strftime("%Y-%m-%d")
-    output_path = generator.save_dashboard(rendered_html, date_str)
+    start_run('daily_dashboard', trace_memory=args.trace_memory)
+    with profiled(args.profile, 'daily_dashboard'):
+        # Generate dashboard context
+        data = generator.load_data()
+        context = generator.generate_dashboard(target_date=args.date, data=data)
+        
+        # Render template
+        rendered_html = generator.render_template(context)
+        
+        # Save dashboard
+        date_str = context.get('date_str') or datetime.now().strftime("%Y-%m-%d")
+        output_path = generator.save_dashboard(rendered_html, date_str)
+        
+        # Link it from the archive (only the affected month page is rewritten)
+        with stage('archive'):
+            from archive_index import ArchiveIndex
+            ArchiveIndex(mailbox, generator.sla_config, generator.get_output_options()).update(data, [date_str])
+    finish_run(emit=print)
     
     print(f"\u2713 Dashboard generation complete!")
     print(f"  Output: {output_path}")
@@ -12,16 +12,39 @@ Key Features:
 - Handles conversation updates across multiple days
 - Creates automatic backups with timestamps
 - Preserves historical data while updating with new information
+- Skips conversations with no new events, using a persistent seen-event index
+- Reconstructs the backlog from events for hours UnreadCount.csv did not cover
+- Folds the touched days into the weekday x hour baselines (see baselines.py)
+- Quarantines rows failing data-quality rules before matching (see data_quality.py)
+- Folds the written fact days into the persistent conversation state (see conversation_state.py)
 """
 
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import logging
 import json
 import shutil
 from pathlib import Path
 import hashlib
+import argparse
+
+from instrumentation import stage, timed, count, start_run, finish_run, profiled
+from lazy_imports import lazy_import
+from fact_table import fact_store_for, conversation_codes, STATUS_NAMES
+from source_adapters import open_export, UnknownExportError
+from data_quality import screen, record_counts
+from interning import (dictionary_store_for, intern_columns, as_categorical,
+                       EVENT_INTERNED, RECORD_INTERNED, EVENT_TYPES, STATUSES, MISSING)
+from seen_events import seen_index_for, event_keys
+from backlog import BacklogSweep, fill_missing_hours
+from time_series import aggregate, downsample_series, resolution_from_config, series_store_for
+from derived_fields import DerivedFieldRefresher, config_hashes, stamp, EMAIL_FIELDS, SLA_FIELDS
+from baselines import baseline_options, baseline_store_for
+from conversation_state import conversation_state_for
+from mailboxes import Mailbox, MailboxError, get_mailbox, read_config
+
+# pandas/numpy are only needed once there is something to ingest
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -30,17 +53,33 @@ logger = logging.getLogger(__name__)
 class IntelligentIngester:
     """Handles intelligent ingestion and merging of email data."""
     
-    def __init__(self):
-        """Initialize the ingester with paths."""
+    def __init__(self, project_root=None, full_reprocess=False, bloom_bits_per_key=0, mailbox=None):
+        """Initialize the ingester with paths.
+        
+        project_root defaults to the repository root; benchmarks point it at a scratch tree.
+        mailbox selects the ingest folder, database and config overlay (default: the
+        original single-mailbox layout).
+        full_reprocess ignores the seen-event index and rebuilds every day in the export;
+        bloom_bits_per_key > 0 fronts the index with a Bloom filter of that size.
+        """
         # Set up paths relative to script location
         self.script_dir = Path(__file__).resolve().parent
-        self.project_root = self.script_dir.parent.parent
-        
-        # Data paths
-        self.ingest_dir = self.project_root / 'data' / 'ingest'
-        self.backup_dir = self.project_root / 'data' / 'backup'
-        self.database_path = self.project_root / 'database' / 'email_database.json'
-        self.config_path = self.project_root / 'config' / 'sla_config.json'
+        self.project_root = Path(project_root) if project_root else self.script_dir.parent.parent
+        
+        # Data paths (partitioned per mailbox)
+        self.mailbox = Mailbox(mailbox, self.project_root)
+        self.ingest_dir = self.mailbox.ingest_dir
+        self.backup_dir = self.mailbox.backup_dir
+        self.quarantine_dir = self.mailbox.quarantine_dir
+        self.database_path = self.mailbox.database_path
+        self.config_path = self.mailbox.config_path
+        self.config_overlay_path = self.mailbox.overlay_path
+        self.fact_store = fact_store_for(self.database_path)
+        self.dictionaries = dictionary_store_for(self.database_path)
+        self.seen_events = seen_index_for(self.database_path, bloom_bits_per_key)
+        self.series_store = series_store_for(self.database_path)
+        self.conversation_state = conversation_state_for(self.database_path)
+        self.full_reprocess = full_reprocess
         
         # Input files
         self.complete_list_path = self.ingest_dir / 'Complete_List_Raw.csv'
@@ -55,11 +94,23 @@ class IntelligentIngester:
         # Track processed conversations for deduplication
         self.processed_conversations = {}
         
+        # Dates touched by the most recent merge and the resulting database
+        # (used by the watch daemon to re-render only affected dashboards)
+        self.last_touched_dates = []
+        self.database = None
+        
+        # Set per run: whether already-ingested conversations may be skipped,
+        # and the (MessageId, EventType) keys of the export being processed
+        self.incremental = False
+        self._export_event_keys = None
+        
+        # Per-day bucket arrays built by the last merge, written after the save
+        self._day_series = {}
+        
     def load_config(self):
         """Load SLA configuration."""
         try:
-            with open(self.config_path, 'r') as f:
-                self.sla_config = json.load(f)
+            self.sla_config = read_config(self.config_path, self.config_overlay_path)
             self.business_start_hour = self.sla_config['sla_thresholds']['business_hours']['start_hour']
             self.business_end_hour = self.sla_config['sla_thresholds']['business_hours']['end_hour']
             self.business_days = self.sla_config['sla_thresholds']['business_hours']['business_days']
@@ -72,6 +123,24 @@ class IntelligentIngester:
             self.business_end_hour = 21
             self.business_days = [0, 1, 2, 3, 4, 5, 6]
             self.unread_threshold = 30
+        
+        # Bucket width of the per-day series (hourly_data is downsampled from it)
+        try:
+            self.resolution_minutes = resolution_from_config(getattr(self, 'sla_config', None))
+        except ValueError as e:
+            logger.error(f"Invalid aggregation.resolution_minutes: {e}; using 60")
+            self.resolution_minutes = 60
+        
+        # Which config produced each derived field (see derived_fields.py)
+        self.config_hashes = config_hashes(getattr(self, 'sla_config', None))
+        
+        # Running weekday x hour statistics, updated with the touched days after each save
+        try:
+            options = baseline_options(getattr(self, 'sla_config', None))
+        except ValueError as e:
+            logger.error(f"Invalid baselines section: {e}; using defaults")
+            options = None
+        self.baselines = baseline_store_for(self.database_path, options)
             
     def create_backup(self, file_path, backup_name_prefix):
         """Create a timestamped backup of a file."""
@@ -140,6 +209,12 @@ class IntelligentIngester:
         
         return round(total_minutes, 2)
         
+    @staticmethod
+    def _shift_2025_to_2024(timestamps):
+        """Vectorized equivalent of ts.replace(year=2024) for every 2025 timestamp."""
+        return timestamps.mask(timestamps.dt.year == 2025, timestamps - pd.DateOffset(years=1))
+        
+    @timed()
     def process_email_events(self):
         """Process Complete_List_Raw.csv with full conversation tracking."""
         if not self.complete_list_path.exists():
@@ -148,16 +223,151 @@ class IntelligentIngester:
             
         logger.info("Processing email events from Complete_List_Raw.csv")
         
-        # Load the CSV
-        df = pd.read_csv(self.complete_list_path)
-        df['TimeStamp'] = pd.to_datetime(df['TimeStamp'])
+        # Load the CSV; the header decides whether it is an event log or pre-matched
+        try:
+            with stage('load_csv'):
+                adapter, raw = open_export(self.complete_list_path, kind='events')
+        except UnknownExportError as e:
+            logger.error(str(e))
+            return None
+        count('email_event_rows', len(raw))
         
-        # Fix year issue: Convert 2025 dates to 2024
-        df['TimeStamp'] = df['TimeStamp'].apply(lambda x: x.replace(year=2024) if x.year == 2025 else x)
+        with stage('normalize_dates'):
+            df = adapter.canonicalize(raw)
+            
+            # Fix year issue: Convert 2025 dates to 2024
+            if adapter.kind == 'records':
+                df['inbox_timestamp'] = self._shift_2025_to_2024(df['inbox_timestamp'])
+                df['response_timestamp'] = self._shift_2025_to_2024(df['response_timestamp'])
+            else:
+                df['TimeStamp'] = self._shift_2025_to_2024(df['TimeStamp'])
+        
+        # Rows failing a data-quality rule are quarantined instead of matched
+        with stage('data_quality'):
+            df, quality = screen(adapter.kind, df, raw, self.complete_list_path, self.quarantine_dir)
+        record_counts([quality])
+        if df.empty:
+            logger.warning("No email rows passed the data-quality checks")
+            return None
         
-        # Sort by conversation and timestamp
-        df = df.sort_values(['Conversation-Id', 'TimeStamp'])
+        # Only conversations with events not seen in earlier exports need matching
+        if adapter.kind == 'events':
+            with stage('filter_seen'):
+                df = self._filter_new_events(df)
+            if df.empty:
+                logger.info("No new email events since the last ingest")
+                return None
+        
+        # Long identifiers -> int codes (persisted dictionaries), EventType/status -> categoricals
+        with stage('intern'):
+            if adapter.kind == 'records':
+                df = intern_columns(df, self.dictionaries, RECORD_INTERNED)
+                df['status'] = as_categorical(df['status'], STATUSES)
+                df['conversation_code'] = conversation_codes(df['conversation_id'], self.dictionaries['conversation_id'])
+            else:
+                df = intern_columns(df, self.dictionaries, EVENT_INTERNED)
+                df['EventType'] = as_categorical(df['EventType'], EVENT_TYPES)
+        
+        if adapter.kind == 'records':
+            # Already matched with response minutes: skip matching and business-minute recompute
+            logger.info(f"Loaded {len(df)} pre-matched email records ({adapter.name} export)")
+            count('email_records', len(df))
+            count('conversations', int(df['conversation_id'].nunique()))
+            if self.incremental:
+                with stage('stored_facts'):
+                    df = self._with_stored_facts(df)
+            return df
+        
+        with stage('match_events'):
+            # Sort by conversation and timestamp
+            df = df.sort_values(['Conversation-Id', 'TimeStamp'])
+            email_records, conversations = self._match_events(df)
+        
+        # Calculate response times for emails that got a response
+        with stage('business_minutes'):
+            for record in email_records:
+                if record['response_timestamp'] is not None:
+                    record['response_time_minutes'] = self.calculate_business_minutes(
+                        record['inbox_timestamp'],
+                        record['response_timestamp']
+                    )
         
+        logger.info(f"Processed {len(email_records)} email records from {len(conversations)} conversations")
+        count('email_records', len(email_records))
+        count('conversations', len(conversations))
+        email_df = pd.DataFrame(email_records)
+        if not email_df.empty:
+            email_df['status'] = as_categorical(email_df['status'], STATUSES)
+            for column in RECORD_INTERNED:
+                email_df[column] = email_df[column].fillna(MISSING).astype('int32')
+            email_df['conversation_code'] = conversation_codes(email_df['conversation_id'],
+                                                               self.dictionaries['conversation_id'])
+            if self.incremental:
+                with stage('stored_facts'):
+                    email_df = self._with_stored_facts(email_df)
+        return email_df
+    
+    def _filter_new_events(self, df):
+        """Cut an event export down to the conversations that have events not ingested before.
+        
+        Exact duplicate rows are dropped first. Whatever is left out, the days the
+        export touches are completed from the stored facts (_with_stored_facts).
+        """
+        before = len(df)
+        df = df.drop_duplicates(subset=['Conversation-Id', 'TimeStamp', 'EventType', 'MessageId'], keep='first')
+        if len(df) != before:
+            logger.info(f"Deduplicated events: removed {before - len(df)} duplicate rows")
+        
+        keys, valid = event_keys(df['MessageId'], df['EventType'])
+        self._export_event_keys = keys[valid]
+        if not self.incremental:
+            return df
+        
+        seen = self.seen_events.contains(keys) & valid
+        count('seen_events', int(seen.sum()))
+        if not seen.any():
+            return df
+        
+        affected = df['Conversation-Id'].isin(df.loc[~seen, 'Conversation-Id'].unique())
+        logger.info(f"{int((~seen).sum())} new events in {df.loc[affected, 'Conversation-Id'].nunique()} "
+                    f"conversations; skipping {int(seen.sum())} already ingested events")
+        return df[affected]
+    
+    def _with_stored_facts(self, email_df):
+        """Add the stored fact rows of the emails email_df does not re-match, on the days it covers.
+        
+        merge_with_existing rebuilds each day from the frame alone, so the frame has to
+        hold every email of those days, not just the ones in this export. An email is
+        identified by conversation and Inbox time: a re-matched email replaces its stored
+        row, and every other email of the day is kept, including other emails of the same
+        conversation that this export does not contain (e.g. a fixed quarantine file).
+        """
+        days = [str(d) for d in email_df['inbox_timestamp'].dt.date.unique()]
+        facts = self.fact_store.read_days(days)
+        rematched = pd.MultiIndex.from_arrays([
+            email_df['conversation_code'].to_numpy(dtype=np.int64),
+            pd.to_datetime(email_df['inbox_timestamp']).to_numpy(dtype='datetime64[s]')])
+        keep = ~pd.MultiIndex.from_arrays([facts['conversation'], facts['inbox_ts']]).isin(rematched)
+        kept = int(keep.sum())
+        count('stored_fact_rows', kept)
+        if not kept:
+            return email_df
+        stored = pd.DataFrame({
+            'conversation_id': np.full(kept, MISSING, dtype='int32'),
+            'inbox_timestamp': facts['inbox_ts'][keep],
+            'inbox_emails': np.full(kept, MISSING, dtype='int32'),
+            'inbox_message_id': np.full(kept, MISSING, dtype='int32'),
+            'status': as_categorical(pd.Series(facts['status'][keep]).map(STATUS_NAMES), STATUSES),
+            'response_timestamp': facts['response_ts'][keep],
+            'response_time_minutes': facts['business_minutes'][keep],
+            'conversation_code': facts['conversation'][keep],
+        })
+        return pd.concat([email_df, stored], ignore_index=True)
+        
+    def _match_events(self, df):
+        """Group sorted events by conversation and pair each Inbox event with its response.
+        Returns (email_records, conversations); response times are filled in by the caller.
+        """
         # Track all conversations and their events
         conversations = {}
         
@@ -210,13 +420,6 @@ class IntelligentIngester:
                             response_event = completed
                             break
                 
-                # Calculate response time if we have a response
-                if response_event:
-                    response_time = self.calculate_business_minutes(
-                        inbox_event['timestamp'],
-                        response_event['timestamp']
-                    )
-                
                 email_records.append({
                     'conversation_id': conv_id,
                     'inbox_timestamp': inbox_event['timestamp'],
@@ -228,9 +431,9 @@ class IntelligentIngester:
                     'response_time_minutes': response_time
                 })
         
-        logger.info(f"Processed {len(email_records)} email records from {len(conversations)} conversations")
-        return pd.DataFrame(email_records)
+        return email_records, conversations
         
+    @timed()
     def process_sla_data(self):
         """Process UnreadCount.csv for SLA compliance data."""
         if not self.unread_count_path.exists():
@@ -239,27 +442,28 @@ class IntelligentIngester:
             
         logger.info("Processing SLA data from UnreadCount.csv")
         
-        # Load the CSV
-        df = pd.read_csv(self.unread_count_path)
-        
-        # Handle different possible column names
-        if 'Unread Count' in df.columns:
-            df['TotalUnread'] = df['Unread Count']
-        
-        # Handle different hour column names
-        if 'Hour of the Day' in df.columns:
-            df['Hour'] = df['Hour of the Day']
-        elif 'Hour' not in df.columns:
-            logger.error("No hour column found in UnreadCount.csv")
+        # Load the CSV (column-name variants are mapped by the adapter)
+        try:
+            with stage('load_csv'):
+                adapter, raw = open_export(self.unread_count_path, kind='sla')
+        except UnknownExportError as e:
+            logger.error(str(e))
             return None
+        count('sla_rows', len(raw))
         
         # Convert date/time columns
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Fix year issue: Convert 2025 dates to 2024
-        df['Date'] = df['Date'].apply(lambda x: x.replace(year=2024) if x.year == 2025 else x)
-        
-        df['Hour'] = pd.to_numeric(df['Hour'])
+        with stage('normalize_dates'):
+            df = adapter.canonicalize(raw)
+            
+            # Fix year issue: Convert 2025 dates to 2024
+            df['Date'] = self._shift_2025_to_2024(df['Date'])
+        
+        with stage('data_quality'):
+            df, quality = screen(adapter.kind, df, raw, self.unread_count_path, self.quarantine_dir)
+        record_counts([quality])
+        if df.empty:
+            logger.warning("No SLA rows passed the data-quality checks")
+            return None
         
         # Calculate SLA compliance
         df['SLA_Met'] = df['TotalUnread'] <= self.unread_threshold
@@ -267,20 +471,34 @@ class IntelligentIngester:
         logger.info(f"Processed {len(df)} SLA records")
         return df
         
+    @timed('merge')
     def merge_with_existing(self, existing_db, email_df, sla_df):
         """Intelligently merge new data with existing database."""
         logger.info("Merging new data with existing database")
         
         # Update metadata
         existing_db['metadata']['last_updated'] = datetime.now().isoformat()
+        touched_dates = set()
         
-        # Process email data by date
+        # Process email data by date: one bucketing pass at the configured resolution,
+        # hourly figures are downsampled from the buckets
+        self._day_series = {}
         if email_df is not None and not email_df.empty:
-            for date in email_df['inbox_timestamp'].dt.date.unique():
-                date_str = str(date)
-                
-                # Get emails for this date
-                day_emails = email_df[email_df['inbox_timestamp'].dt.date == date]
+            status = email_df['status']
+            minutes = pd.to_numeric(email_df['response_time_minutes'], errors='coerce').to_numpy(dtype=np.float64)
+            day_list, day_index, series = aggregate(
+                pd.to_datetime(email_df['inbox_timestamp']).to_numpy(dtype='datetime64[m]'),
+                (status == 'Replied').to_numpy(), minutes, self.resolution_minutes)
+            completed_counts = np.bincount(day_index, weights=(status == 'Completed').to_numpy(dtype=np.float64),
+                                           minlength=len(day_list))
+            answered = ~np.isnan(minutes)
+            day_minutes = pd.Series(minutes[answered]).groupby(day_index[answered])
+            day_means, day_medians = day_minutes.mean(), day_minutes.median()
+            hourly = downsample_series(series, self.resolution_minutes, 60)
+            
+            for i, date_str in enumerate(day_list):
+                touched_dates.add(date_str)
+                self._day_series[date_str] = {name: values[i] for name, values in series.items()}
                 
                 # Initialize or update day entry
                 if date_str not in existing_db['days']:
@@ -293,13 +511,12 @@ class IntelligentIngester:
                     }
                 else:
                     existing_db['days'][date_str]['has_email_data'] = True
+                stamp(existing_db['days'][date_str], EMAIL_FIELDS, self.config_hashes)
                 
                 # Calculate daily summary
-                total_emails = len(day_emails)
-                replied = len(day_emails[day_emails['status'] == 'Replied'])
-                completed = len(day_emails[day_emails['status'] == 'Completed'])
-                
-                response_times = day_emails[day_emails['response_time_minutes'].notna()]['response_time_minutes']
+                total_emails = int(series['emails_received'][i].sum())
+                replied = int(series['emails_replied'][i].sum())
+                completed = int(completed_counts[i])
                 
                 existing_db['days'][date_str]['daily_summary'].update({
                     'total_emails': total_emails,
@@ -307,33 +524,30 @@ class IntelligentIngester:
                     'completed_count': completed,
                     'pending_count': total_emails - replied - completed,
                     'reply_rate_percent': round((replied / total_emails * 100) if total_emails > 0 else 0, 1),
-                    'avg_response_time_minutes': round(response_times.mean(), 1) if not response_times.empty else None,
-                    'median_response_time_minutes': round(response_times.median(), 1) if not response_times.empty else None
+                    'avg_response_time_minutes': round(day_means[i], 1) if i in day_means.index else None,
+                    'median_response_time_minutes': round(day_medians[i], 1) if i in day_medians.index else None
                 })
                 
                 # Calculate hourly data
+                hour_entries = {h.get('hour'): h for h in existing_db['days'][date_str]['hourly_data']}
                 for hour in range(24):
-                    hour_emails = day_emails[day_emails['inbox_timestamp'].dt.hour == hour]
-                    hour_replied = hour_emails[hour_emails['status'] == 'Replied']
-                    
-                    hour_response_times = hour_emails[hour_emails['response_time_minutes'].notna()]['response_time_minutes']
-                    
-                    # Find or create hour entry
-                    hour_entry = next((h for h in existing_db['days'][date_str]['hourly_data'] if h.get('hour') == hour), None)
+                    hour_entry = hour_entries.get(hour)
                     if not hour_entry:
                         hour_entry = {'hour': hour}
                         existing_db['days'][date_str]['hourly_data'].append(hour_entry)
                     
+                    responses = int(hourly['responses'][i, hour])
                     hour_entry.update({
-                        'emails_received': len(hour_emails),
-                        'emails_replied': len(hour_replied),
-                        'avg_response_time': round(hour_response_times.mean(), 1) if not hour_response_times.empty else None
+                        'emails_received': int(hourly['emails_received'][i, hour]),
+                        'emails_replied': int(hourly['emails_replied'][i, hour]),
+                        'avg_response_time': round(hourly['response_sum'][i, hour] / responses, 1) if responses else None
                     })
         
         # Process SLA data
         if sla_df is not None and not sla_df.empty:
             for date in sla_df['Date'].dt.date.unique():
                 date_str = str(date)
+                touched_dates.add(date_str)
                 
                 # Get SLA data for this date
                 day_sla = sla_df[sla_df['Date'].dt.date == date]
@@ -349,21 +563,8 @@ class IntelligentIngester:
                     }
                 else:
                     existing_db['days'][date_str]['has_sla_data'] = True
-                
-                # Calculate daily SLA summary
-                business_hours_sla = day_sla[
-                    (day_sla['Hour'] >= self.business_start_hour) & 
-                    (day_sla['Hour'] < self.business_end_hour)
-                ]
-                
-                if not business_hours_sla.empty:
-                    sla_compliance = (business_hours_sla['SLA_Met'].sum() / len(business_hours_sla)) * 100
-                    avg_unread = business_hours_sla['TotalUnread'].mean()
-                    
-                    existing_db['days'][date_str]['daily_summary'].update({
-                        'sla_compliance_rate': round(sla_compliance, 1),
-                        'avg_unread_count': round(avg_unread, 1)
-                    })
+                    existing_db['days'][date_str].pop('sla_derived', None)
+                stamp(existing_db['days'][date_str], SLA_FIELDS, self.config_hashes)
                 
                 # Update hourly SLA data
                 for _, row in day_sla.iterrows():
@@ -379,6 +580,24 @@ class IntelligentIngester:
                         'unread_count': int(row['TotalUnread']),
                         'sla_met': bool(row['SLA_Met'])
                     })
+                    hour_entry.pop('unread_derived', None)
+                
+                # Calculate daily SLA summary from every reading of the day, so a file
+                # holding only some hours (e.g. a fixed quarantine file) keeps the others
+                business_hours_sla = [
+                    h for h in existing_db['days'][date_str]['hourly_data']
+                    if self.business_start_hour <= h.get('hour', -1) < self.business_end_hour
+                    and h.get('unread_count') is not None and not h.get('unread_derived')
+                ]
+                
+                if business_hours_sla:
+                    sla_compliance = sum(bool(h.get('sla_met')) for h in business_hours_sla) / len(business_hours_sla) * 100
+                    avg_unread = sum(h['unread_count'] for h in business_hours_sla) / len(business_hours_sla)
+                    
+                    existing_db['days'][date_str]['daily_summary'].update({
+                        'sla_compliance_rate': round(sla_compliance, 1),
+                        'avg_unread_count': round(avg_unread, 1)
+                    })
         
         # Sort hourly data
         for date_str in existing_db['days']:
@@ -396,23 +615,63 @@ class IntelligentIngester:
         
         # Update data sources
         existing_db['metadata']['data_sources'] = ['Complete_List_Raw.csv', 'UnreadCount.csv']
+        if not self.mailbox.is_default:
+            existing_db['metadata']['mailbox'] = self.mailbox.name
         
+        self.last_touched_dates = sorted(touched_dates)
+        count('days_touched', len(touched_dates))
         logger.info(f"Database now contains {len(all_dates)} days of data")
         return existing_db
         
+    def fill_backlog(self, database, email_df):
+        """Reconstruct unread counts for hours without an UnreadCount.csv reading.
+
+        The sweep covers every stored fact partition, with the days in email_df
+        taken from the frame (their partitions are only rewritten after the save).
+        """
+        new_days, arrivals, responses = [], [], []
+        if email_df is not None and not email_df.empty:
+            new_days = [str(d) for d in email_df['inbox_timestamp'].dt.date.unique()]
+            arrivals.append(pd.to_datetime(email_df['inbox_timestamp']).to_numpy(dtype='datetime64[s]'))
+            responses.append(pd.to_datetime(email_df['response_timestamp']).to_numpy(dtype='datetime64[s]'))
+        replaced = set(new_days)
+        stored_days = [d for d in self.fact_store.days() if d not in replaced]
+        stored = self.fact_store.read_days(stored_days)
+        sweep = BacklogSweep(np.concatenate([stored['inbox_ts']] + arrivals),
+                             np.concatenate([stored['response_ts']] + responses),
+                             stored_days + new_days)
+        if self._day_series:
+            # Backlog at the close of every bucket of the merged days
+            step = np.timedelta64(self.resolution_minutes, 'm')
+            days = sorted(self._day_series)
+            closes = (np.array(days, dtype='datetime64[D]').astype('datetime64[m]')[:, None]
+                      + np.arange(1, 1440 // self.resolution_minutes + 1) * step)
+            for date_str, row in zip(days, sweep.at(closes.ravel()).reshape(len(days), -1)):
+                self._day_series[date_str]['backlog'] = row
+        return fill_missing_hours(database, sweep, self.unread_threshold,
+                                  self.business_start_hour, self.business_end_hour)
+
     def save_database(self, database):
         """Save the updated database to JSON."""
         try:
-            with open(self.database_path, 'w') as f:
-                json.dump(database, f, indent=2, default=str)
+            with stage('serialize'):
+                payload = json.dumps(database, indent=2, default=str)
+            with stage('write'):
+                self.database_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.database_path, 'w') as f:
+                    f.write(payload)
             logger.info(f"Successfully saved database to {self.database_path}")
             return True
         except Exception as e:
             logger.error(f"Failed to save database: {e}")
             return False
             
-    def run(self):
-        """Main execution method."""
+    def run(self, database=None):
+        """Main execution method.
+        
+        If a database dict is passed it is merged into directly instead of
+        re-reading email_database.json (the watch daemon keeps it in memory).
+        """
         logger.info("=" * 60)
         logger.info("Starting Intelligent Email Data Ingestion")
         logger.info("=" * 60)
@@ -424,17 +683,25 @@ class IntelligentIngester:
             return False
         
         # Create backups of existing files
-        if self.database_path.exists():
-            self.create_backup(self.database_path, 'email_database')
-        
-        if self.complete_list_path.exists():
-            self.create_backup(self.complete_list_path, 'Complete_List_Raw')
-        
-        if self.unread_count_path.exists():
-            self.create_backup(self.unread_count_path, 'UnreadCount')
+        with stage('backup'):
+            if self.database_path.exists():
+                self.create_backup(self.database_path, 'email_database')
+            
+            if self.complete_list_path.exists():
+                self.create_backup(self.complete_list_path, 'Complete_List_Raw')
+            
+            if self.unread_count_path.exists():
+                self.create_backup(self.unread_count_path, 'UnreadCount')
         
         # Load existing database
-        database = self.load_existing_database()
+        if database is None:
+            with stage('load_database'):
+                database = self.load_existing_database()
+        
+        # Conversations already ingested can only be skipped if their facts are stored
+        self.incremental = (not self.full_reprocess and bool(self.fact_store.days())
+                            and any(day.get('has_email_data') for day in database.get('days', {}).values()))
+        self._export_event_keys = None
         
         # Process new data
         email_df = self.process_email_events()
@@ -443,8 +710,48 @@ class IntelligentIngester:
         # Merge with existing data
         updated_db = self.merge_with_existing(database, email_df, sla_df)
         
+        # Hours UnreadCount.csv never covered get a backlog rebuilt from the events
+        with stage('backlog'):
+            count('backlog_hours_derived', self.fill_backlog(updated_db, email_df))
+        
+        # Days computed under an older config: recompute only the fields the edit invalidated
+        with stage('recompute_derived'):
+            refresher = DerivedFieldRefresher(getattr(self, 'sla_config', None),
+                                              self.fact_store, self.series_store)
+            for field, days in refresher.refresh(updated_db).items():
+                count(f"recomputed_{field}", days)
+        
         # Save updated database
         if self.save_database(updated_db):
+            self.database = updated_db
+            
+            # Per-email facts for exact percentiles (one partition per inbox day)
+            with stage('write_facts'):
+                fact_days = self.fact_store.write_frame(
+                    email_df, conversation='conversation_code', inbox='inbox_timestamp',
+                    response='response_timestamp', status='status', minutes='response_time_minutes',
+                    conversation_coded=True)
+                self.dictionaries.save()
+            count('fact_partitions', len(fact_days))
+            
+            # Conversation rows and open items, folded forward with the days just written
+            with stage('conversation_state'):
+                count('conversation_state_days', self.conversation_state.update(self.fact_store, fact_days))
+            count('open_items', len(self.conversation_state.load()['open_since']))
+            
+            with stage('write_series'):
+                for date_str, series in self._day_series.items():
+                    self.series_store.write_day(date_str, series, self.resolution_minutes)
+            count('series_partitions', len(self._day_series))
+            
+            with stage('baselines'):
+                count('baseline_days', self.baselines.update(updated_db['days'], self.last_touched_dates))
+            
+            # Only now do this export's events count as ingested
+            if self._export_event_keys is not None:
+                with stage('save_seen_events'):
+                    self.seen_events.add(self._export_event_keys)
+                    count('seen_events_added', self.seen_events.save())
             logger.info("=" * 60)
             logger.info("Ingestion completed successfully!")
             logger.info(f"Database contains {updated_db['metadata']['total_days_processed']} days")
@@ -469,7 +776,34 @@ class IntelligentIngester:
         return False
 
 
+def main():
+    """Run a one-shot ingestion with a stage timing report in data/runs/."""
+    parser = argparse.ArgumentParser(description="Ingest data/ingest/ exports into the unified email database.")
+    parser.add_argument("--profile", action="store_true", help="Dump cProfile stats for the run to data/runs/.")
+    parser.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peaks per stage (slower).")
+    parser.add_argument("--full-reprocess", action="store_true",
+                        help="Ignore the seen-event index and rebuild every day in the export.")
+    parser.add_argument("--bloom-bits-per-key", type=int, default=0,
+                        help="Front the seen-event index with a Bloom filter of this many bits per key (0 = off).")
+    parser.add_argument("--mailbox", help="Mailbox to ingest (data/ingest/<mailbox>/). Default: the original layout.")
+    args = parser.parse_args()
+
+    try:
+        get_mailbox(args.mailbox)
+    except MailboxError as e:
+        logger.error(str(e))
+        return False
+
+    start_run('ingest', trace_memory=args.trace_memory)
+    with profiled(args.profile, 'ingest'):
+        ingester = IntelligentIngester(full_reprocess=args.full_reprocess,
+                                       bloom_bits_per_key=args.bloom_bits_per_key,
+                                       mailbox=args.mailbox)
+        success = ingester.run()
+    finish_run(emit=logger.info)
+    return success
+
+
 if __name__ == "__main__":
-    ingester = IntelligentIngester()
-    success = ingester.run()
+    success = main()
     exit(0 if success else 1)
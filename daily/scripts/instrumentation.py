@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Pipeline Instrumentation
+
+Lightweight stage timing and memory accounting shared by the ingest, classifier
+and dashboard scripts. A script starts a run, wraps its stages with the
+`stage()` context manager or the `@timed()` decorator, and finishes the run to
+write a structured JSON report to data/runs/.
+
+Key Features:
+- Wall and CPU time per stage, aggregated across repeated calls (e.g. one render per day)
+- Nested stages reported by path (e.g. "process_email_events/load_csv")
+- Opt-in per-stage tracemalloc peaks (`--trace-memory`) that stay correct when stages nest;
+  tracing slows allocation-heavy runs several times over, so it is off by default
+- Optional cProfile dump for a whole run (`--profile` in each script)
+- No-op when no run is active, so library callers pay nothing
+"""
+
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from lazy_imports import lazy_import
+
+# Only needed when memory tracing is on / a report is written
+platform = lazy_import('platform')
+tracemalloc = lazy_import('tracemalloc')
+
+RUNS_DIR = Path(__file__).resolve().parent.parent.parent / 'data' / 'runs'
+
+
+class _StageFrame:
+    __slots__ = ('path', 'wall_start', 'cpu_start', 'peak')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.peak = 0
+
+
+class RunReport:
+    """Collects stage timings, memory peaks and counters for one pipeline run."""
+
+    def __init__(self, run_name: str, trace_memory: bool = False):
+        self.run_name = run_name
+        self.trace_memory = trace_memory
+        self.started_at = datetime.now()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._stack: List[_StageFrame] = []
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, Any] = {}
+        self._started_tracemalloc = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage; nested stages are recorded under their parent's path."""
+        path = f"{self._stack[-1].path}/{name}" if self._stack else name
+        if self.trace_memory:
+            if self._stack:
+                # Bank the parent's running peak before resetting the shared counter
+                parent = self._stack[-1]
+                parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        frame = _StageFrame(path)
+        self._stack.append(frame)
+        try:
+            yield frame
+        finally:
+            wall = time.perf_counter() - frame.wall_start
+            cpu = time.process_time() - frame.cpu_start
+            if self.trace_memory:
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+
+            entry = self._stages.setdefault(path, {'stage': path, 'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_mem_mb': None})
+            entry['calls'] += 1
+            entry['wall_s'] += wall
+            entry['cpu_s'] += cpu
+            if self.trace_memory:
+                peak_mb = frame.peak / (1024 * 1024)
+                entry['peak_mem_mb'] = max(entry['peak_mem_mb'] or 0.0, peak_mb)
+
+    def count(self, key: str, value: Any):
+        """Record a counter (rows loaded, days touched, ...) in the report."""
+        self.counters[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages = []
+        for entry in self._stages.values():
+            stages.append({
+                **entry,
+                'wall_s': round(entry['wall_s'], 4),
+                'cpu_s': round(entry['cpu_s'], 4),
+                'peak_mem_mb': round(entry['peak_mem_mb'], 2) if entry['peak_mem_mb'] is not None else None,
+            })
+        overall_peak = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            overall_peak = round(max([s['peak_mem_mb'] or 0.0 for s in stages] + [0.0]), 2)
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'total_wall_s': round(time.perf_counter() - self._wall_start, 4),
+            'total_cpu_s': round(time.process_time() - self._cpu_start, 4),
+            'peak_mem_mb': overall_peak,
+            'python': platform.python_version(),
+            'argv': sys.argv[1:],
+            'pid': os.getpid(),
+            'stages': stages,
+            'counters': self.counters,
+        }
+
+    def write(self, runs_dir: Optional[Path] = None, data: Optional[Dict[str, Any]] = None) -> Path:
+        runs_dir = Path(runs_dir) if runs_dir else RUNS_DIR
+        runs_dir.mkdir(parents=True, exist_ok=True)
+        stamp = self.started_at.strftime('%Y%m%d_%H%M%S')
+        path = runs_dir / f"{self.run_name}_{stamp}_{os.getpid()}.json"
+        with open(path, 'w') as f:
+            json.dump(data if data is not None else self.to_dict(), f, indent=2, default=str)
+        return path
+
+    def close(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+_active_report: Optional[RunReport] = None
+
+
+def start_run(run_name: str, trace_memory: bool = False) -> RunReport:
+    """Begin collecting a run report; subsequent `stage()` calls record into it."""
+    global _active_report
+    if _active_report is not None:
+        _active_report.close()
+    _active_report = RunReport(run_name, trace_memory=trace_memory)
+    return _active_report
+
+
+def finish_run(runs_dir: Optional[Path] = None, write: bool = True,
+               emit: Optional[Callable[[str], Any]] = None) -> Optional[Path]:
+    """Close the active run and write its JSON report; returns the report path.
+
+    `emit` (e.g. logger.info or print) receives a short stage summary.
+    """
+    global _active_report
+    report = _active_report
+    if report is None:
+        return None
+    _active_report = None
+    data = report.to_dict()
+    path = report.write(runs_dir, data) if write else None
+    report.close()
+    if emit is not None:
+        emit(summarize(data))
+        if path is not None:
+            emit(f"Run report written to {path}")
+    return path
+
+
+def active_report() -> Optional[RunReport]:
+    return _active_report
+
+
+@contextmanager
+def stage(name: str):
+    """Time a stage within the active run (no-op when no run is active)."""
+    if _active_report is None:
+        yield None
+        return
+    with _active_report.stage(name) as frame:
+        yield frame
+
+
+def count(key: str, value: Any):
+    """Record a counter on the active run (no-op when no run is active)."""
+    if _active_report is not None:
+        _active_report.count(key, value)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator form of `stage()`; defaults to the function name."""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(enabled: bool, run_name: str, runs_dir: Optional[Path] = None, top: int = 25):
+    """Run the enclosed block under cProfile and dump stats next to the run reports."""
+    if not enabled:
+        yield None
+        return
+    # Imported here: pstats pulls in dataclasses/inspect, too costly for every CLI start
+    import cProfile
+    import io
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        runs_dir = Path(runs_dir) if runs_dir else RUNS_DIR
+        runs_dir.mkdir(parents=True, exist_ok=True)
+        stats_path = runs_dir / f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.prof"
+        profiler.dump_stats(str(stats_path))
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats('cumulative').print_stats(top)
+        print(buf.getvalue(), file=sys.stderr)
+        print(f"cProfile stats written to {stats_path} (inspect with: python -m pstats {stats_path})", file=sys.stderr)
+
+
+def summarize(report: Dict[str, Any]) -> str:
+    """Return a compact human-readable stage table for logs."""
+    lines = [f"Run '{report['run']}' took {report['total_wall_s']:.3f}s"]
+    for s in report['stages']:
+        mem = f"{s['peak_mem_mb']:.1f} MB" if s['peak_mem_mb'] is not None else "-"
+        lines.append(f"  {s['stage']:<45} {s['wall_s']:>9.3f}s  x{s['calls']:<4} peak {mem}")
+    return "\n".join(lines)
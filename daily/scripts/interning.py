@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Identifier Interning
+
+Replaces the long string identifiers in the exports with small integer codes
+while the ingester and the classifier work on them:
+
+    Conversation-Id   ~90-character base64 strings
+    MessageId         "<...@host>" strings
+    Emails            recipient lists
+
+Each column is encoded against a persisted string dictionary (code = position
+in the dictionary), so the same string gets the same code in every run and any
+code can be decoded later. Dictionaries live next to the JSON database they
+belong to: database/email_database_dictionaries/<name>.json. EventType and
+Status become pandas categoricals, so sorting, grouping and dedup all run on
+integers and frames hold 4 bytes per identifier instead of a Python string.
+
+Key Features:
+- Append-only dictionaries: existing codes never change
+- Each distinct string is looked up once per column (pd.factorize)
+- Missing values encode to MISSING (-1) and decode to None
+- Status categories share the code order of fact_table.STATUS_CODES
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+MISSING = -1
+CODE_DTYPE = 'int32'
+
+EVENT_TYPES = ('Inbox', 'Replied', 'Completed')
+STATUSES = ('Pending', 'Replied', 'Completed')
+
+# Canonical column -> dictionary name
+EVENT_INTERNED = {'Conversation-Id': 'conversation_id', 'MessageId': 'message_id', 'Emails': 'emails'}
+RECORD_INTERNED = {'conversation_id': 'conversation_id', 'inbox_message_id': 'message_id', 'inbox_emails': 'emails'}
+
+
+class StringDictionary:
+    """Append-only string <-> int code mapping, optionally persisted as a JSON list."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else None
+        self._strings: List[str] = []
+        if self.path is not None and self.path.exists():
+            with open(self.path, 'r') as f:
+                self._strings = json.load(f)
+        self._codes: Dict[str, int] = {s: i for i, s in enumerate(self._strings)}
+        self._saved_size = len(self._strings)
+        self._decode_table = None
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def code(self, value: Any) -> int:
+        """Code for one string, adding it to the dictionary if new."""
+        value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def encode(self, values: Any) -> Any:
+        """Encode a Series/array of strings to an int32 code array (missing -> MISSING)."""
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        # Trailing MISSING entry: factorize's -1 sentinel indexes it directly
+        lookup = np.fromiter((self.code(u) for u in uniques), dtype=CODE_DTYPE, count=len(uniques))
+        return np.append(lookup, np.array([MISSING], dtype=CODE_DTYPE))[codes]
+
+    def decode(self, codes: Any) -> Any:
+        """Decode an array of codes back to an object array of strings (MISSING -> None)."""
+        if self._decode_table is None or len(self._decode_table) != len(self._strings) + 1:
+            self._decode_table = np.array(self._strings + [None], dtype=object)
+        codes = np.asarray(codes, dtype=np.int64)
+        return self._decode_table[np.where(codes < 0, len(self._strings), codes)]
+
+    def save(self) -> bool:
+        """Write the dictionary if it grew since it was loaded; returns True if written."""
+        if self.path is None or len(self._strings) == self._saved_size:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.stem}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._strings, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self._saved_size = len(self._strings)
+        return True
+
+
+class DictionaryStore:
+    """The set of named dictionaries for one database (in memory only if root is None)."""
+
+    def __init__(self, root: Optional[Union[str, Path]] = None):
+        self.root = Path(root) if root else None
+        self._dictionaries: Dict[str, StringDictionary] = {}
+
+    def __getitem__(self, name: str) -> StringDictionary:
+        if name not in self._dictionaries:
+            path = self.root / f"{name}.json" if self.root is not None else None
+            self._dictionaries[name] = StringDictionary(path)
+        return self._dictionaries[name]
+
+    def save(self) -> List[str]:
+        """Persist every dictionary that grew; returns their names."""
+        return [name for name, d in self._dictionaries.items() if d.save()]
+
+
+def dictionary_store_for(database_path: Union[str, Path]) -> DictionaryStore:
+    """Return the dictionary store that sits next to a JSON database file."""
+    path = Path(database_path).resolve()
+    return DictionaryStore(path.with_name(f"{path.stem}_dictionaries"))
+
+
+def intern_columns(df: Any, store: DictionaryStore, columns: Dict[str, str]) -> Any:
+    """Replace each present column with its int32 codes, in place; returns df."""
+    for column, name in columns.items():
+        if column in df.columns:
+            df[column] = store[name].encode(df[column])
+    return df
+
+
+def as_categorical(values: Any, categories: tuple) -> Any:
+    """Categorical Series with a fixed category order (unknown values become NaN)."""
+    return pd.Series(pd.Categorical(values, categories=list(categories)),
+                     index=getattr(values, 'index', None), name=getattr(values, 'name', None))
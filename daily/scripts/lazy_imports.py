@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Lazy Module Imports
+
+Defers heavy third-party imports (pandas, numpy) until the first attribute
+access, so scripts that only sometimes need them (ingestion with no input
+files, the idle watch daemon, listing/validation CLIs) start in pure-stdlib
+mode. Usage:
+
+    from lazy_imports import lazy_import
+    pd = lazy_import('pandas')   # nothing imported yet
+    pd.read_csv(...)             # pandas imported here, once
+"""
+
+import importlib
+import sys
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return the module if it is already imported, otherwise a LazyModule proxy."""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Mailboxes
+
+The mailbox dimension shared by ingestion, the dashboards and the multi-mailbox
+runner. Every path a pipeline stage reads or writes is derived from a Mailbox:
+
+    mailbox    ingest folder           database                                          config overlay
+    default    data/ingest/            database/email_database.json                      -
+    <name>     data/ingest/<name>/     database/mailboxes/<name>/email_database.json     config/mailboxes/<name>.json
+    combined   (built from the others) database/mailboxes/combined/email_database.json  config/mailboxes/combined.json
+
+The default mailbox keeps the original single-mailbox layout, so existing
+commands behave exactly as before. A named mailbox is registered by creating
+its config overlay (config/mailboxes/<name>.json, which may be just "{}") or
+its ingest folder (data/ingest/<name>/). An overlay only lists the settings
+that differ; it is deep-merged over config/sla_config.json. The fact table,
+identifier dictionaries and seen-event index sit next to each mailbox's
+database, so mailboxes never share state. Dashboards go to
+daily|weekly/dashboard/output/mailboxes/<name>/.
+
+Key Features:
+- Config overlays: per-mailbox business hours, thresholds and targets
+- Storage partitioned per mailbox (database, facts, dictionaries, seen events, quarantine)
+- "combined" is a derived mailbox aggregating all the others
+- Standard library only, so listing/validation CLIs stay fast to start
+"""
+
+import copy
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+DEFAULT_MAILBOX = 'default'
+COMBINED_MAILBOX = 'combined'
+RESERVED_NAMES = (DEFAULT_MAILBOX, COMBINED_MAILBOX)
+INPUT_NAMES = ('Complete_List_Raw.csv', 'UnreadCount.csv')
+
+_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+class MailboxError(ValueError):
+    """Raised for invalid or unknown mailbox names."""
+
+
+def deep_merge(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of base with overlay merged in (nested dicts merge, everything else replaces)."""
+    merged = copy.deepcopy(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def read_config(base_path: Union[str, Path], overlay_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """Load the base SLA config and deep-merge a mailbox overlay over it, if one exists.
+
+    Errors reading the base file propagate (callers keep their own fallbacks).
+    """
+    with open(base_path, 'r') as f:
+        config = json.load(f)
+    if overlay_path is not None and Path(overlay_path).exists():
+        with open(overlay_path, 'r') as f:
+            config = deep_merge(config, json.load(f))
+    return config
+
+
+class Mailbox:
+    """Paths and configuration of one mailbox."""
+
+    def __init__(self, name: Optional[str] = None, project_root: Optional[Union[str, Path]] = None):
+        self.name = name or DEFAULT_MAILBOX
+        if not _NAME_PATTERN.match(self.name):
+            raise MailboxError(f"Invalid mailbox name '{self.name}' (letters, digits, '.', '_' and '-' only)")
+        self.project_root = Path(project_root) if project_root else PROJECT_ROOT
+
+    def __repr__(self) -> str:
+        return f"Mailbox({self.name!r})"
+
+    @property
+    def is_default(self) -> bool:
+        return self.name == DEFAULT_MAILBOX
+
+    @property
+    def is_combined(self) -> bool:
+        return self.name == COMBINED_MAILBOX
+
+    def _partition(self, base: Path) -> Path:
+        return base if self.is_default else base / 'mailboxes' / self.name
+
+    @property
+    def ingest_dir(self) -> Path:
+        base = self.project_root / 'data' / 'ingest'
+        return base if self.is_default else base / self.name
+
+    @property
+    def backup_dir(self) -> Path:
+        base = self.project_root / 'data' / 'backup'
+        return base if self.is_default else base / self.name
+
+    @property
+    def quarantine_dir(self) -> Path:
+        base = self.project_root / 'data' / 'quarantine'
+        return base if self.is_default else base / self.name
+
+    @property
+    def database_path(self) -> Path:
+        return self._partition(self.project_root / 'database') / 'email_database.json'
+
+    @property
+    def config_path(self) -> Path:
+        """The shared base SLA config."""
+        return self.project_root / 'config' / 'sla_config.json'
+
+    @property
+    def overlay_path(self) -> Optional[Path]:
+        """This mailbox's overlay file (None for the default mailbox)."""
+        return None if self.is_default else self.project_root / 'config' / 'mailboxes' / f"{self.name}.json"
+
+    @property
+    def config_files(self) -> List[Path]:
+        return [p for p in (self.config_path, self.overlay_path) if p is not None]
+
+    @property
+    def daily_output_dir(self) -> Path:
+        return self._partition(self.project_root / 'daily' / 'dashboard' / 'output')
+
+    @property
+    def weekly_output_dir(self) -> Path:
+        return self._partition(self.project_root / 'weekly' / 'dashboard' / 'output')
+
+    def load_config(self) -> Dict[str, Any]:
+        return read_config(self.config_path, self.overlay_path)
+
+    def pending_inputs(self) -> List[str]:
+        return [name for name in INPUT_NAMES if (self.ingest_dir / name).exists()]
+
+
+def discover_mailboxes(project_root: Optional[Union[str, Path]] = None, include_default: bool = True) -> List[str]:
+    """Names of all mailboxes, sorted, without "combined".
+
+    Named mailboxes come from config/mailboxes/*.json and data/ingest/<name>/
+    folders. The default mailbox is included when it has a database or pending
+    input files.
+    """
+    root = Path(project_root) if project_root else PROJECT_ROOT
+    names = set()
+    overlay_dir = root / 'config' / 'mailboxes'
+    if overlay_dir.exists():
+        names.update(p.stem for p in overlay_dir.glob('*.json'))
+    ingest_dir = root / 'data' / 'ingest'
+    if ingest_dir.exists():
+        names.update(p.name for p in ingest_dir.iterdir() if p.is_dir() and not p.name.startswith('.'))
+    names = sorted(n for n in names if n not in RESERVED_NAMES and _NAME_PATTERN.match(n))
+
+    default = Mailbox(DEFAULT_MAILBOX, root)
+    if include_default and (default.database_path.exists() or default.pending_inputs()):
+        names.insert(0, DEFAULT_MAILBOX)
+    return names
+
+
+def get_mailbox(name: Optional[str] = None, project_root: Optional[Union[str, Path]] = None) -> Mailbox:
+    """Return a Mailbox, checking that a named one is registered."""
+    mailbox = Mailbox(name, project_root)
+    if mailbox.is_default or mailbox.is_combined:
+        return mailbox
+    if mailbox.name not in discover_mailboxes(project_root, include_default=False):
+        raise MailboxError(f"Unknown mailbox '{mailbox.name}': create {mailbox.overlay_path} "
+                           f"or {mailbox.ingest_dir}/ to register it")
+    return mailbox
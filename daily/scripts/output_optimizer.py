@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Dashboard Output Optimizer
+
+Output stage for dashboards served from a static host. Before a rendered
+dashboard is written it is minified, and precompressed siblings are written
+next to it (email_dashboard_<date>.html.gz / .html.br), so a static server
+can send the compressed bytes as-is (nginx gzip_static / brotli_static,
+Caddy precompressed, S3/CloudFront with Content-Encoding).
+
+Minification only removes bytes a browser ignores:
+- HTML comments, and runs of whitespace in text and between attributes
+  (collapsed to a single space, so inline layout is unchanged)
+- CSS comments and whitespace around { } ; , > and after ':'
+- SVG geometry (d, points, x/y/cx/cy/... inside <svg>) rounded to
+  `svg_precision` decimals, trailing zeros and spaces around path commands dropped
+<script>, <pre> and <textarea> contents and quoted attribute values (other
+than SVG geometry) are copied verbatim.
+
+With "stylesheet": "external" the <style> blocks in <head> are moved to a
+content-hashed assets/dashboard.<hash>.css next to the written file and
+replaced by a <link>. Every dashboard rendered from the same template links
+the same file, so browsers and proxies cache it once (the name changes
+whenever the CSS does). Rules referencing in-document SVG paint servers
+(url(#gradient)) stay inline: in an external sheet they would resolve against
+the stylesheet's URL in some browsers.
+
+Configured in sla_config.json:
+
+    "output": {"minify": true, "svg_precision": 1, "precompress": ["gz", "br"],
+               "stylesheet": "external"}
+
+Without an "output" section dashboards are written exactly as rendered.
+Brotli needs the optional `brotli` package; without it only .gz is written.
+
+Key Features:
+- One regex pass per region type; no HTML parser dependency
+- Deterministic output (gzip mtime 0), so unchanged dashboards produce identical files
+- Per-file report: rendered, minified, gzip and brotli bytes and the transfer saved
+- Shared stylesheets are written once per output folder (and precompressed like the pages)
+- CLI: optimize already-rendered dashboards in place
+
+Usage:
+    python3 daily/scripts/output_optimizer.py                   # daily + weekly output folders
+    python3 daily/scripts/output_optimizer.py path/to/file.html --precision 0 --formats gz
+    python3 daily/scripts/output_optimizer.py --external-css
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+DEFAULT_PRECISION = 1
+COMPRESSED_SUFFIXES = {'gz': '.gz', 'br': '.br'}
+STYLESHEET_MODES = ('inline', 'external')
+ASSET_DIR = 'assets'
+
+_RAW_BLOCK = re.compile(r'(<(script|pre|textarea)\b[^>]*>.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_STYLE_BLOCK = re.compile(r'(<style\b[^>]*>)(.*?)(</style\s*>)', re.IGNORECASE | re.DOTALL)
+_SVG_BLOCK = re.compile(r'(<svg\b.*?</svg\s*>)', re.IGNORECASE | re.DOTALL)
+_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+# A whole tag, or a whitespace run in text that is longer than one plain space
+_TAG_OR_SPACE = re.compile(r'(<[^>]+>)|\s{2,}|[\t\n\r\f]')
+_LOOSE_SPACE = re.compile(r'\s{2,}|[\t\n\r\f]')
+_QUOTED = re.compile(r'("[^"]*"|\'[^\']*\')')
+_WHITESPACE = re.compile(r'\s+')
+_ROUNDING_PATTERNS: Dict[int, Any] = {}
+_PATH_COMMAND_SPACE = re.compile(r'\s+(?=[MmLlHhVvCcSsQqTtAaZz])|(?<=[MmLlHhVvCcSsQqTtAaZz])\s+')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_TIGHT = '{};,>'
+SVG_GEOMETRY_ATTRIBUTES = ('d', 'points', 'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'transform')
+_HEAD_END = re.compile(r'</head\s*>', re.IGNORECASE)
+_LOCAL_URL = re.compile(r'url\(\s*[\'"]?#')
+_GEOMETRY = re.compile(r'(\s(?:%s)\s*=\s*)("[^"]*"|\'[^\']*\')' % '|'.join(SVG_GEOMETRY_ATTRIBUTES), re.IGNORECASE)
+
+
+def output_options(config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The "output" section of an SLA config with defaults filled in, or None if absent."""
+    section = (config or {}).get('output')
+    if not section:
+        return None
+    formats = section.get('precompress', ['gz', 'br'])
+    unknown = set(formats) - set(COMPRESSED_SUFFIXES)
+    if unknown:
+        raise ValueError(f"Unknown precompress format(s): {', '.join(sorted(unknown))} (use gz, br)")
+    stylesheet = section.get('stylesheet', 'inline')
+    if stylesheet not in STYLESHEET_MODES:
+        raise ValueError(f"Unknown stylesheet mode '{stylesheet}' (use {' or '.join(STYLESHEET_MODES)})")
+    return {
+        'minify': bool(section.get('minify', True)),
+        'svg_precision': int(section.get('svg_precision', DEFAULT_PRECISION)),
+        'precompress': list(formats),
+        'stylesheet': stylesheet,
+    }
+
+
+def format_number(value: float, precision: int) -> str:
+    text = f"{value:.{precision}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text in ('-0', '') else text
+
+
+def _rounding_pattern(precision: int) -> Any:
+    """Decimals that rounding would change: more than `precision` digits, or a trailing zero."""
+    pattern = _ROUNDING_PATTERNS.get(precision)
+    if pattern is None:
+        pattern = re.compile(rf'(-?\d*\.(?:\d{{{precision + 1},}}|\d{{0,{precision}}}(?<=0))(?:[eE][-+]?\d+)?)(?!\d)')
+        _ROUNDING_PATTERNS[precision] = pattern
+    return pattern
+
+
+def round_numbers(text: str, precision: int) -> str:
+    """Round every decimal number in `text` (integers and short decimals are already minimal)."""
+    parts = _rounding_pattern(precision).split(text)
+    # split() with one group alternates [other, number, other, ...]
+    parts[1::2] = [format_number(float(number), precision) for number in parts[1::2]]
+    return ''.join(parts)
+
+
+def minify_css(css: str) -> str:
+    parts = _QUOTED.split(_CSS_COMMENT.sub('', css))
+    for i in range(0, len(parts), 2):  # even parts are outside quoted strings
+        part = _WHITESPACE.sub(' ', parts[i])
+        for char in _CSS_TIGHT:
+            part = part.replace(f' {char}', char).replace(f'{char} ', char)
+        parts[i] = part.replace(': ', ':')
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def _css_statements(css: str) -> List[str]:
+    """Split a stylesheet into top-level statements (rules, at-rule blocks, @import lines)."""
+    statements, depth, start, i = [], 0, 0, 0
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            i = css.find(char, i + 1)
+            if i < 0:
+                break
+        elif css.startswith('/*', i):
+            i = css.find('*/', i + 2) + 1
+            if i <= 0:
+                break
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                statements.append(css[start:i + 1])
+                start = i + 1
+        elif char == ';' and depth == 0:
+            statements.append(css[start:i + 1])
+            start = i + 1
+        i += 1
+    if css[start:].strip():
+        statements.append(css[start:])
+    return statements
+
+
+@lru_cache(maxsize=32)
+def split_stylesheet(css: str, minify: bool) -> Tuple[str, str]:
+    """(shareable CSS, CSS that must stay inline) for one template's stylesheet.
+
+    Cached: every render of a template carries the same stylesheet.
+    """
+    shared, local = [], []
+    for statement in _css_statements(css):
+        (local if _LOCAL_URL.search(statement) else shared).append(statement)
+    shared_css, local_css = ''.join(shared), ''.join(local)
+    if minify:
+        return minify_css(shared_css), minify_css(local_css)
+    return shared_css.strip() + '\n', local_css.strip()
+
+
+def stylesheet_name(css: bytes) -> str:
+    return f"dashboard.{hashlib.sha256(css).hexdigest()[:12]}.css"
+
+
+def extract_stylesheet(html: str, minify: bool = False) -> Tuple[str, Optional[str]]:
+    """Move the <head> <style> blocks into a shared stylesheet.
+
+    Returns the HTML linking assets/<name> and the stylesheet text, or the
+    HTML unchanged and None when the head has nothing to share (no <style>
+    block, or only rules that must stay inline, as on a page that was
+    already externalized). A page already linking the asset is not linked twice.
+    """
+    head_end = _HEAD_END.search(html)
+    head = html[:head_end.start()] if head_end else ''
+    blocks = list(_STYLE_BLOCK.finditer(head))
+    if not blocks:
+        return html, None
+    shared, local = split_stylesheet(''.join(block.group(2) for block in blocks), minify)
+    if not shared.strip():
+        return html, None
+    href = f"{ASSET_DIR}/{stylesheet_name(shared.encode('utf-8'))}"
+    tags = [] if f'href="{href}"' in head else [f'<link rel="stylesheet" href="{href}">']
+    if local:
+        tags.append(f"{blocks[0].group(1)}{local}{blocks[0].group(3)}")
+    link = '\n'.join(tags)
+    out, position = [], 0
+    for n, block in enumerate(blocks):
+        out.append(html[position:block.start()])
+        if n == 0:
+            out.append(link)
+        position = block.end()
+    out.append(html[position:])
+    return ''.join(out), shared
+
+
+def _round_geometry(precision: int):
+    def replace(match):
+        attribute = match.group(1).strip().rstrip('=').rstrip().lower()
+        quote, value = match.group(2)[0], round_numbers(match.group(2)[1:-1], precision)
+        if attribute == 'd':
+            value = _PATH_COMMAND_SPACE.sub('', value)
+        return f'{match.group(1)}{quote}{value.strip()}{quote}'
+    return replace
+
+
+def _minify_tag(tag: str) -> str:
+    """Collapse whitespace between attributes (quoted values are kept verbatim)."""
+    if _LOOSE_SPACE.search(tag):
+        parts = _QUOTED.split(tag)
+        for i in range(0, len(parts), 2):
+            parts[i] = _WHITESPACE.sub(' ', parts[i])
+        tag = ''.join(parts)
+    if tag.endswith(' >') or tag.endswith(' />'):
+        tag = tag[:-3].rstrip() + tag[-2:] if tag.endswith(' />') else tag[:-2].rstrip() + '>'
+    return tag
+
+
+def _minify_markup(html: str, svg_precision: Optional[int]) -> str:
+    """Minify tags and text outside raw blocks in one pass."""
+    if svg_precision is not None:
+        html = _GEOMETRY.sub(_round_geometry(svg_precision), html)
+    return _TAG_OR_SPACE.sub(lambda m: ' ' if m.group(1) is None else _minify_tag(m.group(1)), html)
+
+
+def minify_html(html: str, svg_precision: Optional[int] = DEFAULT_PRECISION) -> str:
+    """Minify a rendered dashboard; svg_precision=None leaves SVG numbers as rendered."""
+    html = _COMMENT.sub('', html)
+    out = []
+    for i, chunk in enumerate(_RAW_BLOCK.split(html)):
+        # split() yields [text, raw block, tag name, text, ...]
+        if i % 3 == 1:
+            out.append(chunk)
+            continue
+        if i % 3 == 2:
+            continue
+        for j, region in enumerate(_SVG_BLOCK.split(chunk)):
+            if j % 2:
+                out.append(_minify_markup(region, svg_precision))
+                continue
+            style_parts = _STYLE_BLOCK.split(region)
+            for k in range(0, len(style_parts), 4):
+                out.append(_minify_markup(style_parts[k], None))
+                if k + 3 < len(style_parts):
+                    out.append(style_parts[k + 1] + minify_css(style_parts[k + 2]) + style_parts[k + 3])
+    return ''.join(out).strip()
+
+
+def compress(data: bytes, encoding: str) -> Optional[bytes]:
+    """gzip or brotli bytes at maximum quality, or None if brotli is unavailable."""
+    if encoding == 'gz':
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+class OptimizedOutput:
+    """A rendered dashboard minified and compressed once, writable to several paths."""
+
+    def __init__(self, html: str, options: Optional[Dict[str, Any]]):
+        self.rendered_bytes = len(html.encode('utf-8'))
+        self.options = options or {}
+        minify = self.options.get('minify', False)
+        self.stylesheet: Optional[bytes] = None
+        if self.options.get('stylesheet') == 'external':
+            html, css = extract_stylesheet(html, minify)
+            self.stylesheet = None if css is None else css.encode('utf-8')
+        if minify:
+            html = minify_html(html, options['svg_precision'])
+        self.data = html.encode('utf-8')
+        self.siblings: Dict[str, Optional[bytes]] = {
+            encoding: compress(self.data, encoding) for encoding in self.options.get('precompress', [])
+        }
+
+    def write(self, path: Union[str, Path]) -> Dict[str, Any]:
+        """Write the file and its compressed siblings; returns the size report.
+
+        Siblings that are not (or can no longer be) produced are removed, so a
+        static server never sends a stale compressed copy.
+        """
+        path = Path(path)
+        with open(path, 'wb') as f:
+            f.write(self.data)
+        report = {'path': str(path), 'rendered_bytes': self.rendered_bytes, 'minified_bytes': len(self.data)}
+        for encoding, suffix in COMPRESSED_SUFFIXES.items():
+            sibling = path.with_name(path.name + suffix)
+            compressed = self.siblings.get(encoding)
+            if encoding in self.siblings:
+                report[f'{encoding}_bytes'] = None if compressed is None else len(compressed)
+            if compressed is None:
+                sibling.unlink(missing_ok=True)
+                continue
+            with open(sibling, 'wb') as f:
+                f.write(compressed)
+        if self.stylesheet is not None:
+            report['stylesheet'] = self._write_stylesheet(path.parent / ASSET_DIR)
+            report['stylesheet_bytes'] = len(self.stylesheet)
+        return report
+
+    def _write_stylesheet(self, directory: Path) -> str:
+        """Write the shared stylesheet and its siblings, skipping files that already exist.
+
+        Content-hashed names mean an existing file already holds these bytes.
+        """
+        name = stylesheet_name(self.stylesheet)
+        target = directory / name
+        files = [(target, None)] + [(target.with_name(name + COMPRESSED_SUFFIXES[encoding]), encoding)
+                                    for encoding in self.options.get('precompress', [])]
+        directory.mkdir(parents=True, exist_ok=True)
+        # Written atomically: parallel render workers never see a partial asset
+        for file_path, encoding in files:
+            if file_path.exists():
+                continue
+            data = self.stylesheet if encoding is None else compress(self.stylesheet, encoding)
+            if data is None:
+                continue
+            tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, file_path)
+        return name
+
+
+def write_output(path: Union[str, Path], html: str, options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write a dashboard (minified and precompressed per options) and return its size report."""
+    return OptimizedOutput(html, options).write(path)
+
+
+def transfer_bytes(report: Dict[str, Any]) -> int:
+    """Smallest encoding a client could be sent."""
+    sizes = [report['minified_bytes']] + [report.get(f'{e}_bytes') for e in COMPRESSED_SUFFIXES]
+    return min(s for s in sizes if s is not None)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    rendered, transfer = report['rendered_bytes'], transfer_bytes(report)
+    encoded = ', '.join(f"{e} {report[f'{e}_bytes']:,}" if report.get(f'{e}_bytes') is not None else f"{e} n/a"
+                        for e in COMPRESSED_SUFFIXES if f'{e}_bytes' in report)
+    saved = 100 * (1 - transfer / rendered) if rendered else 0.0
+    shared = f"; shared {report['stylesheet']}" if report.get('stylesheet') else ''
+    return (f"{Path(report['path']).name}: {rendered:,} -> {report['minified_bytes']:,} bytes minified"
+            f"{f' ({encoded})' if encoded else ''}, {rendered - transfer:,} bytes saved ({saved:.1f}%){shared}")
+
+
+def _dashboard_files(paths: Iterable[Path]) -> List[Path]:
+    files = []
+    for path in paths:
+        files.extend(sorted(path.rglob('*.html')) if path.is_dir() else [path])
+    return files
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Minify rendered dashboards and write .gz/.br siblings.")
+    parser.add_argument("paths", nargs='*', type=Path,
+                        help="Files or folders (default: daily and weekly dashboard output folders).")
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION,
+                        help="Decimals kept in SVG coordinates (default: %(default)s).")
+    parser.add_argument("--formats", default="gz,br", help="Precompressed siblings to write (default: %(default)s).")
+    parser.add_argument("--no-minify", action="store_true", help="Only write compressed siblings.")
+    parser.add_argument("--external-css", action="store_true",
+                        help="Move inline stylesheets to shared assets/dashboard.<hash>.css files.")
+    args = parser.parse_args(argv)
+
+    try:
+        options = output_options({'output': {'minify': not args.no_minify, 'svg_precision': args.precision,
+                                             'precompress': [f for f in args.formats.split(',') if f],
+                                             'stylesheet': 'external' if args.external_css else 'inline'}})
+    except ValueError as e:
+        parser.error(str(e))
+    paths = args.paths or [PROJECT_ROOT / 'daily' / 'dashboard' / 'output',
+                           PROJECT_ROOT / 'weekly' / 'dashboard' / 'output']
+    files = _dashboard_files(p for p in paths if p.exists())
+    if not files:
+        print("No dashboard HTML files found")
+        return 1
+
+    rendered_total = transfer_total = 0
+    for path in files:
+        # Re-running is harmless: minified and externalized output is a fixed point
+        report = write_output(path, path.read_text(encoding='utf-8'), options)
+        rendered_total += report['rendered_bytes']
+        transfer_total += transfer_bytes(report)
+        print(format_report(report))
+    if 'br' in options['precompress'] and compress(b'', 'br') is None:
+        print("Note: brotli is not installed (pip install brotli); .br files were not written")
+    print(f"{len(files)} files: {rendered_total:,} -> {transfer_total:,} bytes per full transfer")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
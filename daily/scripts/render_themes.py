@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Multi-Theme Renderer
+
+Renders the daily dashboard in any number of templates/themes from the cached
+per-day context (see context_cache.py). The context is computed at most once
+per day; every theme after that, and every later run while the day's data is
+unchanged, renders straight from data/cache/contexts/ without reading the
+database or redoing the percentile and SVG math. Renders run in parallel
+worker processes, each reading the cached context file itself.
+
+Outputs:
+    daily/kpi_cards.html   daily/dashboard/output/email_dashboard_<date>.html
+    themes/<name>.html     daily/dashboard/output/themes/<name>/email_dashboard_<date>.html
+(under output/mailboxes/<mailbox>/ for a named mailbox)
+
+Key Features:
+- --themes all (every theme plus the default template) or a comma list
+- Themes are the templates in daily/dashboard/templates/themes/ (see rendering.py), e.g.
+  "light", ported from the Themes/chatgpt5-light.html mockup
+- --from/--to renders a date range; days without SLA data are skipped
+- One process-pool task per (date, theme); --workers 1 renders inline
+- Reports cache hits, recomputed contexts and render time
+- Output minified and precompressed per the SLA config's "output" section (output_optimizer.py)
+
+Usage:
+    python3 daily/scripts/render_themes.py --themes all
+    python3 daily/scripts/render_themes.py --date 2025-08-13 --themes daily/kpi_cards.html,light
+    python3 daily/scripts/render_themes.py --from 2025-08-01 --to 2025-08-31 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backlog import has_sla
+from context_cache import ContextCache, load_context
+from generate_dashboard import DashboardGenerator
+from instrumentation import stage, count, start_run, finish_run
+from mailboxes import Mailbox, MailboxError, get_mailbox
+from output_optimizer import transfer_bytes, write_output
+import rendering
+
+
+def theme_names(spec: str) -> List[str]:
+    """Template names for a --themes value ('all' or comma-separated names/shorthands)."""
+    available = rendering.available_templates()
+    selectable = [rendering.DAILY_TEMPLATE] + [name for name in available if name.startswith('themes/')]
+    if spec == 'all':
+        return selectable
+    names = []
+    for item in (part.strip() for part in spec.split(',')):
+        if not item:
+            continue
+        name = item if '/' in item else rendering.resolve_template_name(item)
+        if name not in selectable:
+            raise ValueError(f"Unknown theme '{item}' (available: {', '.join(selectable)})")
+        names.append(name)
+    return names
+
+
+def output_path(mailbox: Mailbox, template: str, date_str: str) -> Path:
+    """Where a day's dashboard in a given template is written."""
+    directory = mailbox.daily_output_dir
+    if template != rendering.DAILY_TEMPLATE:
+        directory = directory / 'themes' / Path(template).stem
+    return directory / f"email_dashboard_{date_str}.html"
+
+
+def render_theme(template: str, context_path: str, target_path: str,
+                 options: Optional[Dict[str, Any]] = None) -> Tuple[str, str, float, Dict[str, Any]]:
+    """Render one template from a cached context file (runs in a worker).
+    `options` are the SLA config's output options (minify/precompress)."""
+    started = time.perf_counter()
+    html = rendering.render(template, load_context(Path(context_path)))
+    target = Path(target_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    report = write_output(target, html, options)
+    return template, target_path, (time.perf_counter() - started) * 1000, report
+
+
+def dates_to_render(cache: ContextCache, args: argparse.Namespace) -> List[str]:
+    """Requested dates (the latest complete day by default), skipping days without SLA data."""
+    if args.date:
+        return [args.date]
+    if args.start or args.end:
+        days = cache.database.get('days', {})
+        start_date = date.fromisoformat(args.start or min(days))
+        end_date = date.fromisoformat(args.end or max(days))
+        dates = []
+        current = start_date
+        while current <= end_date:
+            day = days.get(current.isoformat())
+            if day and has_sla(day):
+                dates.append(current.isoformat())
+            current += timedelta(days=1)
+        return dates
+    latest, _ = cache.generator.get_latest_complete_day(cache.database)
+    return [latest]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render daily dashboards in several themes from one cached context.")
+    parser.add_argument("--date", help="Day to render (YYYY-MM-DD). Default: the latest complete day.")
+    parser.add_argument("--from", dest="start", help="First day of a range to render (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="end", help="Last day of a range to render (YYYY-MM-DD).")
+    parser.add_argument("--themes", default="all",
+                        help="'all' or comma-separated templates/themes, e.g. daily/kpi_cards.html,light. Default: all.")
+    parser.add_argument("--mailbox", help="Mailbox to render (a configured name or 'combined'). Default: the original layout.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Parallel render processes (default: CPU count; 1 renders inline).")
+    parser.add_argument("--refresh", action="store_true", help="Recompute contexts even if cached.")
+    args = parser.parse_args(argv)
+
+    try:
+        mailbox = get_mailbox(args.mailbox)
+        templates = theme_names(args.themes)
+    except (MailboxError, ValueError) as e:
+        parser.error(str(e))
+
+    start_run('render_themes', trace_memory=False)
+    started = time.perf_counter()
+    generator = DashboardGenerator(
+        json_path=str(mailbox.database_path),
+        template_path=rendering.DAILY_TEMPLATE,
+        output_path=str(mailbox.daily_output_dir),
+        sla_config_path=str(mailbox.config_path),
+        sla_config_overlay_path=str(mailbox.overlay_path) if mailbox.overlay_path else None,
+    )
+    cache = ContextCache(generator, mailbox)
+    options = generator.get_output_options()
+
+    tasks = []
+    statuses = {'hit': 0, 'revalidated': 0, 'computed': 0}
+    with stage('contexts'):
+        try:
+            dates = dates_to_render(cache, args)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        for date_str in dates:
+            try:
+                _, status = cache.get(date_str, refresh=args.refresh)
+            except ValueError as e:
+                print(f"Skipping {date_str}: {e}", file=sys.stderr)
+                continue
+            statuses[status] += 1
+            context_path = str(cache.entry_path(date_str))
+            tasks.extend((template, context_path, str(output_path(mailbox, template, date_str)), options)
+                         for template in templates)
+    for status, n in statuses.items():
+        count(f"contexts_{status}", n)
+
+    failures = 0
+    with stage('render'):
+        if args.workers <= 1 or len(tasks) <= 1:
+            results = [render_theme(*task) for task in tasks]
+        else:
+            results = []
+            with ProcessPoolExecutor(max_workers=min(args.workers, len(tasks))) as pool:
+                futures = {pool.submit(render_theme, *task): task for task in tasks}
+                for future in as_completed(futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        failures += 1
+                        print(f"Failed to render {futures[future][0]} -> {futures[future][2]}: {e}", file=sys.stderr)
+    count('rendered', len(results))
+
+    for template, target, ms, report in sorted(results, key=lambda r: r[1]):
+        size = f"{transfer_bytes(report):>8,} bytes" if options else ''
+        print(f"  {template:<30} {ms:7.1f}ms {size}  {target}")
+    print(f"Contexts: {statuses['hit']} cached, {statuses['revalidated']} revalidated, "
+          f"{statuses['computed']} computed")
+    print(f"Rendered {len(results)} dashboards ({len(templates)} templates x {len(dates)} days) "
+          f"in {time.perf_counter() - started:.2f}s")
+    finish_run(emit=print)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Dashboard Rendering
+
+One shared Jinja2 environment for the daily dashboard, its theme variants and
+the weekly dashboard. Templates are addressed by name with a directory prefix
+("daily/kpi_cards.html", "themes/<name>.html", "weekly/weekly_kpi_cards.html")
+and compiled templates are kept for the life of the process; the compiled
+bytecode is also written to data/cache/jinja/ so the next process skips
+parsing and code generation.
+
+Themes are Jinja templates in daily/dashboard/templates/themes/ that take the
+same context as kpi_cards.html; themes/light.html is the Themes/chatgpt5-light
+design ported that way. The pages in daily/dashboard/Themes/ themselves are
+static design mockups (fixed sample date and numbers, no placeholders), so
+they are not offered as templates: rendering one would write the same page
+for every date.
+
+Key Features:
+- FileSystemBytecodeCache shared across processes (invalidated by source checksum)
+- auto_reload off by default; set DASHBOARD_TEMPLATE_RELOAD=1 while editing templates
+- Theme shorthand: "<name>" resolves to "themes/<name>.html"
+- Autoescaping only for the weekly and archive templates
+- Jinja2 is imported on first use, so listing/validation CLIs never load it
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# Name prefix -> template directory
+TEMPLATE_DIRS: Dict[str, Path] = {
+    'daily': PROJECT_ROOT / 'daily' / 'dashboard' / 'templates',
+    'themes': PROJECT_ROOT / 'daily' / 'dashboard' / 'templates' / 'themes',
+    'weekly': PROJECT_ROOT / 'weekly' / 'dashboard' / 'templates',
+    'archive': PROJECT_ROOT / 'daily' / 'dashboard' / 'templates' / 'archive',
+}
+AUTOESCAPE_PREFIXES = ('weekly', 'archive')
+# Page templates that are not dashboards (not offered by available_templates)
+INTERNAL_PREFIXES = ('archive',)
+
+DAILY_TEMPLATE = 'daily/kpi_cards.html'
+WEEKLY_TEMPLATE = 'weekly/weekly_kpi_cards.html'
+
+BYTECODE_CACHE_DIR = PROJECT_ROOT / 'data' / 'cache' / 'jinja'
+RELOAD_ENV_VAR = 'DASHBOARD_TEMPLATE_RELOAD'
+
+_environment = None
+
+
+def _autoescape(template_name: Optional[str]) -> bool:
+    return bool(template_name) and template_name.split('/', 1)[0] in AUTOESCAPE_PREFIXES
+
+
+def get_environment() -> Any:
+    """Return the process-wide Jinja2 environment, creating it on first use."""
+    global _environment
+    if _environment is not None:
+        return _environment
+    try:
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, PrefixLoader
+    except ImportError as e:
+        raise RuntimeError("Jinja2 is required. Install with: pip install jinja2") from e
+
+    bytecode_cache = None
+    try:
+        BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(BYTECODE_CACHE_DIR))
+    except OSError:
+        pass  # read-only checkout: compile in memory only
+
+    _environment = Environment(
+        loader=PrefixLoader({prefix: FileSystemLoader(str(path)) for prefix, path in TEMPLATE_DIRS.items()}),
+        autoescape=_autoescape,
+        auto_reload=os.environ.get(RELOAD_ENV_VAR, '').lower() in ('1', 'true', 'yes'),
+        bytecode_cache=bytecode_cache,
+        cache_size=-1,
+    )
+    return _environment
+
+
+def resolve_template_name(name_or_path: str) -> str:
+    """Map a theme shorthand or a file path inside a template directory to a template name."""
+    candidate = Path(name_or_path)
+    if candidate.suffix == '' and '/' not in name_or_path:
+        return f"themes/{name_or_path}.html"
+    if candidate.is_absolute() or candidate.exists():
+        resolved = candidate.resolve()
+        for prefix, directory in TEMPLATE_DIRS.items():
+            if resolved.parent == directory.resolve():
+                return f"{prefix}/{resolved.name}"
+        raise ValueError(f"Template {name_or_path} is not inside a known template directory")
+    return name_or_path
+
+
+def get_template(name_or_path: str) -> Any:
+    """Return a compiled template by name, theme shorthand or path."""
+    return get_environment().get_template(resolve_template_name(name_or_path))
+
+
+def render(name_or_path: str, context: Dict[str, Any]) -> str:
+    return get_template(name_or_path).render(context)
+
+
+def available_templates() -> List[str]:
+    """List every selectable template name (without importing Jinja2)."""
+    names = []
+    for prefix, directory in TEMPLATE_DIRS.items():
+        if prefix not in INTERNAL_PREFIXES and directory.exists():
+            names.extend(f"{prefix}/{p.name}" for p in sorted(directory.glob('*.html')))
+    return names
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Multi-Mailbox Runner
+
+Nightly entry point for several shared inboxes. Each mailbox (see mailboxes.py)
+is ingested and has its touched daily/weekly dashboards re-rendered in its own
+worker process; mailboxes share nothing on disk, so they run fully in
+parallel and one mailbox's failure or size never holds up the others. When
+the workers are done, the touched dates are folded into the "combined"
+mailbox and its dashboards are re-rendered.
+
+Key Features:
+- One process-pool task per mailbox (ingest + render), isolated failures
+- Mailboxes without new exports finish immediately
+- Combined database rebuilt only for dates some mailbox touched
+- Combined facts are the union of the mailboxes' fact partitions, so combined
+  percentiles stay exact
+- Combined conversation state and open-item aging are folded from the combined facts
+- A stage report per mailbox in data/runs/
+
+Combining a day:
+- Email counts and hourly counts are summed
+- Response times come from the combined facts when every mailbox has them;
+  otherwise the average is weighted by answered emails and the median is omitted
+- Hourly unread counts are summed; an hour meets SLA only if every mailbox
+  reporting it met its own threshold, and is derived if any part was reconstructed
+- Daily SLA compliance and average unread use the combined mailbox's business hours
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from instrumentation import stage, count, start_run, finish_run
+from lazy_imports import lazy_import
+from backlog import has_sla
+from baselines import baseline_options, baseline_store_for
+from conversation_state import conversation_state_for
+from mailboxes import COMBINED_MAILBOX, Mailbox, MailboxError, discover_mailboxes, get_mailbox
+import fact_table
+
+np = lazy_import('numpy')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def process_mailbox(name: str, project_root: Optional[str] = None, render: bool = True,
+                    render_weekly: bool = True, full_reprocess: bool = False) -> Dict[str, Any]:
+    """Ingest one mailbox's pending exports and re-render what they touched (runs in a worker)."""
+    # Imported here so the parent process only pays for them if it renders combined dashboards
+    from ingest_and_update import IntelligentIngester
+    from dashboard_refresh import DashboardRefresher
+
+    started = time.perf_counter()
+    result = {'mailbox': name, 'ingested': False, 'touched_dates': [], 'daily': 0, 'weekly': 0, 'error': None}
+    start_run(f"mailbox_{name}", trace_memory=False)
+    try:
+        mailbox = Mailbox(name, project_root)
+        if not mailbox.pending_inputs():
+            logger.info(f"[{name}] No new exports in {mailbox.ingest_dir}")
+        else:
+            ingester = IntelligentIngester(project_root, full_reprocess=full_reprocess, mailbox=name)
+            if not ingester.run():
+                raise RuntimeError("ingestion failed")
+            result['ingested'] = True
+            result['touched_dates'] = list(ingester.last_touched_dates)
+            if render and ingester.last_touched_dates:
+                with stage('render'):
+                    refresher = DashboardRefresher(mailbox, render_weekly=render_weekly)
+                    result['daily'], result['weekly'] = refresher.refresh(ingester.database,
+                                                                          ingester.last_touched_dates)
+    except Exception as e:
+        logger.error(f"[{name}] {type(e).__name__}: {e}")
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        finish_run(emit=lambda line: None)
+    result['seconds'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def run_pool(names: List[str], workers: int, **options: Any) -> List[Dict[str, Any]]:
+    """Run process_mailbox for every mailbox, in parallel unless workers == 1."""
+    if workers <= 1 or len(names) <= 1:
+        return [process_mailbox(name, **options) for name in names]
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(names))) as pool:
+        futures = {pool.submit(process_mailbox, name, **options): name for name in names}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:  # worker crashed before it could report
+                results.append({'mailbox': futures[future], 'ingested': False, 'touched_dates': [],
+                                'daily': 0, 'weekly': 0, 'error': f"{type(e).__name__}: {e}", 'seconds': None})
+    return sorted(results, key=lambda r: names.index(r['mailbox']))
+
+
+def _load_json(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _round1(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(float(value), 1)
+
+
+def combine_day(date_str: str, parts: Dict[str, Dict[str, Any]], facts: Optional[Dict[str, Any]],
+                start_hour: int, end_hour: int) -> Dict[str, Any]:
+    """Fold one date's entries from several mailbox databases into a combined day entry."""
+    day = {
+        'date': date_str,
+        'has_email_data': any(p.get('has_email_data') for p in parts.values()),
+        'has_sla_data': any(p.get('has_sla_data') for p in parts.values()),
+        'daily_summary': {},
+        'hourly_data': [{'hour': h} for h in range(24)],
+        'mailboxes': sorted(parts),
+    }
+    hours = {name: {h.get('hour'): h for h in p.get('hourly_data', [])} for name, p in parts.items()}
+    summary, hourly = day['daily_summary'], day['hourly_data']
+
+    email_parts = [name for name, p in parts.items() if p.get('has_email_data')]
+    if email_parts:
+        summaries = [parts[n].get('daily_summary') or {} for n in email_parts]
+        total = sum(s.get('total_emails', 0) for s in summaries)
+        replied = sum(s.get('replied_count', 0) for s in summaries)
+        completed = sum(s.get('completed_count', 0) for s in summaries)
+
+        if facts is not None:
+            minutes = fact_table.response_minutes(facts)
+            avg = float(np.mean(minutes)) if len(minutes) else None
+            median = float(np.median(minutes)) if len(minutes) else None
+        else:
+            weighted = [(s['avg_response_time_minutes'], s.get('replied_count', 0) + s.get('completed_count', 0))
+                        for s in summaries if s.get('avg_response_time_minutes') is not None]
+            weight = sum(w for _, w in weighted)
+            avg = sum(v * w for v, w in weighted) / weight if weight else None
+            median = None
+        summary.update({
+            'total_emails': total,
+            'replied_count': replied,
+            'completed_count': completed,
+            'pending_count': total - replied - completed,
+            'reply_rate_percent': round((replied / total * 100) if total > 0 else 0, 1),
+            'avg_response_time_minutes': _round1(avg),
+            'median_response_time_minutes': _round1(median),
+        })
+
+        for entry in hourly:
+            h = entry['hour']
+            rows = [hours[n].get(h) or {} for n in email_parts]
+            entry['emails_received'] = sum(r.get('emails_received', 0) for r in rows)
+            entry['emails_replied'] = sum(r.get('emails_replied', 0) for r in rows)
+            if facts is not None:
+                hour_minutes = fact_table.response_minutes(facts, h, h + 1)
+                entry['avg_response_time'] = _round1(np.mean(hour_minutes)) if len(hour_minutes) else None
+            else:
+                weighted = [(r['avg_response_time'], r.get('emails_replied', 0)) for r in rows
+                            if r.get('avg_response_time') is not None]
+                weight = sum(w for _, w in weighted)
+                entry['avg_response_time'] = _round1(sum(v * w for v, w in weighted) / weight) if weight else None
+
+    sla_parts = [name for name, p in parts.items() if has_sla(p)]
+    if not day['has_sla_data'] and sla_parts:
+        day['sla_derived'] = True
+    if sla_parts:
+        business = []
+        for entry in hourly:
+            h = entry['hour']
+            rows = [hours[n][h] for n in sla_parts if hours[n].get(h, {}).get('unread_count') is not None]
+            if not rows:
+                continue
+            entry['unread_count'] = sum(int(r['unread_count']) for r in rows)
+            entry['sla_met'] = all(bool(r.get('sla_met')) for r in rows)
+            if any(r.get('unread_derived') for r in rows):
+                entry['unread_derived'] = True
+            if start_hour <= h < end_hour:
+                business.append(entry)
+        if business:
+            summary.update({
+                'sla_compliance_rate': round(sum(e['sla_met'] for e in business) / len(business) * 100, 1),
+                'avg_unread_count': round(sum(e['unread_count'] for e in business) / len(business), 1),
+            })
+    return day
+
+
+def build_combined(names: List[str], dates: Optional[Iterable[str]] = None,
+                   project_root: Optional[str] = None) -> Dict[str, Any]:
+    """Update the combined mailbox's database and facts for `dates` (all dates if None)."""
+    combined = Mailbox(COMBINED_MAILBOX, project_root)
+    config = combined.load_config()
+    business = config.get('sla_thresholds', {}).get('business_hours', {})
+    start_hour, end_hour = business.get('start_hour', 7), business.get('end_hour', 21)
+
+    databases = {}
+    for name in names:
+        db = _load_json(Mailbox(name, project_root).database_path)
+        if db is not None:
+            databases[name] = db
+    existing = _load_json(combined.database_path) if dates is not None else None
+    if existing is None:
+        existing = {'metadata': {}, 'days': {}}
+        dates = None  # nothing to update incrementally: build every date
+    full_build = dates is None
+    if dates is None:
+        dates = sorted({d for db in databases.values() for d in db.get('days', {})})
+
+    combined_facts = fact_table.fact_store_for(combined.database_path)
+    stores = {name: fact_table.fact_store_for(Mailbox(name, project_root).database_path) for name in databases}
+    for date_str in sorted(dates):
+        parts = {name: db['days'][date_str] for name, db in databases.items() if date_str in db.get('days', {})}
+        if not parts:
+            existing['days'].pop(date_str, None)
+            continue
+        email_parts = [n for n, p in parts.items() if p.get('has_email_data')]
+        day_facts = [stores[n].read_day(date_str) for n in email_parts]
+        facts = None
+        if email_parts and all(f is not None for f in day_facts):
+            facts = {c: np.concatenate([f[c] for f in day_facts]) for c in fact_table.COLUMNS}
+            combined_facts.write_day(date_str, facts)
+        else:
+            combined_facts.partition_path(date_str).unlink(missing_ok=True)
+        existing['days'][date_str] = combine_day(date_str, parts, facts, start_hour, end_hour)
+    count('combined_days', len(dates))
+
+    all_dates = sorted(existing['days'])
+    existing['metadata'].update({
+        'last_updated': datetime.now().isoformat(),
+        'mailbox': COMBINED_MAILBOX,
+        'mailboxes': sorted(databases),
+        'data_sources': [f"mailboxes/{n}" for n in sorted(databases)],
+        'earliest_date': all_dates[0] if all_dates else None,
+        'latest_date': all_dates[-1] if all_dates else None,
+        'total_days_processed': len(all_dates),
+    })
+    combined.database_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(combined.database_path, 'w') as f:
+        f.write(json.dumps(existing, indent=2, default=str))
+
+    try:
+        options = baseline_options(config)
+    except ValueError as e:
+        logger.error(f"[{COMBINED_MAILBOX}] Invalid baselines section: {e}; using defaults")
+        options = None
+    baseline_store_for(combined.database_path, options).update(existing['days'], dates)
+
+    # Open items of the combined view: the same days, read back from the combined facts
+    state = conversation_state_for(combined.database_path)
+    if full_build:
+        state.rebuild(combined_facts)
+    else:
+        state.update(combined_facts, dates)
+    return existing
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ingest and render every mailbox in parallel, then the combined view.")
+    parser.add_argument("--mailboxes", help="Comma-separated mailbox names (default: all discovered).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count; 1 runs mailboxes in this process).")
+    parser.add_argument("--no-render", action="store_true", help="Only ingest; do not render dashboards.")
+    parser.add_argument("--no-weekly", action="store_true", help="Render daily dashboards only.")
+    parser.add_argument("--no-combined", action="store_true", help="Skip the combined mailbox.")
+    parser.add_argument("--rebuild-combined", action="store_true",
+                        help="Rebuild the combined database for every date, not only touched ones.")
+    parser.add_argument("--full-reprocess", action="store_true", help="Passed to each mailbox's ingester.")
+    parser.add_argument("--list", action="store_true", help="List discovered mailboxes and exit.")
+    args = parser.parse_args(argv)
+
+    try:
+        names = ([get_mailbox(n.strip()).name for n in args.mailboxes.split(',') if n.strip()]
+                 if args.mailboxes else discover_mailboxes())
+    except MailboxError as e:
+        parser.error(str(e))
+    if COMBINED_MAILBOX in names:
+        parser.error(f"'{COMBINED_MAILBOX}' is derived from the other mailboxes and cannot be ingested")
+
+    if args.list:
+        for name in names:
+            mailbox = Mailbox(name)
+            pending = ', '.join(mailbox.pending_inputs()) or 'no new exports'
+            print(f"{name:<20} {mailbox.database_path.relative_to(mailbox.project_root)}  ({pending})")
+        return 0
+    if not names:
+        logger.error("No mailboxes found: add config/mailboxes/<name>.json or data/ingest/<name>/")
+        return 1
+
+    start_run('mailboxes', trace_memory=False)
+    with stage('mailboxes'):
+        results = run_pool(names, args.workers, render=not args.no_render,
+                           render_weekly=not args.no_weekly, full_reprocess=args.full_reprocess)
+    for r in results:
+        status = f"error: {r['error']}" if r['error'] else (
+            f"{len(r['touched_dates'])} days touched, {r['daily']} daily / {r['weekly']} weekly dashboards"
+            if r['ingested'] else "nothing to ingest")
+        logger.info(f"[{r['mailbox']}] {status} ({r['seconds']}s)")
+    count('mailboxes', len(names))
+
+    touched = sorted({d for r in results for d in r['touched_dates']})
+    all_mailboxes = discover_mailboxes()
+    if not args.no_combined and len(all_mailboxes) > 1 and (touched or args.rebuild_combined):
+        with stage('combine'):
+            combined_db = build_combined(all_mailboxes, None if args.rebuild_combined else touched)
+        if not args.no_render:
+            from dashboard_refresh import DashboardRefresher
+            render_dates = touched or sorted(combined_db['days'])
+            with stage('render_combined'):
+                refresher = DashboardRefresher(Mailbox(COMBINED_MAILBOX), render_weekly=not args.no_weekly)
+                daily, weekly = refresher.refresh(combined_db, render_dates)
+            logger.info(f"[{COMBINED_MAILBOX}] {len(render_dates)} days combined, "
+                        f"{daily} daily / {weekly} weekly dashboards")
+    finish_run(emit=logger.info)
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
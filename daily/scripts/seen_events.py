@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Seen-Event Index
+
+Persistent membership set of every (MessageId, EventType) the ingester has
+already processed, so an export that overlaps the previous one (consecutive
+exports share 95%+ of their rows) can be cut down to its genuinely new events
+before any matching work.
+
+Each event is reduced to a 64-bit key: pandas' stable hash of the MessageId
+string mixed with the EventType. The keys live next to the JSON database as
+one sorted uint64 array (database/email_database_seen_events/keys.npy) that is
+memory-mapped and probed with a vectorized binary search. An optional Bloom
+filter (bloom.npy) sits in front of it: keys the filter rules out are new
+without touching the key array at all.
+
+Key Features:
+- One vectorized pass per export: hash, Bloom probe, searchsorted
+- Events without a MessageId are never treated as seen
+- Atomic writes; the key array is only extended after a successful ingest
+- The Bloom filter is rebuilt from the key array whenever it is saved
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Tuple, Union
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+KEYS_FILE = 'keys.npy'
+BLOOM_FILE = 'bloom.npy'
+
+# EventType -> mixing constant (odd 64-bit multipliers keep the types apart)
+_EVENT_SALT = {'Inbox': 0x9E3779B97F4A7C15, 'Replied': 0xC2B2AE3D27D4EB4F, 'Completed': 0x165667B19E3779F9}
+
+
+def event_keys(message_ids: Any, event_types: Any) -> Tuple[Any, Any]:
+    """64-bit keys for (MessageId, EventType) pairs; returns (keys, valid).
+
+    `valid` is False where the MessageId is missing; those keys are meaningless.
+    """
+    ids = pd.Series(message_ids, dtype=object)
+    valid = ids.notna().to_numpy()
+    hashes = pd.util.hash_array(ids.fillna('').astype(str).to_numpy(dtype=object), categorize=True)
+    salt = pd.Series(event_types, dtype=object).map(_EVENT_SALT).fillna(0).to_numpy(dtype=np.uint64)
+    return hashes ^ salt, valid
+
+
+def seen_index_for(database_path: Union[str, Path], bloom_bits_per_key: int = 0) -> 'SeenEventIndex':
+    """Return the seen-event index that sits next to a JSON database file."""
+    path = Path(database_path).resolve()
+    return SeenEventIndex(path.with_name(f"{path.stem}_seen_events"), bloom_bits_per_key)
+
+
+class SeenEventIndex:
+    """Sorted on-disk uint64 key set, optionally fronted by a Bloom filter."""
+
+    def __init__(self, root: Union[str, Path], bloom_bits_per_key: int = 0):
+        self.root = Path(root)
+        self.bloom_bits_per_key = bloom_bits_per_key
+        self._keys = None
+        self._bloom = None
+        self._pending = []
+
+    @property
+    def keys_path(self) -> Path:
+        return self.root / KEYS_FILE
+
+    @property
+    def bloom_path(self) -> Path:
+        return self.root / BLOOM_FILE
+
+    def _load(self) -> None:
+        if self._keys is not None:
+            return
+        if self.keys_path.exists():
+            self._keys = np.load(self.keys_path, mmap_mode='r')
+        else:
+            self._keys = np.empty(0, dtype=np.uint64)
+        if self.bloom_bits_per_key and len(self._keys):
+            # Built on first use if the filter was switched on after keys were recorded
+            self._bloom = (np.load(self.bloom_path) if self.bloom_path.exists()
+                           else self._build_bloom(np.asarray(self._keys), self.bloom_bits_per_key))
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._keys)
+
+    def contains(self, keys: Any) -> Any:
+        """Boolean mask: which keys are already in the index."""
+        self._load()
+        keys = np.asarray(keys, dtype=np.uint64)
+        found = np.zeros(len(keys), dtype=bool)
+        if len(self._keys) == 0 or len(keys) == 0:
+            return found
+        candidates = np.arange(len(keys))
+        if self._bloom is not None:
+            candidates = candidates[self._bloom_may_contain(self._bloom, keys)]
+        probe = keys[candidates]
+        positions = np.minimum(np.searchsorted(self._keys, probe), len(self._keys) - 1)
+        found[candidates] = self._keys[positions] == probe
+        return found
+
+    def add(self, keys: Any) -> None:
+        """Queue keys for the next save()."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if len(keys):
+            self._pending.append(keys)
+
+    def save(self) -> int:
+        """Merge queued keys into the on-disk index; returns the number of keys added."""
+        if not self._pending:
+            return 0
+        self._load()
+        merged = np.union1d(np.asarray(self._keys), np.concatenate(self._pending))
+        added = len(merged) - len(self._keys)
+        self._pending = []
+        if added:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._write(self.keys_path, merged)
+            if self.bloom_bits_per_key:
+                self._bloom = self._build_bloom(merged, self.bloom_bits_per_key)
+                self._write(self.bloom_path, self._bloom)
+        self._keys = merged
+        return added
+
+    def clear(self) -> None:
+        """Forget every key (the next ingest treats all events as new)."""
+        for path in (self.keys_path, self.bloom_path):
+            if path.exists():
+                path.unlink()
+        self._keys, self._bloom, self._pending = None, None, []
+
+    @staticmethod
+    def _write(path: Path, array: Any) -> None:
+        tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    # Bloom filter: bit array of m bits, k probes by double hashing (h1 + i*h2) mod m.
+    # The first 16 bytes of the stored array hold m and k.
+
+    @staticmethod
+    def _probes(keys: Any, m: int, k: int) -> Any:
+        h1 = keys
+        h2 = (keys >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(k, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(m)
+
+    @classmethod
+    def _build_bloom(cls, keys: Any, bits_per_key: int) -> Any:
+        m = max(64, int(len(keys) * bits_per_key))
+        k = max(1, round(bits_per_key * 0.693))
+        bits = np.zeros((m + 7) // 8, dtype=np.uint8)
+        positions = cls._probes(keys, m, k).ravel()
+        np.bitwise_or.at(bits, (positions >> np.uint64(3)).astype(np.int64),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+        header = np.array([m, k], dtype=np.uint64).view(np.uint8)
+        return np.concatenate([header, bits])
+
+    @classmethod
+    def _bloom_may_contain(cls, bloom: Any, keys: Any) -> Any:
+        m, k = (int(v) for v in bloom[:16].view(np.uint64))
+        bits = bloom[16:]
+        positions = cls._probes(keys, m, k)
+        set_bits = (bits[(positions >> np.uint64(3)).astype(np.int64)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return set_bits.all(axis=1)
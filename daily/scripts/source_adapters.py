@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Export Source Adapters
+
+Maps every known CSV export shape onto one canonical schema, chosen by sniffing
+the header row rather than by file name. The ingester and the classifier load
+exports through `load_export()` and only ever see canonical columns.
+
+Canonical kinds:
+- events:  raw event log, one row per Inbox/Replied/Completed event
+           (Conversation-Id, Subject, Emails, EventType, TimeStamp, MessageId)
+           -> needs conversation matching and business-minute calculation
+- records: already matched, one row per Inbox email (RECORD_COLUMNS)
+           -> skips matching and business-minute recomputation
+- sla:     hourly unread snapshots (Date, Hour, TotalUnread[, Title])
+
+Key Features:
+- Complete_List_Raw.csv (event log) and Reserve.csv-style pre-matched exports
+- UnreadCount variants: "Unread Count"/"TotalUnread", "Hour"/"Hour of the Day"
+- Timestamps parsed with the declared formats in timestamps.py
+- New shapes plug in with register_adapter()
+"""
+
+import csv
+import logging
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from lazy_imports import lazy_import
+from timestamps import parse_timestamps
+
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+EVENT_COLUMNS = ['Conversation-Id', 'Subject', 'Emails', 'EventType', 'TimeStamp', 'MessageId']
+RECORD_COLUMNS = [
+    'conversation_id', 'inbox_timestamp', 'inbox_subject', 'inbox_emails', 'inbox_message_id',
+    'status', 'response_timestamp', 'response_time_minutes',
+]
+SLA_COLUMNS = ['Date', 'Hour', 'TotalUnread', 'Title']
+
+KINDS = ('events', 'records', 'sla')
+
+
+class UnknownExportError(ValueError):
+    """Raised when a header matches no registered adapter."""
+
+
+class SourceAdapter:
+    """Base adapter: declares the header it recognises and how to canonicalise it.
+
+    `required` columns must all be present; each entry of `alternatives` is a
+    group of interchangeable column names of which at least one must be present.
+    """
+
+    name = 'base'
+    kind = 'events'
+    required: Tuple[str, ...] = ()
+    alternatives: Tuple[Tuple[str, ...], ...] = ()
+
+    def matches(self, columns: Iterable[str]) -> bool:
+        present = set(columns)
+        return (all(c in present for c in self.required)
+                and all(any(c in present for c in group) for group in self.alternatives))
+
+    @staticmethod
+    def first_present(df: Any, names: Iterable[str]) -> Optional[str]:
+        return next((n for n in names if n in df.columns), None)
+
+    def canonicalize(self, df: Any, errors: str = 'lenient') -> Any:
+        raise NotImplementedError
+
+
+class EventLogAdapter(SourceAdapter):
+    """Complete_List_Raw.csv: one row per mailbox event."""
+
+    name = 'complete_list_raw'
+    kind = 'events'
+    required = ('Conversation-Id', 'EventType', 'TimeStamp')
+
+    def canonicalize(self, df, errors='lenient'):
+        out = df.copy()
+        for column in EVENT_COLUMNS:
+            if column not in out.columns:
+                out[column] = None
+        out['TimeStamp'] = parse_timestamps(out['TimeStamp'], 'event_timestamp', errors=errors)
+        return out
+
+
+class PrematchedRecordAdapter(SourceAdapter):
+    """Reserve.csv: one row per Inbox email with its final EventType and response time.
+
+    ResponseTime is the export's own response time in minutes and is used as-is.
+    """
+
+    name = 'reserve'
+    kind = 'records'
+    required = ('Conversation-Id', 'InboxTime', 'EventTime', 'EventType', 'ResponseTime')
+
+    def canonicalize(self, df, errors='lenient'):
+        status = df['EventType'].where(df['EventType'].isin(['Replied', 'Completed']), 'Pending')
+        response = parse_timestamps(df['EventTime'], 'event_timestamp', errors=errors)
+        minutes = pd.to_numeric(df['ResponseTime'], errors='coerce')
+        return pd.DataFrame({
+            'conversation_id': df['Conversation-Id'],
+            'inbox_timestamp': parse_timestamps(df['InboxTime'], 'event_timestamp', errors=errors),
+            'inbox_subject': df.get('Subject'),
+            'inbox_emails': df.get('Emails'),
+            'inbox_message_id': df.get('MessageId'),
+            'status': status,
+            'response_timestamp': response.where(status != 'Pending'),
+            'response_time_minutes': minutes.where(status != 'Pending'),
+        })
+
+
+class UnreadCountAdapter(SourceAdapter):
+    """UnreadCount.csv in any of its column-name variants."""
+
+    name = 'unread_count'
+    kind = 'sla'
+    required = ('Date',)
+    alternatives = (('TotalUnread', 'Unread Count'), ('Hour', 'Hour of the Day'))
+
+    def canonicalize(self, df, errors='lenient'):
+        unread_col = self.first_present(df, self.alternatives[0])
+        hour_col = self.first_present(df, self.alternatives[1])
+        return pd.DataFrame({
+            'Date': parse_timestamps(df['Date'], 'export_date', errors=errors),
+            # Non-numeric values become NaN and are quarantined by data_quality.py
+            'Hour': pd.to_numeric(df[hour_col], errors='coerce'),
+            'TotalUnread': pd.to_numeric(df[unread_col], errors='coerce'),
+            'Title': df['Title'] if 'Title' in df.columns else None,
+        })
+
+
+# Checked in order; more specific shapes first (Reserve.csv also has EventType)
+_ADAPTERS: List[SourceAdapter] = [PrematchedRecordAdapter(), EventLogAdapter(), UnreadCountAdapter()]
+
+
+def register_adapter(adapter: SourceAdapter, first: bool = True) -> None:
+    """Add an adapter; by default it takes precedence over the built-in ones."""
+    if adapter.kind not in KINDS:
+        raise ValueError(f"Adapter kind must be one of {KINDS}, got '{adapter.kind}'")
+    if first:
+        _ADAPTERS.insert(0, adapter)
+    else:
+        _ADAPTERS.append(adapter)
+
+
+def registered_adapters() -> List[SourceAdapter]:
+    return list(_ADAPTERS)
+
+
+def sniff_header(path: Union[str, Path]) -> List[str]:
+    """Read just the header row (handles the UTF-8 BOM Outlook writes)."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return [c.strip() for c in next(csv.reader(f), [])]
+
+
+def detect_adapter(columns: Iterable[str], kind: Optional[str] = None) -> SourceAdapter:
+    columns = list(columns)
+    for adapter in _ADAPTERS:
+        if (kind is None or adapter.kind == kind) and adapter.matches(columns):
+            return adapter
+    label = f"{kind} adapter" if kind else "adapter"
+    raise UnknownExportError(f"No {label} recognises columns: {', '.join(columns)}")
+
+
+def open_export(path: Union[str, Path], kind: Optional[str] = None) -> Tuple[SourceAdapter, Any]:
+    """Sniff the header and read the raw CSV; returns (adapter, raw DataFrame).
+
+    `kind` restricts the candidate adapters. kind='events' also accepts a
+    pre-matched records export: check adapter.kind to tell them apart.
+    """
+    header = sniff_header(path)
+    adapter = None
+    for candidate in (('events', 'records') if kind == 'events' else (kind,)):
+        try:
+            adapter = detect_adapter(header, candidate)
+            break
+        except UnknownExportError:
+            continue
+    if adapter is None:
+        label = f"{kind} adapter" if kind else "adapter"
+        raise UnknownExportError(f"{Path(path).name}: no {label} recognises columns: {', '.join(header)}")
+    logger.info(f"{Path(path).name}: detected '{adapter.name}' export ({adapter.kind})")
+    return adapter, pd.read_csv(path, encoding='utf-8-sig')
+
+
+def load_export(path: Union[str, Path], kind: Optional[str] = None,
+                errors: str = 'lenient') -> Tuple[SourceAdapter, Any]:
+    """open_export() followed by canonicalisation."""
+    adapter, raw = open_export(path, kind)
+    return adapter, adapter.canonicalize(raw, errors=errors)
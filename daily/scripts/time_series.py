@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Sub-Hour Time Series
+
+Per-day bucket arrays at a configurable resolution (any divisor of 60 minutes:
+5, 15, 30, 60, ...), written by the ingester next to the JSON database
+(database/email_database_series/ for email_database.json). Each day is one
+partition, <db>_series/YYYY-MM/YYYY-MM-DD.npz, with 1440 / resolution slots:
+
+    emails_received   int32     Inbox emails arriving in the slot
+    emails_replied    int32     of those, emails with status Replied
+    response_sum      float64   sum of business-minute response times (answered emails)
+    responses         int32     number of answered emails
+    backlog           int32     open messages at the slot's close (see backlog.py)
+    resolution        int       slot width in minutes
+
+A 15-minute day is 96 slots per series (a few hundred bytes compressed), so the
+JSON database keeps only its 24-slot `hourly_data`. Hourly figures are derived
+from the fine arrays by downsampling (sums, or the last slot for the backlog),
+never computed separately, and dashboards can plot any coarser resolution.
+
+Key Features:
+- One np.bincount pass per series for a whole export (no per-day/per-hour filtering)
+- downsample() turns 5/15/30-minute arrays into any coarser multiple
+- Reads at a coarser resolution than stored are downsampled on the fly
+- Configured by "aggregation": {"resolution_minutes": N} in sla_config.json
+"""
+
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+DEFAULT_RESOLUTION = 60
+SUM_SERIES = ('emails_received', 'emails_replied', 'response_sum', 'responses')
+LAST_SERIES = ('backlog',)
+SERIES = SUM_SERIES + LAST_SERIES
+_DTYPES = {'emails_received': 'int32', 'emails_replied': 'int32', 'response_sum': 'float64',
+           'responses': 'int32', 'backlog': 'int32'}
+
+DayKey = Union[str, date]
+
+
+def validate_resolution(minutes: Any) -> int:
+    """Return the resolution as an int, or raise ValueError unless it divides an hour."""
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        raise ValueError(f"Resolution must be a whole number of minutes (got {minutes!r})")
+    if minutes <= 0 or 60 % minutes:
+        raise ValueError(f"Resolution must divide 60 minutes, e.g. 5, 15, 30 or 60 (got {minutes})")
+    return minutes
+
+
+def resolution_from_config(config: Optional[Dict[str, Any]]) -> int:
+    """The configured bucket resolution (aggregation.resolution_minutes), default 60."""
+    value = ((config or {}).get('aggregation') or {}).get('resolution_minutes', DEFAULT_RESOLUTION)
+    return validate_resolution(value)
+
+
+def slots_per_day(resolution: int) -> int:
+    return 1440 // resolution
+
+
+def downsample(values: Any, factor: int, how: str = 'sum') -> Any:
+    """Merge every `factor` consecutive slots of the last axis ('sum' or 'last')."""
+    values = np.asarray(values)
+    if factor == 1:
+        return values
+    grouped = values.reshape(values.shape[:-1] + (values.shape[-1] // factor, factor))
+    return grouped[..., -1] if how == 'last' else grouped.sum(axis=-1)
+
+
+def downsample_series(series: Dict[str, Any], resolution: int, target: int) -> Dict[str, Any]:
+    """Re-bucket a series dict from `resolution` to the coarser `target` resolution."""
+    if target % resolution:
+        raise ValueError(f"Cannot derive {target}-minute buckets from {resolution}-minute buckets")
+    factor = target // resolution
+    return {name: downsample(values, factor, 'last' if name in LAST_SERIES else 'sum')
+            for name, values in series.items()}
+
+
+def aggregate(inbox_ts: Any, replied: Any, minutes: Any, resolution: int):
+    """Bucket emails by Inbox day and slot.
+
+    Returns (days, day_index, series): the sorted unique days as 'YYYY-MM-DD'
+    strings, each email's position in `days`, and a dict of (len(days), slots)
+    arrays for every SUM_SERIES name.
+    """
+    inbox_ts = np.asarray(inbox_ts, dtype='datetime64[m]')
+    day_values = inbox_ts.astype('datetime64[D]')
+    unique_days, day_index = np.unique(day_values, return_inverse=True)
+    slots = slots_per_day(resolution)
+    minute_of_day = (inbox_ts - day_values.astype('datetime64[m]')).astype(np.int64)
+    flat = day_index * slots + minute_of_day // resolution
+    size = len(unique_days) * slots
+
+    minutes = np.asarray(minutes, dtype=np.float64)
+    answered = ~np.isnan(minutes)
+    series = {
+        'emails_received': np.bincount(flat, minlength=size),
+        'emails_replied': np.bincount(flat, weights=np.asarray(replied, dtype=np.float64), minlength=size),
+        'response_sum': np.bincount(flat, weights=np.where(answered, minutes, 0.0), minlength=size),
+        'responses': np.bincount(flat, weights=answered.astype(np.float64), minlength=size),
+    }
+    series = {name: values.reshape(len(unique_days), slots).astype(_DTYPES[name])
+              for name, values in series.items()}
+    return [str(d) for d in unique_days], day_index, series
+
+
+def series_store_for(database_path: Union[str, Path]) -> 'SeriesStore':
+    """Return the series store that sits next to a JSON database file."""
+    path = Path(database_path).resolve()
+    return SeriesStore(path.with_name(f"{path.stem}_series"))
+
+
+class SeriesStore:
+    """Day-partitioned bucket arrays at a fixed resolution per day."""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def partition_path(self, day: DayKey) -> Path:
+        day_str = day.isoformat() if isinstance(day, date) else str(day)
+        return self.root / day_str[:7] / f"{day_str}.npz"
+
+    def days(self) -> List[str]:
+        """All partition dates (YYYY-MM-DD), sorted."""
+        if not self.root.exists():
+            return []
+        return sorted(p.stem for p in self.root.glob('*/*.npz'))
+
+    def read_day(self, day: DayKey, resolution: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Load one day's series, downsampled to `resolution` if given.
+
+        Returns None if the day has no partition or was stored at a resolution
+        that `resolution` is not a multiple of. The dict carries 'resolution'.
+        """
+        path = self.partition_path(day)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            stored = int(data['resolution'])
+            series = {name: data[name] for name in SERIES if name in data.files}
+        target = stored if resolution is None else resolution
+        if target % stored:
+            return None
+        series = downsample_series(series, stored, target)
+        series['resolution'] = target
+        return series
+
+    def write_day(self, day: DayKey, series: Dict[str, Any], resolution: int) -> Path:
+        """Replace one day's partition (atomic rename)."""
+        path = self.partition_path(day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(tmp_path, resolution=np.int32(resolution),
+                            **{name: np.asarray(values, dtype=_DTYPES[name]) for name, values in series.items()})
+        os.replace(tmp_path, path)
+        return path
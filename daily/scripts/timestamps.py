@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Export Timestamp Parsing
+
+Shared parser for the Outlook-style strings in the CSV exports, e.g.
+"7/22/2025 1:54 AM" (event TimeStamp) and "7/7/2025" (UnreadCount Date).
+Each source declares its format(s), so pandas never has to infer a format or
+fall back to per-element dateutil parsing.
+
+Key Features:
+- Declared format per source (SOURCE_FORMATS), tried in order
+- Each distinct string is parsed once: exports repeat the same minute many times
+- strict mode raises on any value that matches no declared format
+- lenient mode sends leftovers through pandas inference and turns the rest into NaT
+"""
+
+import logging
+from typing import Any, Dict, Tuple
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+EVENT_TIMESTAMP_FORMAT = '%m/%d/%Y %I:%M %p'
+EXPORT_DATE_FORMAT = '%m/%d/%Y'
+
+SOURCE_FORMATS: Dict[str, Tuple[str, ...]] = {
+    # Complete_List_Raw.csv TimeStamp, Reserve.csv InboxTime/EventTime
+    'event_timestamp': (EVENT_TIMESTAMP_FORMAT, '%m/%d/%Y %H:%M'),
+    # UnreadCount.csv Date
+    'export_date': (EXPORT_DATE_FORMAT,),
+}
+
+ERROR_MODES = ('strict', 'lenient')
+
+
+class TimestampParseError(ValueError):
+    """Raised in strict mode when values match none of the declared formats."""
+
+
+def parse_timestamps(values: Any, source: str = 'event_timestamp', errors: str = 'lenient') -> Any:
+    """Parse a Series (or list) of export strings into a datetime64 Series.
+
+    Empty/missing values become NaT in both modes. Values that are already
+    datetimes are returned unchanged.
+    """
+    if source not in SOURCE_FORMATS:
+        raise KeyError(f"Unknown timestamp source '{source}' (known: {', '.join(SOURCE_FORMATS)})")
+    if errors not in ERROR_MODES:
+        raise ValueError(f"errors must be one of {ERROR_MODES}, got '{errors}'")
+
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    # Parse each distinct string once, then broadcast back through the codes
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    remaining = uniques != ''
+
+    for fmt in SOURCE_FORMATS[source]:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(uniques[remaining], format=fmt, errors='coerce')
+        ok = attempt.notna()
+        parsed[attempt.index[ok]] = attempt[ok]
+        remaining[attempt.index[ok]] = False
+
+    if remaining.any():
+        leftovers = uniques[remaining]
+        if errors == 'strict':
+            samples = ', '.join(repr(v) for v in leftovers.head(5))
+            raise TimestampParseError(
+                f"{len(leftovers)} distinct value(s) do not match {SOURCE_FORMATS[source]}: {samples}")
+        # Per-element inference, as pd.to_datetime without a format would do
+        inferred = pd.to_datetime(pd.Series([pd.to_datetime(v, errors='coerce') for v in leftovers],
+                                            index=leftovers.index, dtype=object), errors='coerce')
+        parsed[inferred.index] = inferred
+        unparsed = int(inferred.isna().sum())
+        if unparsed:
+            logger.warning(f"{unparsed} distinct {source} value(s) could not be parsed and were set to NaT "
+                           f"(e.g. {leftovers[inferred.isna()].iloc[0]!r})")
+
+    values_array = parsed.to_numpy(dtype='datetime64[ns]')
+    result = np.where(codes >= 0, values_array[np.maximum(codes, 0)], np.datetime64('NaT', 'ns'))
+    return pd.Series(result, index=series.index, name=series.name)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Database Validator
+
+Audits every day of email_database.json in one pass. `generate_dashboard.py
+--validate-only` and `generate_weekly_dashboard.py --validate-only` check one
+date or week per launch; this loads the JSON once, flattens all days into
+(days,) summary arrays and (days x 24) hourly arrays (NaN where a value is
+missing), and evaluates each invariant as a few array operations over the
+whole history:
+
+    hours_complete             exactly one entry for each hour 0-23
+    non_negative               no negative counts, daily or hourly
+    hour_replied_le_received   emails_replied <= emails_received in every hour
+    replied_le_received        replied_count + completed_count <= total_emails
+    total_matches_hourly       total_emails == sum of hourly emails_received
+    replied_matches_hourly     replied_count == sum of hourly emails_replied
+    pending_consistent         pending_count == total - replied - completed
+    rates_in_range             reply_rate_percent, sla_compliance_rate within 0-100
+    reply_rate_matches         reply_rate_percent == replied / total (to the stored rounding)
+    email_flag_consistent      has_email_data <=> email summary and hourly counts present
+    sla_flag_consistent        has_sla_data / sla_derived <=> unread readings present
+    sla_met_matches_threshold  hourly sla_met == (unread_count <= threshold)
+    sla_summary_matches_hourly compliance and avg unread == business-hour readings
+
+SLA figures computed under an older config are reported by the `stale_config`
+warning (fix with derived_fields.py) instead of failing the threshold checks.
+Days ingested before config stamps existed were summarized by older rules, so
+their summary mismatches are the `legacy_sla_summary` warning.
+
+Key Features:
+- One JSON parse and one Python pass over the days; the checks are vectorized
+- Machine-readable JSON report: failing dates per check (and hours for hourly checks)
+- Exit status 1 if any error-level check fails, for scripts and CI
+
+Usage:
+    python3 daily/scripts/validate.py --all
+    python3 daily/scripts/validate.py --all --mailbox billing --json data/runs/validate.json
+    python3 daily/scripts/validate.py --from 2024-01-01 --to 2024-03-31
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from derived_fields import SLA_FIELDS, config_hashes, config_values, stale_fields
+from instrumentation import stage, start_run, finish_run, profiled
+from lazy_imports import lazy_import
+from mailboxes import MailboxError, get_mailbox
+
+np = lazy_import('numpy')
+
+SUMMARY_FIELDS = ('total_emails', 'replied_count', 'completed_count', 'pending_count',
+                  'reply_rate_percent', 'sla_compliance_rate', 'avg_unread_count')
+HOUR_FIELDS = ('emails_received', 'emails_replied', 'unread_count', 'sla_met')
+# Stored rates/averages are rounded to one decimal
+ROUNDING_TOLERANCE = 0.05 + 1e-9
+
+# name -> (severity, description), in report order
+CHECKS = {
+    'hours_complete': ('error', 'exactly one hourly entry for each hour 0-23'),
+    'non_negative': ('error', 'no negative counts'),
+    'hour_replied_le_received': ('error', 'hourly emails_replied <= emails_received'),
+    'replied_le_received': ('error', 'replied_count + completed_count <= total_emails'),
+    'total_matches_hourly': ('error', 'total_emails equals the sum of hourly emails_received'),
+    'replied_matches_hourly': ('error', 'replied_count equals the sum of hourly emails_replied'),
+    'pending_consistent': ('error', 'pending_count equals total - replied - completed'),
+    'rates_in_range': ('error', 'reply_rate_percent and sla_compliance_rate within 0-100'),
+    'reply_rate_matches': ('error', 'reply_rate_percent equals replied / total'),
+    'email_flag_consistent': ('error', 'has_email_data matches the presence of email counts'),
+    'sla_flag_consistent': ('error', 'has_sla_data / sla_derived match the presence of unread readings'),
+    'sla_met_matches_threshold': ('error', 'hourly sla_met equals unread_count <= threshold'),
+    'sla_summary_matches_hourly': ('error', 'sla_compliance_rate and avg_unread_count match the business-hour readings'),
+    'date_key': ('error', "the day's date field matches its key"),
+    'legacy_sla_summary': ('warning', 'unstamped (pre config-hash) SLA summary differs from the business-hour readings'),
+    'stale_config': ('warning', 'SLA figures computed under an older config (run derived_fields.py)'),
+}
+
+
+def load_frame(database: Dict[str, Any], first: Optional[str] = None, last: Optional[str] = None,
+               config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Flatten the selected days into arrays; the only per-day Python loop."""
+    all_days = database.get('days', {})
+    days = sorted(d for d in all_days if (first is None or d >= first) and (last is None or d <= last))
+    hashes = config_hashes(config)
+    summary = {field: [] for field in SUMMARY_FIELDS}
+    hour_values = {field: [] for field in HOUR_FIELDS}
+    rows, hours, derived = [], [], []
+    flags = {'has_email_data': [], 'has_sla_data': [], 'sla_derived': [], 'date_key': [], 'stale_sla': [],
+             'stamped_sla': []}
+    for i, date_str in enumerate(days):
+        day = all_days[date_str]
+        daily = day.get('daily_summary') or {}
+        for field in SUMMARY_FIELDS:
+            summary[field].append(daily.get(field))
+        for entry in day.get('hourly_data') or []:
+            rows.append(i)
+            hours.append(entry.get('hour'))
+            derived.append(bool(entry.get('unread_derived')))
+            for field in HOUR_FIELDS:
+                hour_values[field].append(entry.get(field))
+        flags['has_email_data'].append(bool(day.get('has_email_data')))
+        flags['has_sla_data'].append(bool(day.get('has_sla_data')))
+        flags['sla_derived'].append(bool(day.get('sla_derived')))
+        flags['date_key'].append(day.get('date', date_str) == date_str)
+        flags['stale_sla'].append(bool(set(stale_fields(day, hashes)) & set(SLA_FIELDS)))
+        flags['stamped_sla'].append(bool(set(day.get('config_hashes') or {}) & set(SLA_FIELDS)))
+
+    n = len(days)
+    rows = np.array(rows, dtype=np.int64)
+    hours = np.array([h if isinstance(h, int) and 0 <= h < 24 else -1 for h in hours], dtype=np.int64)
+    valid = hours >= 0
+    slots = rows[valid] * 24 + hours[valid]
+    hourly = {}
+    for field, values in hour_values.items():
+        matrix = np.full(n * 24, np.nan)
+        # None -> NaN, booleans -> 0/1
+        matrix[slots] = np.array(values, dtype=np.float64)[valid]
+        hourly[field] = matrix.reshape(n, 24)
+    unread_derived = np.zeros(n * 24, dtype=bool)
+    unread_derived[slots] = np.array(derived, dtype=bool)[valid]
+    return {
+        'days': days,
+        'summary': {field: np.array(values, dtype=np.float64) for field, values in summary.items()},
+        'hourly': hourly,
+        'unread_derived': unread_derived.reshape(n, 24),
+        'hour_counts': np.bincount(slots, minlength=n * 24).reshape(n, 24),
+        'invalid_hours': np.bincount(rows[~valid], minlength=n) > 0,
+        'flags': {name: np.array(values, dtype=bool) for name, values in flags.items()},
+    }
+
+
+def run_checks(frame: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Failure mask per check: (days,) for daily checks, (days, 24) for hourly ones."""
+    values = config_values(config)
+    threshold = values['unread_email_threshold']
+    start, end = values['business_hours.start_hour'], values['business_hours.end_hour']
+    s, h, flags = frame['summary'], frame['hourly'], frame['flags']
+    n = len(frame['days'])
+
+    total, replied, completed = s['total_emails'], s['replied_count'], s['completed_count']
+    received_sum = np.nansum(h['emails_received'], axis=1)
+    replied_sum = np.nansum(h['emails_replied'], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected_rate = np.where(total > 0, replied / total * 100, 0.0)
+    counts = [s[f] for f in ('total_emails', 'replied_count', 'completed_count', 'pending_count', 'avg_unread_count')]
+
+    # SLA: readings present, and the subset ingestion summarizes (measured hours only,
+    # unless the whole day is reconstructed)
+    unread = h['unread_count']
+    reading = ~np.isnan(unread)
+    has_sla = flags['has_sla_data'] | flags['sla_derived']
+    current = ~flags['stale_sla']
+    window = np.zeros((n, 24), dtype=bool)
+    window[:, start:end] = True
+    used = reading & window & (~frame['unread_derived'] | ~flags['has_sla_data'][:, None])
+    used_hours = used.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        compliance = np.where(used, h['sla_met'], 0).sum(axis=1) / used_hours * 100
+        avg_unread = np.where(used, unread, 0).sum(axis=1) / used_hours
+    with np.errstate(invalid='ignore'):
+        mismatch = (used_hours > 0) & ~((np.abs(s['sla_compliance_rate'] - compliance) <= ROUNDING_TOLERANCE)
+                                        & (np.abs(s['avg_unread_count'] - avg_unread) <= ROUNDING_TOLERANCE))
+
+    email_counts = ~np.isnan(h['emails_received'])
+    return {
+        'hours_complete': (frame['hour_counts'] != 1).any(axis=1) | frame['invalid_hours'],
+        'non_negative': np.any([c < 0 for c in counts], axis=0)
+                        | (h['emails_received'] < 0).any(axis=1)
+                        | (h['emails_replied'] < 0).any(axis=1) | (unread < 0).any(axis=1),
+        'hour_replied_le_received': h['emails_replied'] > h['emails_received'],
+        'replied_le_received': replied + completed > total,
+        'total_matches_hourly': ~np.isnan(total) & (total != received_sum),
+        'replied_matches_hourly': ~np.isnan(replied) & (replied != replied_sum),
+        'pending_consistent': ~np.isnan(s['pending_count']) & (s['pending_count'] != total - replied - completed),
+        'rates_in_range': np.any([(r < 0) | (r > 100) for r in (s['reply_rate_percent'], s['sla_compliance_rate'])],
+                                 axis=0),
+        'reply_rate_matches': np.abs(s['reply_rate_percent'] - expected_rate) > ROUNDING_TOLERANCE,
+        'email_flag_consistent': np.where(flags['has_email_data'],
+                                          np.isnan(total) | ~email_counts.all(axis=1),
+                                          ~np.isnan(total) | email_counts.any(axis=1)),
+        'sla_flag_consistent': np.where(has_sla, ~reading.any(axis=1), reading.any(axis=1))
+                               | (flags['has_sla_data'] & flags['sla_derived'])
+                               | (flags['has_sla_data'] & ~(reading & ~frame['unread_derived']).any(axis=1)),
+        'sla_met_matches_threshold': current[:, None] & reading
+                                     & (np.isnan(h['sla_met']) | ((h['sla_met'] == 1) != (unread <= threshold))),
+        'sla_summary_matches_hourly': mismatch & current & flags['stamped_sla'],
+        'date_key': ~flags['date_key'],
+        'legacy_sla_summary': mismatch & ~flags['stamped_sla'],
+        'stale_config': flags['stale_sla'],
+    }
+
+
+def build_report(frame: Dict[str, Any], failures: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """JSON-ready report: per check, its failing dates (and hours for hourly checks)."""
+    days = frame['days']
+    checks = {}
+    for name, (severity, description) in CHECKS.items():
+        mask = failures[name]
+        day_mask = mask.any(axis=1) if mask.ndim == 2 else mask
+        failed = [days[i] for i in np.flatnonzero(day_mask)]
+        entry = {'severity': severity, 'description': description, 'failed_days': len(failed), 'dates': failed}
+        if mask.ndim == 2:
+            entry['hours'] = {days[i]: np.flatnonzero(mask[i]).tolist() for i in np.flatnonzero(day_mask)}
+        checks[name] = entry
+    errors = sum(c['failed_days'] for c in checks.values() if c['severity'] == 'error')
+    failing_days = np.zeros(len(days), dtype=bool)
+    for name, (severity, _) in CHECKS.items():
+        if severity == 'error':
+            mask = failures[name]
+            failing_days |= mask.any(axis=1) if mask.ndim == 2 else mask
+    return {
+        'database': source,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'days_checked': len(days),
+        'first_date': days[0] if days else None,
+        'last_date': days[-1] if days else None,
+        'ok': errors == 0,
+        'days_failing': int(failing_days.sum()),
+        'checks': checks,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check database invariants for every day in one pass.")
+    parser.add_argument("--all", action="store_true", help="Validate every day in the database.")
+    parser.add_argument("--from", dest="first", help="First date (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="last", help="Last date (YYYY-MM-DD).")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file ('-' for stdout).")
+    parser.add_argument("--mailbox", help="Mailbox to validate (default: the original layout).")
+    parser.add_argument("--profile", action="store_true", help="Dump cProfile stats for the run to data/runs/.")
+    args = parser.parse_args(argv)
+    if not (args.all or args.first or args.last):
+        parser.error("specify --all or a --from/--to range")
+
+    try:
+        mailbox = get_mailbox(args.mailbox)
+        config = mailbox.load_config()
+    except (MailboxError, ValueError) as e:
+        parser.error(str(e))
+
+    start_run('validate', trace_memory=False)
+    with profiled(args.profile, 'validate'):
+        with stage('load_database'):
+            with open(mailbox.database_path, 'r') as f:
+                database = json.load(f)
+        with stage('flatten'):
+            frame = load_frame(database, args.first, args.last, config)
+        with stage('check'):
+            failures = run_checks(frame, config)
+        report = build_report(frame, failures, str(mailbox.database_path))
+
+    if args.json_path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        finish_run(emit=lambda line: print(line, file=sys.stderr))
+    else:
+        days = frame['days']
+        print(f"Validated {len(days)} days" + (f" ({days[0]} to {days[-1]})" if days else ""))
+        for name, check in report['checks'].items():
+            status = 'ok' if not check['failed_days'] else f"{check['failed_days']} days"
+            marker = '✓' if not check['failed_days'] else ('✗' if check['severity'] == 'error' else '!')
+            print(f"  {marker} {name:<28} {status:<10} {check['description']}")
+            if check['failed_days']:
+                print(f"      e.g. {', '.join(check['dates'][:5])}")
+        print("All invariants hold" if report['ok'] else f"{report['days_failing']} days violate invariants")
+        if args.json_path:
+            with open(args.json_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {args.json_path}")
+        finish_run(emit=print)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
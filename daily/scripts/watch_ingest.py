@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Ingest Watch Daemon
+
+Resident companion to update_database.sh. Watches data/ingest/ for new
+Complete_List_Raw.csv / UnreadCount.csv drops (inotify on Linux, mtime polling
+elsewhere), runs the intelligent ingestion against an in-memory copy of the
+database, and re-renders only the daily and weekly dashboards whose dates were
+touched by the drop.
+
+Key Features:
+- Database, SLA config and compiled templates stay loaded between drops
+- Waits for dropped files to stop growing before ingesting
+- Reloads the database/config only if they were changed by another process
+- Updates daily and weekly latest.html when the newest day/week is affected
+- --mailbox watches one mailbox's ingest folder (data/ingest/<mailbox>/)
+"""
+
+import argparse
+import ctypes
+import logging
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from pathlib import Path
+
+from ingest_and_update import IntelligentIngester
+from dashboard_refresh import DashboardRefresher
+from instrumentation import stage, start_run, finish_run
+from mailboxes import INPUT_NAMES, MailboxError, get_mailbox
+
+logger = logging.getLogger(__name__)
+
+
+class InotifyWatcher:
+    """Minimal ctypes inotify binding reporting file names that finished changing."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    _EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, directory):
+        import ctypes.util  # pulls in subprocess/tempfile; only needed once the daemon starts
+
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f'inotify_add_watch failed for {directory}')
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds; return the set of changed file names."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(buf):
+            _, _, _, name_len = self._EVENT_HEADER.unpack_from(buf, offset)
+            offset += self._EVENT_HEADER.size
+            name = buf[offset:offset + name_len].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += name_len
+            if name:
+                names.add(name)
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Fallback watcher comparing (size, mtime) signatures every interval."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._signatures = self._scan()
+
+    def _scan(self):
+        signatures = {}
+        for name in INPUT_NAMES:
+            try:
+                st = (self.directory / name).stat()
+            except FileNotFoundError:
+                continue
+            signatures[name] = (st.st_size, st.st_mtime_ns)
+        return signatures
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        current = self._scan()
+        changed = {n for n, sig in current.items() if self._signatures.get(n) != sig}
+        self._signatures = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class IngestWatchDaemon:
+    """Keeps the ingest → render pipeline resident and reacts to new drops."""
+
+    def __init__(self, settle_seconds=1.0, render_weekly=True, mailbox=None):
+        self.settle_seconds = settle_seconds
+        self.render_weekly = render_weekly
+
+        self.ingester = IntelligentIngester(mailbox=mailbox)
+        self.ingest_dir = self.ingester.ingest_dir
+        self.ingest_dir.mkdir(parents=True, exist_ok=True)
+
+        self.refresher = DashboardRefresher(self.ingester.mailbox, render_weekly=render_weekly)
+        self.generator = self.refresher.generator
+
+        self.database = None
+        self._db_mtime = None
+        self._config_mtime = self._config_signature()
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return Path(path).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _config_signature(self):
+        return tuple(self._mtime(p) for p in self.ingester.mailbox.config_files)
+
+    def _refresh_state(self):
+        """Reload database/config only when another process changed them on disk."""
+        config_mtime = self._config_signature()
+        if config_mtime != self._config_mtime:
+            logger.info("SLA config changed on disk; reloading")
+            self.ingester.load_config()
+            self.refresher.reload_config()
+            self._config_mtime = config_mtime
+
+        db_mtime = self._mtime(self.ingester.database_path)
+        if self.database is None or db_mtime != self._db_mtime:
+            self.database = self.ingester.load_existing_database()
+            self._db_mtime = db_mtime
+            logger.info(f"Loaded database with {len(self.database.get('days', {}))} days")
+
+    def pending_inputs(self):
+        return [name for name in INPUT_NAMES if (self.ingest_dir / name).exists()]
+
+    def _input_signature(self):
+        signature = []
+        for name in INPUT_NAMES:
+            try:
+                st = (self.ingest_dir / name).stat()
+                signature.append((name, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append((name, None, None))
+        return signature
+
+    def wait_until_settled(self):
+        """Wait until dropped files stop changing (exports can be written in chunks)."""
+        previous = self._input_signature()
+        while True:
+            time.sleep(self.settle_seconds)
+            current = self._input_signature()
+            if current == previous:
+                return
+            previous = current
+
+    def process_drop(self):
+        """Ingest the current drop and re-render affected dashboards."""
+        started = time.perf_counter()
+        start_run('watch_drop', trace_memory=False)
+        try:
+            self._refresh_state()
+
+            if not self.ingester.run(database=self.database):
+                logger.error("Ingestion failed; database will be reloaded from disk on next drop")
+                self.database = None
+                return False
+
+            self.database = self.ingester.database
+            self._db_mtime = self._mtime(self.ingester.database_path)
+            touched = self.ingester.last_touched_dates
+
+            with stage('render_daily'):
+                daily_count = self.render_daily(touched)
+            with stage('render_weekly'):
+                weekly_count = self.render_weekly_dashboards(touched) if self.render_weekly else 0
+            with stage('archive'):
+                self.refresher.update_archive(self.database, touched)
+        finally:
+            finish_run()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Drop processed in {elapsed:.2f}s: {len(touched)} days touched, "
+                    f"{daily_count} daily and {weekly_count} weekly dashboards rendered")
+        return True
+
+    def render_daily(self, touched_dates):
+        """Re-render daily dashboards for touched dates that have SLA data."""
+        return self.refresher.render_daily(self.database, touched_dates)
+
+    def render_weekly_dashboards(self, touched_dates):
+        """Re-render the ISO weeks containing touched dates."""
+        return self.refresher.render_weekly_dashboards(self.database, touched_dates)
+
+    def serve(self, poll_interval=2.0, force_polling=False, once=False):
+        """Main loop: process any existing drop, then react to new ones."""
+        self._refresh_state()
+        if self.pending_inputs():
+            self.wait_until_settled()
+            self.process_drop()
+        if once:
+            return
+
+        watcher = None
+        if not force_polling:
+            try:
+                watcher = InotifyWatcher(self.ingest_dir)
+                logger.info(f"Watching {self.ingest_dir} with inotify")
+            except (OSError, AttributeError) as e:
+                logger.info(f"inotify unavailable ({e}); falling back to polling")
+        if watcher is None:
+            watcher = PollingWatcher(self.ingest_dir)
+            logger.info(f"Polling {self.ingest_dir} every {poll_interval}s")
+
+        try:
+            while True:
+                changed = watcher.wait(poll_interval)
+                if not changed.intersection(INPUT_NAMES) or not self.pending_inputs():
+                    continue
+                logger.info(f"Detected new drop: {', '.join(sorted(changed.intersection(INPUT_NAMES)))}")
+                self.wait_until_settled()
+                if self.pending_inputs():
+                    self.process_drop()
+        finally:
+            watcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch data/ingest/ and keep the database and dashboards up to date.")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between checks when polling (also the inotify wake-up interval).")
+    parser.add_argument("--settle", type=float, default=1.0,
+                        help="Seconds a dropped file must stay unchanged before it is ingested.")
+    parser.add_argument("--force-polling", action="store_true", help="Do not use inotify even if available.")
+    parser.add_argument("--no-weekly", action="store_true", help="Only re-render daily dashboards.")
+    parser.add_argument("--once", action="store_true", help="Process the current drop (if any) and exit.")
+    parser.add_argument("--mailbox", help="Watch data/ingest/<mailbox>/ instead of data/ingest/.")
+    args = parser.parse_args()
+
+    try:
+        get_mailbox(args.mailbox)
+    except MailboxError as e:
+        parser.error(str(e))
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    daemon = IngestWatchDaemon(settle_seconds=args.settle, render_weekly=not args.no_weekly, mailbox=args.mailbox)
+    try:
+        daemon.serve(poll_interval=args.poll_interval, force_polling=args.force_polling, once=args.once)
+    except KeyboardInterrupt:
+        logger.info("Watch daemon stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+SLA What-If Engine
+
+Re-scores the whole history under candidate SLA settings without re-running
+ingestion. Candidate unread thresholds, business windows, business days and
+response-time targets are expanded into a grid; each scenario is evaluated
+over two precomputed inputs:
+
+- the (days x 24) hourly unread matrix and daily email totals from email_database.json
+- the per-email fact table (Inbox and response timestamps)
+
+Business minutes are recomputed for every email from a cumulative
+business-minute clock, B(t) = business minutes from the first day up to t, so a
+response time is B(response) - B(inbox): two lookups per email instead of a
+day-by-day walk. Thresholds and targets are broadcast over the grid, so a
+scenario costs a handful of array operations whatever the history length.
+
+Key Features:
+- Daily SLA compliance and average unread (same rules as ingestion)
+- Reply-within-target rate and average business-minute response per day
+- Weekly KPIs per ISO week (compliance weighted by daily total_emails, falling back to
+  the unweighted daily mean, as the weekly dashboard)
+- Without fact partitions only the unread-based KPIs can be scored (a warning is printed)
+- The current configuration is always scored first, as the reference row
+- Optional JSON report with every scenario's daily and weekly series
+
+Usage:
+    python3 daily/scripts/what_if.py --thresholds 20,30,40 --hours 7-21,8-18 --targets 60,120
+    python3 daily/scripts/what_if.py --business-days 0-4 --from 2024-01-01 --json data/runs/what_if.json
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from instrumentation import stage, start_run, finish_run, profiled
+from lazy_imports import lazy_import
+from mailboxes import MailboxError, get_mailbox
+import fact_table
+
+np = lazy_import('numpy')
+
+
+def parse_list(text: str, convert=float) -> List[Any]:
+    """'20,30,40' -> [20.0, 30.0, 40.0]"""
+    return [convert(v) for v in text.split(',') if v.strip()]
+
+
+def parse_window(text: str) -> Tuple[int, int]:
+    """'7-21' -> (7, 21): business hours [start, end)."""
+    start, _, end = text.partition('-')
+    start, end = int(start), int(end)
+    if not 0 <= start < end <= 24:
+        raise ValueError(f"Invalid business window '{text}' (expected START-END with 0 <= START < END <= 24)")
+    return start, end
+
+
+def parse_days(text: str) -> Tuple[int, ...]:
+    """'0-4' or '0,1,2,3,4' -> weekday numbers (0=Mon)."""
+    days = set()
+    for part in text.split(','):
+        if '-' in part:
+            first, last = (int(v) for v in part.split('-'))
+            days.update(range(first, last + 1))
+        elif part.strip():
+            days.add(int(part))
+    if not days or not all(0 <= d <= 6 for d in days):
+        raise ValueError(f"Invalid business days '{text}' (weekday numbers 0=Mon .. 6=Sun)")
+    return tuple(sorted(days))
+
+
+def load_history(database: Dict[str, Any], facts: Dict[str, Any], first: Optional[str] = None,
+                 last: Optional[str] = None, measured_only: bool = False) -> Dict[str, Any]:
+    """Arrays the scenarios are scored on.
+
+    `unread` is (days, 24) float with NaN where no reading exists; reconstructed
+    readings are dropped if measured_only. `total_emails` is each day's
+    daily_summary total (the weekly compliance weight). Emails are indexed into
+    `days` by their Inbox day.
+    """
+    days = sorted(d for d in database.get('days', {}) if (first is None or d >= first) and (last is None or d <= last))
+    unread = np.full((len(days), 24), np.nan)
+    total_emails = np.zeros(len(days))
+    for i, date_str in enumerate(days):
+        day = database['days'][date_str]
+        total_emails[i] = (day.get('daily_summary') or {}).get('total_emails') or 0
+        for entry in day.get('hourly_data', []):
+            value = entry.get('unread_count')
+            if value is not None and not (measured_only and entry.get('unread_derived')):
+                unread[i, entry['hour']] = value
+
+    day_values = np.array(days, dtype='datetime64[D]')
+    inbox_days = facts['inbox_ts'].astype('datetime64[D]')
+    positions = np.searchsorted(day_values, inbox_days)
+    keep = (positions < len(days)) & (day_values[np.minimum(positions, len(days) - 1)] == inbox_days) if days else \
+        np.zeros(len(inbox_days), dtype=bool)
+    return {
+        'days': days,
+        'day_values': day_values,
+        'unread': unread,
+        'total_emails': total_emails,
+        'email_day': positions[keep],
+        'inbox_ts': facts['inbox_ts'][keep],
+        'response_ts': facts['response_ts'][keep],
+        'answered': facts['status'][keep] != fact_table.STATUS_CODES['Pending'],
+    }
+
+
+def build_grid(thresholds: Sequence[float], windows: Sequence[Tuple[int, int]],
+               business_days: Sequence[Tuple[int, ...]], targets: Sequence[float],
+               current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Current configuration first, then every combination of the candidates."""
+    grid = [dict(current, name='current')]
+    for threshold, (start, end), days, target in itertools.product(thresholds, windows, business_days, targets):
+        scenario = {'threshold': threshold, 'start_hour': start, 'end_hour': end,
+                    'business_days': days, 'target': target}
+        if scenario != current:
+            scenario['name'] = (f"unread<={threshold:g} {start:02d}-{end:02d}h "
+                                f"days={''.join(str(d) for d in days)} target={target:g}m")
+            grid.append(scenario)
+    return grid
+
+
+def score(history: Dict[str, Any], grid: List[Dict[str, Any]],
+          compliance_target: float) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Daily and weekly KPIs for every scenario; returns (results, ISO week labels)."""
+    n_days = len(history['days'])
+    unread = history['unread']
+    email_day = history['email_day']
+    received = np.bincount(email_day, minlength=n_days).astype(np.float64)
+    iso = [tuple(d.isocalendar()[:2]) for d in history['day_values'].astype(object)]
+    weeks = sorted(set(iso))
+    week_index = np.array([weeks.index(w) for w in iso], dtype=np.int64) if n_days else np.empty(0, dtype=np.int64)
+
+    minutes_cache = {}
+    results = []
+    for scenario in grid:
+        # Hourly SLA within the business window (hours without a reading are skipped)
+        window = unread[:, scenario['start_hour']:scenario['end_hour']]
+        measured = ~np.isnan(window)
+        hours = measured.sum(axis=1)
+        met = (np.where(measured, window, np.inf) <= scenario['threshold']).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            compliance = np.where(hours > 0, met / hours * 100, np.nan)
+            avg_unread = np.where(hours > 0, np.nansum(window, axis=1) / hours, np.nan)
+
+        # Per-email business minutes (shared by scenarios with the same window and days)
+        key = (scenario['start_hour'], scenario['end_hour'], tuple(scenario['business_days']))
+        if key not in minutes_cache:
+            minutes_cache[key] = fact_table.business_minutes(history['inbox_ts'], history['response_ts'], *key)
+        minutes = minutes_cache[key]
+        answered = history['answered'] & ~np.isnan(minutes)
+        within = answered & (minutes <= scenario['target'])
+        replies = np.bincount(email_day, weights=answered, minlength=n_days)
+        minute_sum = np.bincount(email_day, weights=np.where(answered, minutes, 0.0), minlength=n_days)
+        within_count = np.bincount(email_day, weights=within, minlength=n_days)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            within_rate = np.where(received > 0, within_count / received * 100, np.nan)
+            avg_response = np.where(replies > 0, minute_sum / replies, np.nan)
+
+        # Weekly (as the weekly dashboard): compliance weighted by the days' total_emails, or the
+        # unweighted daily mean for weeks without totals; unread averaged over days with readings
+        has_sla = ~np.isnan(compliance)
+        day_compliance = np.where(has_sla, compliance, 0)
+        weight = np.where(has_sla, history['total_emails'], 0.0)
+        n_weeks = len(weeks)
+        w_compliance_num = np.bincount(week_index, weights=day_compliance * weight, minlength=n_weeks)
+        w_weight = np.bincount(week_index, weights=weight, minlength=n_weeks)
+        w_compliance_sum = np.bincount(week_index, weights=day_compliance, minlength=n_weeks)
+        w_unread_num = np.bincount(week_index, weights=np.where(has_sla, avg_unread, 0), minlength=n_weeks)
+        w_unread_days = np.bincount(week_index, weights=has_sla, minlength=n_weeks)
+        w_received = np.bincount(week_index, weights=received, minlength=n_weeks)
+        w_within = np.bincount(week_index, weights=within_count, minlength=n_weeks)
+        w_replies = np.bincount(week_index, weights=replies, minlength=n_weeks)
+        w_minutes = np.bincount(week_index, weights=minute_sum, minlength=n_weeks)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weekly = {
+                'sla_compliance_rate': np.where(w_weight > 0, w_compliance_num / w_weight,
+                                                np.where(w_unread_days > 0, w_compliance_sum / w_unread_days, np.nan)),
+                'avg_unread_count': np.where(w_unread_days > 0, w_unread_num / w_unread_days, np.nan),
+                'within_target_rate': np.where(w_received > 0, w_within / w_received * 100, np.nan),
+                'avg_response_time_minutes': np.where(w_replies > 0, w_minutes / w_replies, np.nan),
+            }
+
+        days_with_sla = int(has_sla.sum())
+        results.append({
+            'scenario': scenario,
+            'summary': {
+                'days_scored': days_with_sla,
+                'mean_compliance': _mean(compliance),
+                'days_meeting_compliance_target': int((compliance[has_sla] >= compliance_target).sum()),
+                'mean_avg_unread': _mean(avg_unread),
+                'within_target_rate': float(within.sum() / received.sum() * 100) if received.sum() else None,
+                'avg_response_time_minutes': float(minutes[answered].mean()) if answered.any() else None,
+            },
+            'daily': {
+                'sla_compliance_rate': compliance,
+                'avg_unread_count': avg_unread,
+                'within_target_rate': within_rate,
+                'avg_response_time_minutes': avg_response,
+            },
+            'weekly': weekly,
+        })
+    return results, [f"{y}-W{w:02d}" for y, w in weeks]
+
+
+def _mean(values: Any) -> Optional[float]:
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else None
+
+
+def _fmt(value: Optional[float], digits: int = 1) -> str:
+    return '—' if value is None else f"{value:.{digits}f}"
+
+
+def _series(values: Any) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), 1) for v in values]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score candidate SLA settings over the full history.")
+    parser.add_argument("--thresholds", "--threshold", dest="thresholds",
+                        help="Candidate unread thresholds, e.g. 20,30,40 (default: configured).")
+    parser.add_argument("--hours", help="Candidate business windows START-END, e.g. 7-21,8-18 (default: configured).")
+    parser.add_argument("--business-days", action="append",
+                        help="Candidate business days, e.g. 0-4 (repeatable; default: configured).")
+    parser.add_argument("--targets", "--target", dest="targets",
+                        help="Candidate response targets in business minutes, e.g. 60,120 (default: configured).")
+    parser.add_argument("--from", dest="first", help="First date (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="last", help="Last date (YYYY-MM-DD).")
+    parser.add_argument("--measured-only", action="store_true",
+                        help="Ignore hours whose unread count was reconstructed from events.")
+    parser.add_argument("--weekly", action="store_true", help="Also print weekly KPIs per scenario.")
+    parser.add_argument("--json", dest="json_path", help="Write every scenario's daily/weekly series to this file.")
+    parser.add_argument("--mailbox", help="Mailbox to score (default: the original layout).")
+    parser.add_argument("--profile", action="store_true", help="Dump cProfile stats for the run to data/runs/.")
+    args = parser.parse_args(argv)
+
+    try:
+        mailbox = get_mailbox(args.mailbox)
+        config = mailbox.load_config()
+        sla = config.get('sla_thresholds', {})
+        business = sla.get('business_hours', {})
+        targets = config.get('kpi_targets', {})
+        current = {
+            'threshold': float(sla.get('unread_email_threshold', 30)),
+            'start_hour': int(business.get('start_hour', 7)),
+            'end_hour': int(business.get('end_hour', 21)),
+            'business_days': tuple(business.get('business_days', range(7))),
+            'target': float(targets.get('response_time_target_minutes', 60)),
+        }
+        thresholds = parse_list(args.thresholds) if args.thresholds else [current['threshold']]
+        windows = [parse_window(w) for w in args.hours.split(',')] if args.hours else \
+            [(current['start_hour'], current['end_hour'])]
+        day_sets = [parse_days(d) for d in args.business_days] if args.business_days else [current['business_days']]
+        response_targets = parse_list(args.targets) if args.targets else [current['target']]
+    except (MailboxError, ValueError) as e:
+        parser.error(str(e))
+    compliance_target = float(config.get('kpi_targets', {}).get('sla_compliance_target_percent', 85))
+
+    start_run('what_if', trace_memory=False)
+    with profiled(args.profile, 'what_if'):
+        with stage('load_database'):
+            with open(mailbox.database_path, 'r') as f:
+                database = json.load(f)
+        with stage('load_facts'):
+            store = fact_table.fact_store_for(mailbox.database_path)
+            facts = store.read_days(d for d in store.days()
+                                    if (args.first is None or d >= args.first) and (args.last is None or d <= args.last))
+        with stage('prepare'):
+            history = load_history(database, facts, args.first, args.last, args.measured_only)
+        grid = build_grid(thresholds, windows, day_sets, response_targets, current)
+        with stage('score'):
+            results, week_labels = score(history, grid, compliance_target)
+
+    days = history['days']
+    print(f"{len(grid)} scenarios over {len(days)} days"
+          + (f" ({days[0]} to {days[-1]}), {len(history['inbox_ts'])} emails" if days else ""))
+    if days and not len(history['inbox_ts']):
+        print(f"Warning: no fact partitions in {store.root} for these days; "
+              "in-target and response-time columns are unavailable (re-ingest the exports to build them)")
+    print(f"{'scenario':<44} {'compliance%':>11} {'days>=' + format(compliance_target, 'g') + '%':>9} "
+          f"{'avg unread':>10} {'in target%':>10} {'avg resp':>9}")
+    for result in results:
+        s = result['summary']
+        print(f"{result['scenario']['name'][:44]:<44} {_fmt(s['mean_compliance']):>11} "
+              f"{s['days_meeting_compliance_target']:>9} {_fmt(s['mean_avg_unread']):>10} "
+              f"{_fmt(s['within_target_rate']):>10} {_fmt(s['avg_response_time_minutes']):>9}")
+        if args.weekly:
+            weekly = result['weekly']
+            for i, label in enumerate(week_labels):
+                print(f"    {label}  compliance {_fmt(_series(weekly['sla_compliance_rate'])[i]):>5}%  "
+                      f"unread {_fmt(_series(weekly['avg_unread_count'])[i]):>6}  "
+                      f"in target {_fmt(_series(weekly['within_target_rate'])[i]):>5}%")
+
+    if args.json_path:
+        report = {
+            'days': days,
+            'weeks': week_labels,
+            'scenarios': [{
+                'scenario': dict(r['scenario'], business_days=list(r['scenario']['business_days'])),
+                'summary': r['summary'],
+                'daily': {k: _series(v) for k, v in r['daily'].items()},
+                'weekly': {k: _series(v) for k, v in r['weekly'].items()},
+            } for r in results],
+        }
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+    finish_run(emit=print)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
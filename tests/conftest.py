@@ -0,0 +1,6 @@
+"""Make the shared pipeline modules in daily/scripts importable, as the scripts do."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'daily' / 'scripts'))
@@ -0,0 +1,56 @@
+from output_optimizer import extract_stylesheet, output_options, write_output
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Dashboard</title>
+    <style>
+        /* layout */
+        body { margin: 0;  color: #111; }
+        .area { fill: url(#gradient); }
+    </style>
+</head>
+<body>
+    <svg viewBox="0 0 100 100"><path d="M 10.123 20.456 L 30.789 40.012"/></svg>
+</body>
+</html>
+"""
+
+
+def _options(**section):
+    return output_options({'output': dict({'precompress': []}, **section)})
+
+
+def test_external_stylesheet_keeps_local_rules_inline():
+    html, css = extract_stylesheet(PAGE)
+    assert 'margin' in css and 'url(#gradient)' not in css
+    assert html.count('<link rel="stylesheet"') == 1
+    assert 'url(#gradient)' in html
+
+
+def test_extracting_an_externalized_page_changes_nothing():
+    html, _ = extract_stylesheet(PAGE)
+    assert extract_stylesheet(html) == (html, None)
+
+
+def test_minified_output_is_a_fixed_point(tmp_path):
+    path = tmp_path / 'email_dashboard_2024-08-13.html'
+    options = _options(minify=True)
+    write_output(path, PAGE, options)
+    first = path.read_bytes()
+    write_output(path, path.read_text(encoding='utf-8'), options)
+    assert path.read_bytes() == first
+    assert len(first) < len(PAGE.encode('utf-8'))
+
+
+def test_externalizing_twice_writes_one_asset_and_one_link(tmp_path):
+    path = tmp_path / 'email_dashboard_2024-08-13.html'
+    options = _options(minify=True, stylesheet='external')
+    write_output(path, PAGE, options)
+    first = path.read_bytes()
+    assets = sorted(p.name for p in (tmp_path / 'assets').iterdir())
+    write_output(path, path.read_text(encoding='utf-8'), options)
+    assert path.read_bytes() == first
+    assert sorted(p.name for p in (tmp_path / 'assets').iterdir()) == assets
+    assert len(assets) == 1
+    assert first.count(b'<link rel="stylesheet"') == 1
@@ -0,0 +1,69 @@
+from run_mailboxes import combine_day
+
+
+def _day(hourly, total=0, avg_response=None, replied=0, has_sla_data=True):
+    return {
+        'has_email_data': total > 0,
+        'has_sla_data': has_sla_data,
+        'daily_summary': {'total_emails': total, 'replied_count': replied, 'completed_count': 0,
+                          'avg_response_time_minutes': avg_response},
+        'hourly_data': hourly,
+    }
+
+
+def test_unread_is_summed_and_sla_needs_every_mailbox():
+    parts = {
+        'a': _day([{'hour': 9, 'unread_count': 10, 'sla_met': True}]),
+        'b': _day([{'hour': 9, 'unread_count': 25, 'sla_met': False}]),
+    }
+    day = combine_day('2024-08-13', parts, None, 7, 21)
+    entry = day['hourly_data'][9]
+    assert entry['unread_count'] == 35
+    assert entry['sla_met'] is False
+    assert day['daily_summary']['sla_compliance_rate'] == 0.0
+    assert day['daily_summary']['avg_unread_count'] == 35.0
+
+
+def test_hours_with_a_null_unread_count_are_skipped():
+    parts = {
+        'a': _day([{'hour': 9, 'unread_count': 10, 'sla_met': True},
+                   {'hour': 10, 'unread_count': None}]),
+        'b': _day([{'hour': 9, 'unread_count': None},
+                   {'hour': 10, 'unread_count': 4, 'sla_met': True}]),
+    }
+    day = combine_day('2024-08-13', parts, None, 7, 21)
+    assert day['hourly_data'][9]['unread_count'] == 10
+    assert day['hourly_data'][10]['unread_count'] == 4
+    assert 'unread_count' not in day['hourly_data'][11]
+    assert day['daily_summary']['sla_compliance_rate'] == 100.0
+
+
+def test_summary_uses_business_hours_and_flags_derived_readings():
+    parts = {
+        'a': _day([{'hour': 6, 'unread_count': 50, 'sla_met': False},
+                   {'hour': 8, 'unread_count': 20, 'sla_met': True, 'unread_derived': True}]),
+    }
+    day = combine_day('2024-08-13', parts, None, 7, 21)
+    assert day['hourly_data'][8]['unread_derived'] is True
+    assert day['daily_summary']['avg_unread_count'] == 20.0
+    assert day['daily_summary']['sla_compliance_rate'] == 100.0
+
+
+def test_email_totals_without_facts_weight_response_times_by_replies():
+    parts = {
+        'a': _day([{'hour': 9, 'emails_received': 3}], total=3, replied=1, avg_response=30.0),
+        'b': _day([{'hour': 9, 'emails_received': 5}], total=5, replied=3, avg_response=70.0),
+    }
+    summary = combine_day('2024-08-13', parts, None, 7, 21)['daily_summary']
+    assert summary['total_emails'] == 8
+    assert summary['pending_count'] == 4
+    assert summary['avg_response_time_minutes'] == 60.0
+    assert summary['median_response_time_minutes'] is None
+
+
+def test_sla_from_derived_days_only_marks_the_day_derived():
+    parts = {'a': dict(_day([{'hour': 9, 'unread_count': 5, 'sla_met': True}], has_sla_data=False),
+                       sla_derived=True)}
+    day = combine_day('2024-08-13', parts, None, 7, 21)
+    assert day['has_sla_data'] is False
+    assert day['sla_derived'] is True
@@ -0,0 +1,66 @@
+import numpy as np
+
+from seen_events import SeenEventIndex, event_keys, seen_index_for
+
+
+def _keys(ids, types):
+    keys, valid = event_keys(ids, types)
+    return keys[valid]
+
+
+def test_keys_separate_event_types_and_flag_missing_ids():
+    keys, valid = event_keys(['m1', 'm1', None], ['Inbox', 'Replied', 'Inbox'])
+    assert list(valid) == [True, True, False]
+    assert keys[0] != keys[1]
+    again, _ = event_keys(['m1'], ['Inbox'])
+    assert again[0] == keys[0]
+
+
+def test_keys_are_remembered_only_after_save(tmp_path):
+    index = seen_index_for(tmp_path / 'email_database.json')
+    keys = _keys(['m1', 'm2'], ['Inbox', 'Inbox'])
+    index.add(keys)
+    assert not index.contains(keys).any()
+    assert index.save() == 2
+    assert index.contains(keys).all()
+
+    reopened = seen_index_for(tmp_path / 'email_database.json')
+    probe = _keys(['m1', 'm2', 'm3'], ['Inbox', 'Replied', 'Inbox'])
+    assert list(reopened.contains(probe)) == [True, False, False]
+    assert len(reopened) == 2
+
+
+def test_saving_known_keys_adds_nothing(tmp_path):
+    index = SeenEventIndex(tmp_path / 'seen')
+    keys = _keys(['m1'], ['Inbox'])
+    index.add(keys)
+    index.save()
+    index.add(keys)
+    assert index.save() == 0
+    assert len(index) == 1
+
+
+def test_bloom_filter_has_no_false_negatives(tmp_path):
+    ids = [f"msg-{i}" for i in range(2000)]
+    keys = _keys(ids, ['Inbox'] * len(ids))
+    index = SeenEventIndex(tmp_path / 'seen', bloom_bits_per_key=10)
+    index.add(keys)
+    index.save()
+    assert index.bloom_path.exists()
+
+    reopened = SeenEventIndex(tmp_path / 'seen', bloom_bits_per_key=10)
+    assert reopened.contains(keys).all()
+    new = _keys([f"new-{i}" for i in range(2000)], ['Inbox'] * 2000)
+    assert not reopened.contains(new).any()
+
+
+def test_clear_forgets_every_key(tmp_path):
+    index = SeenEventIndex(tmp_path / 'seen', bloom_bits_per_key=8)
+    keys = _keys(['m1'], ['Inbox'])
+    index.add(keys)
+    index.save()
+    index.clear()
+    assert len(index) == 0
+    assert not index.contains(keys).any()
+    assert not any((tmp_path / 'seen').iterdir())
+    assert np.asarray(index.contains(np.empty(0, dtype=np.uint64))).size == 0
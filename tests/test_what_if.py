@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+
+from fact_table import STATUS_CODES
+from what_if import build_grid, load_history, score
+
+CURRENT = {'threshold': 30.0, 'start_hour': 7, 'end_hour': 21, 'business_days': tuple(range(7)), 'target': 60.0}
+
+
+def _database(days):
+    """{date: (total_emails, {hour: unread})} -> database dict"""
+    return {'days': {
+        date_str: {'daily_summary': {'total_emails': total},
+                   'hourly_data': [{'hour': h, 'unread_count': v} for h, v in unread.items()]}
+        for date_str, (total, unread) in days.items()
+    }}
+
+
+def _facts(inbox=(), response=(), status=()):
+    return {
+        'inbox_ts': np.array(inbox, dtype='datetime64[s]'),
+        'response_ts': np.array(response, dtype='datetime64[s]'),
+        'status': np.array(status, dtype=np.int8),
+    }
+
+
+def _score(database, facts, **scenario):
+    history = load_history(database, facts)
+    grid = build_grid([], [], [], [], dict(CURRENT, **scenario))
+    results, weeks = score(history, grid, 85.0)
+    return results[0], weeks
+
+
+def test_weekly_compliance_is_weighted_by_total_emails_without_facts():
+    # Mon 2024-08-12: 1 of 2 hours met, 30 emails; Tue: both hours met, 10 emails
+    database = _database({'2024-08-12': (30, {9: 10, 10: 50}), '2024-08-13': (10, {9: 10, 10: 20})})
+    result, weeks = _score(database, _facts())
+    assert weeks == ['2024-W33']
+    assert list(result['daily']['sla_compliance_rate']) == [50.0, 100.0]
+    assert result['weekly']['sla_compliance_rate'][0] == 62.5
+    assert result['weekly']['avg_unread_count'][0] == 22.5
+
+
+def test_weekly_compliance_falls_back_to_the_daily_mean():
+    database = _database({'2024-08-12': (0, {9: 10, 10: 50}), '2024-08-13': (0, {9: 10, 10: 20})})
+    result, _ = _score(database, _facts())
+    assert result['weekly']['sla_compliance_rate'][0] == 75.0
+
+
+def test_response_metrics_need_facts():
+    database = _database({'2024-08-13': (2, {9: 10})})
+    result, _ = _score(database, _facts())
+    assert result['summary']['within_target_rate'] is None
+    assert result['summary']['avg_response_time_minutes'] is None
+    assert math.isnan(result['weekly']['within_target_rate'][0])
+
+
+def test_response_targets_are_scored_from_facts():
+    database = _database({'2024-08-13': (2, {9: 10})})
+    facts = _facts(inbox=['2024-08-13T09:00', '2024-08-13T10:00'],
+                   response=['2024-08-13T09:30', '2024-08-13T12:00'],
+                   status=[STATUS_CODES['Replied'], STATUS_CODES['Replied']])
+    result, _ = _score(database, facts, target=60.0)
+    assert result['summary']['within_target_rate'] == 50.0
+    assert result['summary']['avg_response_time_minutes'] == 75.0
+    result, _ = _score(database, facts, target=120.0)
+    assert result['summary']['within_target_rate'] == 100.0
@@ -1,5 +1,18 @@
 #!/bin/bash
 # Simple wrapper script to update the email database
+# Usage: ./update_database.sh            (one-shot ingest)
+#        ./update_database.sh --watch    (resident daemon: ingest + re-render on every drop)
+#        ./update_database.sh --all-mailboxes  (every mailbox in parallel, then the combined view)
+
+if [ "$1" = "--watch" ]; then
+    shift
+    exec python3 daily/scripts/watch_ingest.py "$@"
+fi
+
+if [ "$1" = "--all-mailboxes" ]; then
+    shift
+    exec python3 daily/scripts/run_mailboxes.py "$@"
+fi
 
 echo "=========================================="
 echo "Email Database Update Tool"
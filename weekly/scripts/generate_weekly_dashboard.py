@@ -16,18 +16,31 @@ from statistics import mean, median
 from typing import Dict, Any, List, Optional, Tuple
 import re
 
-try:
-    from jinja2 import Environment, FileSystemLoader, select_autoescape
-except Exception:  # pragma: no cover
-    print("Error: Jinja2 is required. Install with: pip install jinja2")
-    sys.exit(1)
-
-def load_sla_config() -> Dict[str, Any]:
-    """Load SLA configuration from config/sla_config.json"""
-    config_path = Path(__file__).parent.parent.parent / "config" / "sla_config.json"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'daily' / 'scripts'))
+from instrumentation import stage, timed, start_run, finish_run, profiled  # noqa: E402
+import rendering  # noqa: E402
+import charts  # noqa: E402
+import fact_table  # noqa: E402
+from lazy_imports import lazy_import  # noqa: E402
+from mailboxes import Mailbox, MailboxError, get_mailbox  # noqa: E402
+from backlog import has_sla  # noqa: E402
+
+np = lazy_import('numpy')
+
+DATABASE_PATH = Path(__file__).parent.parent.parent / "database" / "email_database.json"
+
+# Heatmap rows, in the order the weekly dashboard has always shown them
+DAY_ORDER = ['Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun', 'Mon']
+HEATMAP_FRAME = charts.ChartFrame(960, 260, left=48, top=28)
+TREND_FRAME = charts.ChartFrame(960, 280, left=56, right=16, top=16, bottom=40)
+TREND_MAX_LABELS = 8
+
+def load_sla_config(mailbox: Optional[Mailbox] = None) -> Dict[str, Any]:
+    """Load SLA configuration from config/sla_config.json (plus the mailbox overlay, if any)"""
+    mailbox = mailbox or Mailbox()
+    config_path = mailbox.config_path
     try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        return mailbox.load_config()
     except FileNotFoundError:
         print(f"Error: SLA config file not found at {config_path}")
         sys.exit(1)
@@ -36,24 +49,15 @@ def load_sla_config() -> Dict[str, Any]:
         sys.exit(1)
 
 def get_week_dates(week_str: str) -> Tuple[date, date]:
-    """Parse ISO week string (e.g., '2025-W34') and return start/end dates"""
+    """Parse ISO week string (e.g., '2025-W34') and return start/end dates (Monday–Sunday).
+
+    Same ISO 8601 weeks as date.isocalendar(), which the watch daemon, the
+    dashboard server and the archive use to name and link weekly dashboards.
+    """
     try:
         year, week = week_str.split('-W')
-        year = int(year)
-        week = int(week)
-        
-        # Get first day of the year
-        jan1 = datetime(year, 1, 1)
-        # Find the first Monday of the year
-        first_monday = jan1 + timedelta(days=(7 - jan1.weekday()) % 7)
-        if jan1.weekday() > 3:  # If Jan 1 is Thu-Sun, first week starts next Monday
-            first_monday += timedelta(days=7)
-        
-        # Calculate start of requested week
-        week_start = first_monday + timedelta(weeks=week-1)
-        week_end = week_start + timedelta(days=6)
-        
-        return week_start.date(), week_end.date()
+        week_start = date.fromisocalendar(int(year), int(week), 1)
+        return week_start, week_start + timedelta(days=6)
     except (ValueError, IndexError):
         print(f"Error: Invalid week format '{week_str}'. Use format: YYYY-Www (e.g., 2025-W34)")
         sys.exit(1)
@@ -94,8 +98,7 @@ def business_hours_label_from_config(config: Dict[str, Any]) -> str:
     return f"{hhmm(start_hour)} to {hhmm(end_hour)} {days_label}"
 
 
-def load_database() -> Dict[str, Any]:
-    db_path = Path(__file__).parent.parent.parent / "database" / "email_database.json"
+def load_database(db_path: Path = DATABASE_PATH) -> Dict[str, Any]:
     try:
         with open(db_path, 'r') as f:
             return json.load(f)
@@ -170,6 +173,87 @@ def build_week_data(
 
     return result
 
+def hour_label(hour: int) -> str:
+    """12-hour clock label for an hour of the day ("7 AM", "12 PM")."""
+    return f"{(hour + 11) % 12 + 1} {'PM' if hour >= 12 else 'AM'}"
+
+
+def build_heatmap(week_data: Dict[str, Dict[str, int]], frame: charts.ChartFrame = HEATMAP_FRAME) -> Dict[str, Any]:
+    """Server-rendered weekday x hour heatmap for week_data (see build_week_data).
+
+    Each cell is the mean count of that weekday's dates at that hour, so a single
+    week shows its exact counts and longer ranges show a typical week.
+    """
+    hours = sorted({hh for counts in week_data.values() for hh in counts})
+    sums = np.zeros((len(DAY_ORDER), len(hours)))
+    days = np.zeros(len(DAY_ORDER))
+    for key, counts in week_data.items():
+        row = (datetime.strptime(key, '%Y-%m-%d').weekday() + 6) % 7  # Tuesday first
+        sums[row] += [counts.get(hh, 0) for hh in hours]
+        days[row] += 1
+    means = np.rint(sums / np.maximum(days, 1)[:, None])
+    heat = charts.heatmap(means, frame, DAY_ORDER, [hour_label(int(hh)) for hh in hours])
+    heat['averaged'] = bool(days.max(initial=0) > 1)
+    heat['width'], heat['height'] = frame.width, frame.height
+    return heat
+
+
+def build_trend_chart(
+    db: Dict[str, Any],
+    week_data: Dict[str, Dict[str, int]],
+    frame: charts.ChartFrame = TREND_FRAME,
+) -> Dict[str, Any]:
+    """Hour-by-hour email volume across the whole range, over bars of each day's hourly mean.
+
+    Days without hourly data are gaps, not zeros. Ranges with more business hours
+    than the plot has pixels (a few months) are LTTB-decimated to one point per pixel.
+    """
+    days_data: Dict[str, Any] = db.get('days', {}) or {}
+    keys = sorted(week_data)
+    hours = sorted({hh for counts in week_data.values() for hh in counts})
+    matrix = np.array([[week_data[key].get(hh, 0) for hh in hours] for key in keys], dtype=float).reshape(len(keys), len(hours))
+    has_hours = np.array([bool((days_data.get(key) or {}).get('hourly_data')) for key in keys], dtype=bool)
+    matrix[~has_hours] = np.nan
+
+    values = matrix.ravel()
+    max_value = float(np.nanmax(values)) if has_hours.any() else 0.0
+    max_value = max(max_value, 1.0)
+    x = frame.x_positions(len(values))
+    y = frame.y_positions(values, max_value)
+    line_x, line_y = charts.decimate(x, y, frame.max_points)
+
+    # One bar per day, centred on that day's span of hours
+    day_width = frame.plot_width / max(len(keys), 1)
+    centres = frame.left + (np.arange(len(keys)) + 0.5) * day_width
+    day_means = np.full(len(keys), np.nan)
+    if has_hours.any():
+        day_means[has_hours] = matrix[has_hours].mean(axis=1)
+    bar_y = frame.y_positions(day_means, max_value)
+    bar_x = centres if len(keys) > 1 else np.array([frame.left + frame.plot_width / 2])
+
+    step = max(1, -(-len(keys) // TREND_MAX_LABELS))
+    x_labels = [
+        {'label': datetime.strptime(keys[i], '%Y-%m-%d').strftime('%a %d' if len(keys) <= 14 else '%b %d'),
+         'x': label_x}
+        for i, label_x in zip(range(0, len(keys), step), charts.format_numbers(centres[::step], 1))
+    ]
+    return {
+        'width': frame.width,
+        'height': frame.height,
+        'left': frame.left,
+        'right': frame.width - frame.right,
+        'baseline': frame.baseline,
+        'line_path': charts.line_path(line_x, line_y, precision=1),
+        'area_path': charts.area_path(line_x, line_y, frame.baseline, precision=1),
+        'bar_path': charts.bar_path(bar_x, bar_y, day_width * 0.8, frame.baseline, precision=1),
+        'y_ticks': frame.y_ticks(int(max_value), count=4),
+        'x_labels': x_labels,
+        'points': int((~np.isnan(values)).sum()),
+        'drawn_points': int((~np.isnan(line_y)).sum()),
+        'missing_days': int((~has_hours).sum()),
+    }
+
+
 def compute_weekly_kpis(
     db: Dict[str, Any],
     config: Dict[str, Any],
@@ -223,7 +307,7 @@ def compute_weekly_kpis(
 
         # If DB missing or flagged not usable, attempt fallback from daily HTML output
         used_fallback = False
-        if (not day_obj or day_obj.get('has_email_data') is False or day_obj.get('has_sla_data') is False) and fallback_daily_output and daily_output_dir is not None:
+        if (not day_obj or day_obj.get('has_email_data') is False or not has_sla(day_obj)) and fallback_daily_output and daily_output_dir is not None:
             html_path = daily_output_dir / f"email_dashboard_{key}.html"
             if html_path.exists():
                 # Parse metrics from HTML
@@ -299,9 +383,12 @@ def compute_weekly_kpis(
                     hourly_total += int(v)
             total_emails += hourly_total
 
+        # SLA figures reconstructed from events (sla_derived) are shown per day, never averaged
+        measured_sla = not day_obj.get('sla_derived')
+
         # SLA compliance weighting (by daily total if available)
         sla_rate = daily_summary.get('sla_compliance_rate')
-        if isinstance(sla_rate, (int, float)):
+        if measured_sla and isinstance(sla_rate, (int, float)):
             weight = int(daily_summary.get('total_emails') or 0)
             if weight and weight > 0:
                 weighted_sla_sum += float(sla_rate) * weight
@@ -309,7 +396,7 @@ def compute_weekly_kpis(
 
         # Collect daily averages for fallbacks
         avg_unread = daily_summary.get('avg_unread_count')
-        if isinstance(avg_unread, (int, float)):
+        if measured_sla and isinstance(avg_unread, (int, float)):
             daily_avg_unread_values.append(float(avg_unread))
 
         avg_rt_daily = daily_summary.get('avg_response_time_minutes')
@@ -367,7 +454,7 @@ def compute_weekly_kpis(
             key = d.strftime('%Y-%m-%d')
             day_obj = days_data.get(key) or {}
             rate = (day_obj.get('daily_summary') or {}).get('sla_compliance_rate')
-            if isinstance(rate, (int, float)):
+            if not day_obj.get('sla_derived') and isinstance(rate, (int, float)):
                 daily_rates.append(float(rate))
         if daily_rates:
             sla_compliance = round(mean(daily_rates), 1)
@@ -396,16 +483,21 @@ def compute_two_hour_metrics_week(
     start_date: date,
     end_date: date,
     specific_dates: Optional[List[date]] = None,
+    facts: Optional[Any] = None,
 ) -> Tuple[List[Dict[str, Any]], int]:
     """Aggregate weekly metrics into 2-hour blocks across included days.
 
+    `facts` is an EmailFactStore; days with a fact partition contribute their exact
+    per-email response times to the median, other days fall back to the expansion
+    of hourly averages.
+
     Output list per 2-hour block with keys:
       - label (e.g., "07:00–08:59")
       - start_hour (int)
       - emails (int) — weekly sum across days/hours in block
       - avg_unread (float | None) — mean of unread snapshots across hours/days
       - avg_response_time (float | None) — weighted avg by emails_replied, fallback to emails
-      - median_response_time (float | None) — weighted median by emails_replied (fallback to emails)
+      - median_response_time (float | None) — exact median from the fact table, or weighted median by emails_replied (fallback to emails)
     Returns (blocks, two_hour_max_emails_week)
     """
     days_data: Dict[str, Any] = db.get('days', {}) or {}
@@ -434,6 +526,15 @@ def compute_two_hour_metrics_week(
         day_obj: Optional[Dict[str, Any]] = days_data.get(key) or {}
         hourly_by_date[key] = list(day_obj.get('hourly_data') or [])
 
+    # One fact partition per included day (a week touches at most 7 files)
+    facts_by_date: Dict[str, Any] = {}
+    if facts is not None:
+        with stage('load_facts'):
+            for key in hourly_by_date:
+                day_facts = facts.read_day(key)
+                if day_facts is not None:
+                    facts_by_date[key] = day_facts
+
     # Iterate 2-hour blocks within business hours (end exclusive)
     # Example: 07..21 -> starts at 7,9,11,13,15,17,19
     for h_start in range(start_hour_b, end_hour_b, 2):
@@ -444,6 +545,10 @@ def compute_two_hour_metrics_week(
         rt_weighted_sum: float = 0.0
         rt_weight_total: float = 0.0
         rt_samples_for_median: List[float] = []
+        exact_samples: List[Any] = [
+            fact_table.response_minutes(day_facts, h_start, h_end_exclusive)
+            for day_facts in facts_by_date.values()
+        ]
 
         for key, hourly_items in hourly_by_date.items():
             for item in hourly_items:
@@ -462,7 +567,7 @@ def compute_two_hour_metrics_week(
                 total_emails += emails_val
 
                 unread_val = item.get('unread_count')
-                if isinstance(unread_val, (int, float)):
+                if isinstance(unread_val, (int, float)) and not item.get('unread_derived'):
                     unread_samples.append(float(unread_val))
 
                 # Response time and weights
@@ -483,6 +588,8 @@ def compute_two_hour_metrics_week(
                 if isinstance(rt, (int, float)) and weight is not None and weight > 0:
                     rt_weighted_sum += float(rt) * weight
                     rt_weight_total += weight
+                    if key in facts_by_date:
+                        continue
                     # Median approximation by expansion
                     # Cap expansion to avoid pathological blow-up
                     capped = int(min(200, max(1, round(weight))))
@@ -490,7 +597,11 @@ def compute_two_hour_metrics_week(
 
         avg_unread: Optional[float] = round(sum(unread_samples) / len(unread_samples), 1) if unread_samples else None
         avg_rt: Optional[float] = round(rt_weighted_sum / rt_weight_total, 1) if rt_weight_total > 0 else None
-        median_rt: Optional[float] = round(median(rt_samples_for_median), 1) if rt_samples_for_median else None
+        if exact_samples:
+            all_samples = np.concatenate(exact_samples + [np.asarray(rt_samples_for_median, dtype=float)])
+            median_rt: Optional[float] = round(float(np.median(all_samples)), 1) if len(all_samples) else None
+        else:
+            median_rt = round(median(rt_samples_for_median), 1) if rt_samples_for_median else None
 
         blocks.append({
             'label': format_block_label(h_start, h_end_exclusive),
@@ -547,32 +658,26 @@ def select_last_n_valid_dates(
     selected.sort()
     return selected
 
-def render_dashboard_html(context: Dict[str, Any]) -> str:
-    """Render weekly KPI template via Jinja2 with provided context."""
-    templates_dir = Path(__file__).parent.parent / "dashboard" / "templates"
-    template_name = "weekly_kpi_cards.html"
-
-    if not templates_dir.exists():
-        print(f"Error: Templates directory not found at {templates_dir}")
-        sys.exit(1)
-
-    env = Environment(
-        loader=FileSystemLoader(str(templates_dir)),
-        autoescape=select_autoescape(['html', 'xml'])
-    )
-
+@timed('render')
+def render_dashboard_html(context: Dict[str, Any], template_name: str = rendering.WEEKLY_TEMPLATE) -> str:
+    """Render weekly KPI template via the shared Jinja2 environment."""
     try:
-        template = env.get_template(template_name)
+        template = rendering.get_template(template_name)
     except Exception as e:
-        print(f"Error: Could not load template '{template_name}' from {templates_dir}: {e}")
+        print(f"Error: Could not load template '{template_name}': {e}")
         sys.exit(1)
 
     return template.render(**context)
 
-def save_dashboard(html_content: str, week_identifier: str, is_last_7_days: bool = False) -> Path:
-    """Save dashboard HTML to output directory"""
-    output_dir = Path(__file__).parent.parent / "dashboard" / "output"
-    output_dir.mkdir(exist_ok=True)
+@timed('write')
+def save_dashboard(html_content: str, week_identifier: str, is_last_7_days: bool = False, write_latest: bool = True,
+                   output_dir: Optional[Path] = None, output_options: Optional[Dict[str, Any]] = None) -> Path:
+    """Save dashboard HTML to output directory (weekly/dashboard/output/ unless given).
+    `output_options` (see output_optimizer.output_options) minifies and precompresses the files."""
+    from output_optimizer import OptimizedOutput, format_report
+
+    output_dir = Path(output_dir) if output_dir else Path(__file__).parent.parent / "dashboard" / "output"
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     # Generate filename
     if is_last_7_days:
@@ -584,54 +689,51 @@ def save_dashboard(html_content: str, week_identifier: str, is_last_7_days: bool
     latest_path = output_dir / "latest.html"
     
     # Save main file
-    with open(output_path, 'w') as f:
-        f.write(html_content)
+    output = OptimizedOutput(html_content, output_options)
+    report = output.write(output_path)
     
     # Create/update latest.html
-    with open(latest_path, 'w') as f:
-        f.write(html_content)
+    if write_latest:
+        output.write(latest_path)
     
+    if output_options:
+        print(f"Optimized {format_report(report)}")
     print(f"Dashboard saved to: {output_path}")
-    print(f"Latest dashboard: {latest_path}")
+    if write_latest:
+        print(f"Latest dashboard: {latest_path}")
     
     return output_path
 
-def main():
-    """Main function"""
-    parser = argparse.ArgumentParser(description='Generate Weekly Email Dashboard')
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('--week', help='ISO week format (e.g., 2025-W34)')
-    group.add_argument('--last-7-days', action='store_true', help='Generate for last 7 days')
-    parser.add_argument('--validate-only', action='store_true', help='Compute KPIs and print, do not write files')
-    parser.add_argument('--fill-missing-days', action='store_true', help='If enabled, selects the last 7 valid days ending at end_date when some days are missing')
-    
-    args = parser.parse_args()
-    
-    # Load configuration
-    sla_config = load_sla_config()
+@timed()
+def build_weekly_context(
+    db: Dict[str, Any],
+    sla_config: Dict[str, Any],
+    start_date: date,
+    end_date: date,
+    is_last_7_days: bool = False,
+    fill_missing_days: bool = False,
+    facts: Optional[Any] = None,
+    daily_output_dir: Optional[Path] = None,
+    include_charts: bool = True,
+) -> Dict[str, Any]:
+    """Compute the full template context (KPIs, heatmap, 2-hour table) for a date range.
+    `facts` defaults to the fact table next to database/email_database.json and
+    `daily_output_dir` (fallback source for missing KPIs) to daily/dashboard/output/.
+    `include_charts=False` skips the SVG geometry (heatmap, trend) when only KPIs are needed.
+    """
+    if facts is None:
+        facts = fact_table.fact_store_for(DATABASE_PATH)
     business_hours_label = business_hours_label_from_config(sla_config)
-    
-    # Determine date range
-    if args.last_7_days:
-        start_date, end_date = get_last_7_days()
-        week_identifier = f"last7days_{datetime.now().strftime('%Y%m%d')}"
-        is_last_7_days = True
-    else:
-        start_date, end_date = get_week_dates(args.week)
-        week_identifier = args.week
-        is_last_7_days = False
-    
+
     # Format week title
     week_title = format_week_title(start_date, end_date, is_last_7_days)
     generated_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
 
-    # Load DB
-    db = load_database()
-
     # Compute KPIs (optionally filling missing days by selecting last N valid)
     specific_dates = None
-    daily_output_dir = Path(__file__).parent.parent.parent / 'daily' / 'dashboard' / 'output'
-    if args.fill_missing_days:
+    if daily_output_dir is None:
+        daily_output_dir = Path(__file__).parent.parent.parent / 'daily' / 'dashboard' / 'output'
+    if fill_missing_days:
         specific_dates = select_last_n_valid_dates(db, sla_config, 7, end_date, daily_output_dir=daily_output_dir)
 
     kpis = compute_weekly_kpis(
@@ -661,6 +763,9 @@ def main():
         'generated_timestamp': generated_timestamp,
         'week_data': week_data,
     }
+    if include_charts:
+        context['heatmap'] = build_heatmap(week_data)
+        context['trend_chart'] = build_trend_chart(db, week_data)
 
     # Compute weekly two-hour metrics table
     two_hour_metrics_week, two_hour_max_emails_week = compute_two_hour_metrics_week(
@@ -669,10 +774,71 @@ def main():
         start_date,
         end_date,
         specific_dates=specific_dates,
+        facts=facts,
     )
     context['two_hour_metrics_week'] = two_hour_metrics_week
     context['two_hour_max_emails_week'] = two_hour_max_emails_week
 
+    return context
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Generate Weekly Email Dashboard')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--week', help='ISO week format (e.g., 2025-W34)')
+    group.add_argument('--last-7-days', action='store_true', help='Generate for last 7 days')
+    parser.add_argument('--validate-only', action='store_true', help='Compute KPIs and print, do not write files')
+    parser.add_argument('--fill-missing-days', action='store_true', help='If enabled, selects the last 7 valid days ending at end_date when some days are missing')
+    parser.add_argument('--profile', action='store_true', help='Dump cProfile stats for the run to data/runs/')
+    parser.add_argument('--trace-memory', action='store_true', help='Record tracemalloc peaks per stage (slower)')
+    parser.add_argument('--mailbox', help="Mailbox to report on (a configured name or 'combined'). Default: the original layout")
+    
+    args = parser.parse_args()
+    
+    if not args.validate_only:
+        start_run('weekly_dashboard', trace_memory=args.trace_memory)
+    with profiled(args.profile, 'weekly_dashboard'):
+        _run(args)
+    finish_run(emit=print)
+
+def _run(args: argparse.Namespace) -> None:
+    """Generate (or validate) the weekly dashboard for parsed CLI args."""
+    try:
+        mailbox = get_mailbox(args.mailbox)
+    except MailboxError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    # Load configuration
+    with stage('load_config'):
+        sla_config = load_sla_config(mailbox)
+    
+    # Determine date range
+    if args.last_7_days:
+        start_date, end_date = get_last_7_days()
+        week_identifier = f"last7days_{datetime.now().strftime('%Y%m%d')}"
+        is_last_7_days = True
+    else:
+        start_date, end_date = get_week_dates(args.week)
+        week_identifier = args.week
+        is_last_7_days = False
+
+    # Load DB
+    with stage('load_database'):
+        db = load_database(mailbox.database_path)
+
+    context = build_weekly_context(
+        db,
+        sla_config,
+        start_date,
+        end_date,
+        is_last_7_days=is_last_7_days,
+        fill_missing_days=args.fill_missing_days,
+        facts=fact_table.fact_store_for(mailbox.database_path),
+        daily_output_dir=mailbox.daily_output_dir,
+        include_charts=not args.validate_only,
+    )
+
     if args.validate_only:
         # Print KPIs and exit non-zero if required fields missing
         print(json.dumps(context, indent=2, default=str))
@@ -687,7 +853,22 @@ def main():
     html_content = render_dashboard_html(context)
     
     # Save dashboard
-    output_path = save_dashboard(html_content, week_identifier, is_last_7_days)
+    from output_optimizer import output_options
+    from archive_index import ArchiveIndex
+
+    try:
+        options = output_options(sla_config)
+    except ValueError as e:
+        print(f"Warning: {e}; writing dashboard as rendered")
+        options = None
+    output_path = save_dashboard(html_content, week_identifier, is_last_7_days, output_dir=mailbox.weekly_output_dir,
+                                 output_options=options)
+
+    # Link the week from the daily archive's month page(s)
+    if not is_last_7_days:
+        year, week = (int(part) for part in week_identifier.split('-W'))
+        with stage('archive'):
+            ArchiveIndex(mailbox, sla_config, options).update(db, [date.fromisocalendar(year, week, 1).isoformat()])
     
     print(f"Weekly dashboard generated successfully for {week_identifier}")
 